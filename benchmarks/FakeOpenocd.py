@@ -0,0 +1,97 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Stand-in for openocd launched by GdbServerInvoker: serves GdbRemoteStub
+on the given port. Like openocd, it prints the tcl and telnet banner lines first
+and the gdb line only after `--examine-time`, once the GDB port accepts connections.
+Optionally it also plays the target UART output on the given ports (in place
+of the remote `socat`) each time the target is resumed.
+Runs until it is terminated or its standard input is closed.
+"""
+
+import argparse
+import signal
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.GdbRemoteStub import GdbRemoteStub  # noqa: E402
+from tests.support.UartStreamServer import UartStreamServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=3333)
+    parser.add_argument("--run-time", type=float, default=0.0)
+    parser.add_argument("--exit-address", type=lambda x: int(x, 0), action="append")
+    parser.add_argument("--exit-code", type=int, default=0)
+    parser.add_argument("--uart-port", type=int, action="append", default=[])
+    parser.add_argument("--output-size", type=int, default=1024 * 1024)
+    parser.add_argument("--rate", type=int)
+    parser.add_argument("--trailer", default="")
+    parser.add_argument("--examine-time", type=float, default=0.5)
+    # options of the real openocd, e.g. -silent appended by GdbServerInvoker
+    args, _ = parser.parse_known_args()
+
+    # the UART output of the target, printed whenever it is resumed
+    uarts = [
+        UartStreamServer(
+            args.output_size,
+            args.rate,
+            port,
+            args.trailer.encode().decode("unicode_escape").encode(),
+            triggered=True,
+        )
+        for port in args.uart_port
+    ]
+    for uart in uarts:
+        uart.start()
+
+    print("Info : Listening on port 6666 for tcl connections", flush=True)
+    print("Info : Listening on port 4444 for telnet connections", flush=True)
+    # openocd opens the GDB port only after the target is examined
+    time.sleep(args.examine_time)
+
+    stub = GdbRemoteStub(
+        args.port,
+        args.run_time,
+        args.exit_address or (),
+        args.exit_code,
+        onRun=lambda: [uart.trigger() for uart in uarts],
+    )
+    stub.start()
+    print("Info : Listening on port %d for gdb connections" % stub.port, flush=True)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        sys.stdin.read()
+    finally:
+        stub.stop()
+        for uart in uarts:
+            uart.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+import threading
+import time
+
+TARGET_XML = (
+    '<?xml version="1.0"?>'
+    '<!DOCTYPE target SYSTEM "gdb-target.dtd">'
+    '<target version="1.0">'
+    "<architecture>arm</architecture>"
+    '<feature name="org.gnu.gdb.arm.m-profile">'
+    + "".join('<reg name="r%d" bitsize="32"/>' % n for n in range(13))
+    + '<reg name="sp" bitsize="32" type="data_ptr"/>'
+    '<reg name="lr" bitsize="32"/>'
+    '<reg name="pc" bitsize="32" type="code_ptr"/>'
+    '<reg name="xpsr" bitsize="32"/>'
+    "</feature>"
+    "</target>"
+)
+
+REGISTER_COUNT = 17
+PC = 15
+
+
+class GdbRemoteStub:
+    """
+    Minimal GDB remote protocol server standing in for openocd's GDB server.
+    It simulates SAMV71 flash and SRAM, register file and a target which runs
+    for `runTime` seconds after each `continue`, unless it is interrupted,
+    then stops at a breakpoint address listed in `exitAddresses`, if there is one.
+    `onRun()` is called whenever the target is resumed.
+    """
+
+    PACKET_SIZE = 0x4000
+
+    def __init__(self, port=0, runTime=0.0, exitAddresses=(), exitCode=0, onRun=None):
+        self.regions = {
+            0x00400000: bytearray(0x200000),  # flash
+            0x20400000: bytearray(0x60000),  # SRAM
+            0xE000E000: bytearray(0x1000),  # system control space
+        }
+        self.registers = [0] * REGISTER_COUNT
+        self.breakpoints = set()
+        self.runTime = runTime
+        self.exitAddresses = set(exitAddresses)
+        self.exitCode = exitCode
+        self.onRun = onRun
+
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", port))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+
+        self.thread = None
+        self.connection = None
+        self.noAck = False
+        self.stopped = threading.Event()
+        self.bytesRead = 0
+        self.bytesWritten = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.server.close()
+        if self.connection is not None:
+            self.connection.close()
+
+    def serve(self):
+        while not self.stopped.is_set():
+            try:
+                self.connection, _ = self.server.accept()
+            except OSError:
+                return
+            self.noAck = False
+            try:
+                self.__session()
+            except OSError:
+                pass
+            self.connection.close()
+            self.connection = None
+
+    def __session(self):
+        pending = b""
+        while True:
+            data = self.connection.recv(65536)
+            if not data:
+                return
+            pending += data
+            while True:
+                pending = pending.lstrip(b"+-")
+                if pending.startswith(b"\x03"):
+                    pending = pending[1:]
+                    continue
+                start = pending.find(b"$")
+                end = pending.find(b"#", start)
+                if start < 0 or end < 0 or len(pending) < end + 3:
+                    break
+                packet = pending[start + 1 : end]
+                pending = pending[end + 3 :]
+                if not self.noAck:
+                    self.connection.sendall(b"+")
+                reply = self.handle(packet)
+                if reply is None:
+                    return
+                self.send(reply)
+                if packet == b"QStartNoAckMode":
+                    self.noAck = True
+
+    def send(self, payload):
+        checksum = sum(payload) & 0xFF
+        self.connection.sendall(b"$" + payload + b"#" + b"%02x" % checksum)
+
+    def __region(self, address, length):
+        for base, memory in self.regions.items():
+            if base <= address and address + length <= base + len(memory):
+                return memory, address - base
+        raise IndexError(hex(address))
+
+    def readMemory(self, address, length):
+        memory, offset = self.__region(address, length)
+        self.bytesRead += length
+        return bytes(memory[offset : offset + length])
+
+    def writeMemory(self, address, data):
+        memory, offset = self.__region(address, len(data))
+        memory[offset : offset + len(data)] = data
+        self.bytesWritten += len(data)
+
+    @staticmethod
+    def __unescape(data):
+        out = bytearray()
+        escaped = False
+        for byte in data:
+            if escaped:
+                out.append(byte ^ 0x20)
+                escaped = False
+            elif byte == 0x7D:
+                escaped = True
+            else:
+                out.append(byte)
+        return bytes(out)
+
+    def __registersHex(self):
+        return b"".join(
+            value.to_bytes(4, "little").hex().encode() for value in self.registers
+        )
+
+    def __run(self):
+        if self.onRun is not None:
+            self.onRun()
+        deadline = time.monotonic() + self.runTime
+        self.connection.settimeout(0.01)
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    data = self.connection.recv(1)
+                except socket.timeout:
+                    continue
+                if data == b"\x03" or not data:
+                    return b"S02"
+        finally:
+            self.connection.settimeout(None)
+
+        # the "test" ends at an exit address, if there is a breakpoint on it
+        hit = self.breakpoints & self.exitAddresses
+        if hit:
+            self.registers[PC] = min(hit)
+            self.registers[0] = self.exitCode
+            return b"T05hwbreak:;"
+        return b"S05"
+
+    def handle(self, packet):
+        try:
+            return self.__handle(packet)
+        except (IndexError, ValueError):
+            return b"E01"
+
+    def __handle(self, packet):
+        if packet.startswith(b"qSupported"):
+            return b"PacketSize=%x;qXfer:features:read+;QStartNoAckMode+" % (
+                self.PACKET_SIZE
+            )
+        if packet == b"QStartNoAckMode":
+            return b"OK"
+        if packet.startswith(b"qXfer:features:read:target.xml:"):
+            offset, length = (
+                int(x, 16) for x in packet.split(b":")[-1].split(b",")
+            )
+            chunk = TARGET_XML.encode()[offset : offset + length]
+            more = offset + length < len(TARGET_XML)
+            return (b"m" if more else b"l") + chunk
+        if packet == b"?":
+            return b"S05"
+        if packet == b"g":
+            return self.__registersHex()
+        if packet.startswith(b"G"):
+            raw = bytes.fromhex(packet[1:].decode())
+            self.registers = [
+                int.from_bytes(raw[i : i + 4], "little") for i in range(0, len(raw), 4)
+            ]
+            return b"OK"
+        if packet.startswith(b"p"):
+            number = int(packet[1:], 16)
+            value = self.registers[number] if number < REGISTER_COUNT else 0
+            return value.to_bytes(4, "little").hex().encode()
+        if packet.startswith(b"P"):
+            number, value = packet[1:].split(b"=")
+            if int(number, 16) < REGISTER_COUNT:
+                self.registers[int(number, 16)] = int.from_bytes(
+                    bytes.fromhex(value.decode()), "little"
+                )
+            return b"OK"
+        if packet.startswith(b"m"):
+            address, length = (int(x, 16) for x in packet[1:].split(b","))
+            return self.readMemory(address, length).hex().encode()
+        if packet.startswith(b"M"):
+            header, data = packet[1:].split(b":", 1)
+            address = int(header.split(b",")[0], 16)
+            self.writeMemory(address, bytes.fromhex(data.decode()))
+            return b"OK"
+        if packet.startswith(b"X"):
+            header, data = packet[1:].split(b":", 1)
+            address = int(header.split(b",")[0], 16)
+            self.writeMemory(address, self.__unescape(data))
+            return b"OK"
+        if packet.startswith(b"qCRC:"):
+            address, length = (int(x, 16) for x in packet[5:].split(b","))
+            return b"C%08x" % crc32(self.readMemory(address, length))
+        if packet.startswith(b"qRcmd,"):
+            return b"OK"
+        if packet.startswith((b"Z0", b"Z1")):
+            self.breakpoints.add(int(packet.split(b",")[1], 16))
+            return b"OK"
+        if packet.startswith((b"z0", b"z1")):
+            self.breakpoints.discard(int(packet.split(b",")[1], 16))
+            return b"OK"
+        if packet == b"vCont?":
+            return b"vCont;c;C;s;S"
+        if packet.startswith((b"c", b"vCont;c", b"vCont;C")):
+            return self.__run()
+        if packet.startswith((b"s", b"vCont;s")):
+            return b"S05"
+        if packet == b"qC":
+            return b"QC1"
+        if packet == b"qfThreadInfo":
+            return b"m1"
+        if packet == b"qsThreadInfo":
+            return b"l"
+        if packet == b"qAttached":
+            return b"1"
+        if packet == b"qSymbol::":
+            return b"OK"
+        if packet.startswith((b"H", b"!", b"D", b"vKill")):
+            return b"OK"
+        if packet == b"k":
+            return None
+        return b""
+
+
+def _crcTable():
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+CRC_TABLE = _crcTable()
+
+
+def crc32(data):
+    """
+    CRC-32 variant used by the `qCRC` packet (MSB-first, no final inversion).
+    """
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ CRC_TABLE[(crc >> 24) ^ byte]
+    return crc
@@ -0,0 +1,189 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Drives FarmScheduler against simulated boards on localhost: each board runs
+gdb_runner with FakeOpenocd (serving GdbRemoteStub and the UART output) and
+a mock SSH client, in its own forked worker process like on a real farm.
+Boards can be made faulty to exercise retries and quarantine:
+  ok      - every run finishes,
+  broken  - the GDB server can't be started, so every run ends with an error,
+  crash   - the worker process dies during its second run.
+Invalid binaries (without Reset_Handler) are added to check that they are
+neither retried nor held against the boards.
+Reports where and after how many attempts each binary ran, which boards
+were quarantined and the wall time against the summed run times.
+Requires GDB with ARM support (e.g. gdb-multiarch).
+
+Usage: benchFarm.py [--gdb PATH] [--binaries N] [--boards KIND[,KIND...]]
+                    [--invalid-binaries N] [--output-size BYTES] [--run-time SECONDS]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchRunner import (  # noqa: E402
+    CONFIG,
+    EXIT,
+    FLASH_BASE,
+    RESET_HANDLER,
+    SENTINEL,
+    STACK_END,
+)
+from gdb_runner import gdb_runner  # noqa: E402
+from libs.FarmScheduler import FarmScheduler  # noqa: E402
+from libs.SshConnectionPool import sshConnectionPool  # noqa: E402
+from tests.support import freePort  # noqa: E402
+from tests.support.ElfWriter import (  # noqa: E402
+    SHF_ALLOC,
+    SHF_EXECINSTR,
+    STT_FUNC,
+    STT_OBJECT,
+    writeElf,
+)
+from tests.support.MockSsh import MockSshClient  # noqa: E402
+
+BOARD_KINDS = ("ok", "broken", "crash")
+
+
+class CrashingRunner:
+    """
+    Runner whose worker process exits in the middle of its `crashOnRun`-th run.
+    """
+
+    def __init__(self, runner, crashOnRun=2):
+        self.runner = runner
+        self.crashOnRun = crashOnRun
+        self.runs = 0
+
+    def setLogPaths(self, consoleLog, uart4Log):
+        self.runner.setLogPaths(consoleLog, uart4Log)
+
+    def runBinary(self, binaryPath):
+        self.runs += 1
+        if self.runs == self.crashOnRun:
+            os._exit(3)
+        return self.runner.runBinary(binaryPath)
+
+    def shutdown(self):
+        self.runner.shutdown()
+
+
+def writeBoardConfig(path, kind, args, directory):
+    config = CONFIG.format(
+        python=sys.executable,
+        openocd=Path(__file__).resolve().parent / "FakeOpenocd.py",
+        gdbPort=freePort(),
+        consolePort=freePort(),
+        uart4Port=freePort(),
+        runTime=args.run_time,
+        exit=hex(EXIT),
+        outputSize=args.output_size,
+        rate="",
+        sentinel=SENTINEL,
+        gdb=args.gdb,
+        trace=os.path.splitext(path)[0] + ".trace.jsonl",
+        bridge="session",
+    )
+    if kind == "broken":
+        config = config.replace(
+            "path = " + sys.executable, "path = " + os.path.join(directory, "no-openocd")
+        )
+    with open(path, "w") as configFile:
+        configFile.write(config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gdb", default="gdb-multiarch")
+    parser.add_argument("--binaries", type=int, default=8)
+    parser.add_argument("--invalid-binaries", type=int, default=2)
+    parser.add_argument("--boards", default="ok,ok,broken,crash")
+    parser.add_argument("--output-size", type=int, default=64 * 1024)
+    parser.add_argument("--run-time", type=float, default=0.5)
+    args = parser.parse_args()
+
+    kinds = args.boards.split(",")
+    for kind in kinds:
+        if kind not in BOARD_KINDS:
+            parser.error("unknown board kind: " + kind)
+
+    directory = tempfile.mkdtemp(prefix="benchFarm")
+    binaries = []
+    for index in range(args.binaries + args.invalid_binaries):
+        binaryPath = os.path.join(directory, "test%d.elf" % index)
+        symbols = [("_exit", EXIT, STT_FUNC), ("_estack", STACK_END, STT_OBJECT)]
+        if index < args.binaries:
+            symbols.append(("Reset_Handler", RESET_HANDLER, STT_FUNC))
+        writeElf(
+            binaryPath,
+            [(".text", FLASH_BASE, os.urandom(16 * 1024), SHF_ALLOC | SHF_EXECINSTR)],
+            symbols,
+        )
+        binaries.append(binaryPath)
+
+    configPaths = []
+    for index, kind in enumerate(kinds):
+        configPath = os.path.join(directory, "board%d.cfg" % index)
+        writeBoardConfig(configPath, kind, args, directory)
+        configPaths.append(configPath)
+    boardKinds = dict(zip(configPaths, kinds))
+
+    def createRunner(configPath):
+        runner = gdb_runner(configPath, "", "")
+        if boardKinds[configPath] == "crash":
+            return CrashingRunner(runner)
+        return runner
+
+    # inherited by the forked board workers
+    sshConnectionPool.clientFactory = lambda config: MockSshClient()
+    farm = FarmScheduler(configPaths, createRunner, os.path.join(directory, "logs"))
+    start = time.perf_counter()
+    results = farm.run(binaries)
+    wallTime = time.perf_counter() - start
+
+    print()
+    print(f"{'Binary':<10}  {'Status':<9}  {'Board':>5}  {'Attempts':>8}  {'Time [s]':>8}")
+    for binaryPath, result in zip(binaries, results):
+        board = configPaths.index(result["board"]) if "board" in result else "-"
+        print(
+            f"{os.path.basename(binaryPath):<10}  {result['status']:<9}  {board:>5}"
+            f"  {result['attempts']:>8}  {result['duration']:8.3f}"
+        )
+    print()
+    for index, kind in enumerate(kinds):
+        ran = sum(1 for result in results if result.get("board") == configPaths[index])
+        print(f"Board {index} ({kind}): {ran} results, quarantined: {configPaths[index] in farm.quarantined}")
+    runTime = sum(result["duration"] for result in results)
+    print(f"Wall time: {wallTime:.3f} s, summed run time: {runTime:.3f} s")
+    print(f"Logs: {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures throughput of GdbInterface bulk memory reads against a local
+GDB server stand-in. Requires GDB with ARM support (e.g. gdb-multiarch).
+
+Usage: benchMemoryRead.py [--gdb PATH] [--size BYTES] [--chunk BYTES]...
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.GdbRemoteStub import GdbRemoteStub  # noqa: E402
+from libs.GdbInterface import GdbInterface  # noqa: E402
+
+SRAM_BASE = 0x20400000
+
+
+def measure(name, size, function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {size / elapsed / 1e6:8.2f} MB/s  ({elapsed:.3f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gdb", default="gdb-multiarch")
+    parser.add_argument("--size", type=int, default=0x60000)
+    parser.add_argument("--chunk", type=int, action="append")
+    args = parser.parse_args()
+
+    stub = GdbRemoteStub()
+    stub.regions[SRAM_BASE][:] = os.urandom(len(stub.regions[SRAM_BASE]))
+    stub.start()
+
+    gdb = GdbInterface("127.0.0.1:" + str(stub.port), args.gdb)
+    gdb.launch()
+    try:
+        expected = bytes(stub.regions[SRAM_BASE][: args.size])
+        for chunk in args.chunk or [None]:
+            label = "default" if chunk is None else str(chunk)
+
+            def read():
+                assert gdb.readMemory(SRAM_BASE, args.size, chunk) == expected
+
+            measure("readMemory, chunk " + label, args.size, read)
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "sram.bin")
+                measure(
+                    "dumpMemory, chunk " + label,
+                    args.size,
+                    lambda: gdb.dumpMemory(SRAM_BASE, args.size, path, chunk),
+                )
+    finally:
+        gdb.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Measures gdb_runner overhead end to end, with local stand-ins for the hardware:
+FakeOpenocd in place of openocd (serving GdbRemoteStub and the UART output),
+a mock SSH client in place of the host running `socat`, and a generated binary.
+Reports bring-up latency, load throughput, capture throughput and teardown time.
+Requires GDB with ARM support (e.g. gdb-multiarch).
+
+Usage: benchRunner.py [--gdb PATH] [--runs N] [--image-size BYTES]
+                      [--output-size BYTES] [--rate BYTES_PER_SECOND] [--run-time SECONDS]
+                      [--bridge session|managed]
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gdb_runner import gdb_runner  # noqa: E402
+from libs.SshConnectionPool import sshConnectionPool  # noqa: E402
+from libs.Tracer import tracer  # noqa: E402
+from tests.support import freePort  # noqa: E402
+from tests.support.ElfWriter import (  # noqa: E402
+    SHF_ALLOC,
+    SHF_EXECINSTR,
+    STT_FUNC,
+    STT_OBJECT,
+    writeElf,
+)
+from tests.support.MockSsh import MockSshClient  # noqa: E402
+
+FLASH_BASE = 0x00400000
+RESET_HANDLER = FLASH_BASE + 0x100
+EXIT = FLASH_BASE + 0x200
+STACK_END = 0x20460000
+SENTINEL = "TESTS-PASSED"
+
+CONFIG = """
+[gdbServer]
+path = {python}
+args = {openocd} --port {gdbPort} --run-time {runTime} --exit-address {exit}
+    --uart-port {consolePort} --uart-port {uart4Port} --output-size {outputSize}
+    {rate} --trailer \\r\\n{sentinel}\\r\\n
+
+[gdb]
+address = 127.0.0.1:{gdbPort}
+path = {gdb}
+verbose =
+exitSymbols = _exit
+
+[ioConsole]
+address = 127.0.0.1
+userName = bench
+password = bench
+baudrate = 115200
+port = {consolePort}
+hardwareDevicePath = /dev/ttyACM0
+parity = PARITY_NONE
+verbose =
+bridge = {bridge}
+
+[ioUart4]
+address = 127.0.0.1
+userName = bench
+password = bench
+baudrate = 115200
+port = {uart4Port}
+hardwareDevicePath = /dev/serial0
+parity = PARITY_NONE
+verbose =
+bridge = {bridge}
+
+[sentinels]
+pass = {sentinel}
+
+[trace]
+file = {trace}
+"""
+
+
+def readPhases(tracePath):
+    """
+    Returns durations and arguments of the phases recorded for each run.
+    """
+    runs = []
+    phases = collections.defaultdict(list)
+    with open(tracePath) as trace:
+        for line in trace:
+            record = json.loads(line)
+            phases[record["phase"]].append(record)
+            if record["phase"] == "run":
+                runs.append(phases)
+                phases = collections.defaultdict(list)
+    return runs
+
+
+def throughput(size, duration):
+    if not size or not duration:
+        return "-"
+    return f"{size / duration / 1e6:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gdb", default="gdb-multiarch")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--image-size", type=int, default=256 * 1024)
+    parser.add_argument("--output-size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--rate", type=int)
+    parser.add_argument("--run-time", type=float, default=30)
+    parser.add_argument("--bridge", choices=("session", "managed"), default="session")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="benchRunner")
+    binaryPath = os.path.join(directory, "test.elf")
+    writeElf(
+        binaryPath,
+        [(".text", FLASH_BASE, os.urandom(max(args.image_size, 1024)), SHF_ALLOC | SHF_EXECINSTR)],
+        [
+            ("Reset_Handler", RESET_HANDLER, STT_FUNC),
+            ("_exit", EXIT, STT_FUNC),
+            ("_estack", STACK_END, STT_OBJECT),
+        ],
+    )
+
+    configPath = os.path.join(directory, "bench.cfg")
+    tracePath = os.path.join(directory, "trace.jsonl")
+    with open(configPath, "w") as config:
+        config.write(
+            CONFIG.format(
+                python=sys.executable,
+                openocd=Path(__file__).resolve().parent / "FakeOpenocd.py",
+                gdbPort=freePort(),
+                consolePort=freePort(),
+                uart4Port=freePort(),
+                runTime=args.run_time,
+                exit=hex(EXIT),
+                outputSize=args.output_size,
+                rate="" if args.rate is None else "--rate " + str(args.rate),
+                sentinel=SENTINEL,
+                gdb=args.gdb,
+                trace=tracePath,
+                bridge=args.bridge,
+            )
+        )
+
+    sshConnectionPool.clientFactory = lambda config: MockSshClient()
+    runner = gdb_runner(configPath, "", "")
+    results = []
+    for run in range(args.runs):
+        runner.setLogPaths(
+            os.path.join(directory, "console%d.log" % run),
+            os.path.join(directory, "uart4%d.log" % run),
+        )
+        results.append(runner.runBinary(binaryPath))
+    start = time.perf_counter()
+    runner.shutdown()
+    teardown = time.perf_counter() - start
+    tracer.close()
+
+    print()
+    print(f"{'Run':>3}  {'Status':<9}  {'Bring-up [s]':>12}  {'Load [MB/s]':>11}"
+          f"  {'Capture [MB/s]':>14}  {'Total [s]':>9}")
+    for run, (result, phases) in enumerate(zip(results, readPhases(tracePath))):
+        bringUp = sum(phase["duration"] for phase in phases["env.init"])
+        # runs which failed may miss phases or their byte counts
+        loaded = sum(phase.get("bytes", 0) for phase in phases["gdb.load"])
+        loadTime = sum(phase["duration"] for phase in phases["gdb.load"])
+        captured = sum(sum(phase.get("bytes", {}).values()) for phase in phases["io.drain"])
+        captureTime = sum(
+            phase["duration"] for phase in phases["target.run"] + phases["io.drain"]
+        )
+        print(
+            f"{run:>3}  {result['status']:<9}  {bringUp:12.3f}"
+            f"  {throughput(loaded, loadTime):>11}"
+            f"  {throughput(captured, captureTime):>14}  {result['duration']:9.3f}"
+        )
+        if result["status"] == "error":
+            print(f"     {result['message']}")
+    print(f"Teardown: {teardown:.3f} s")
+    print(f"Logs and trace: {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures start-up time of the runner in fresh interpreters: the bare interpreter,
+`runSamV71Binary.py` invoked without binaries (the path of a daemon client)
+and the import of `gdb_runner`. Reports the slowest imports and fails when
+a dependency needed only by some of the code paths is imported eagerly,
+or when the median start-up exceeds `--max-ms`.
+
+Usage: benchStartup.py [--runs N] [--max-ms MILLISECONDS] [--top N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LAZY_MODULES = (
+    "paramiko",
+    "scp",
+    "serial",
+    "zstandard",
+    "multiprocessing",
+    "pygdbmi.gdbcontroller",
+    "libs.UartIoHandler",
+    "libs.RttIoHandler",
+    "libs.LocalSerialIoHandler",
+)
+
+SCENARIOS = (
+    ("interpreter", ["-c", "pass"]),
+    ("runSamV71Binary.py (client)", [str(ROOT / "runSamV71Binary.py")]),
+    ("import gdb_runner", ["-c", "import gdb_runner"]),
+)
+
+
+def run(arguments, *options):
+    return subprocess.run(
+        [sys.executable, *options, *arguments],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def measure(arguments, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = run(arguments)
+        durations.append(time.perf_counter() - start)
+    return durations, process
+
+
+def importTimes(arguments):
+    """
+    Returns (cumulative microseconds, module, nesting level) of every import.
+    """
+    process = run(arguments, "-X", "importtime")
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            level = (len(name) - len(name.lstrip())) // 2
+            imports.append((int(cumulative), name.strip(), level))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    failed = False
+    for name, arguments in SCENARIOS:
+        durations, process = measure(arguments, args.runs)
+        if process.returncode != 0 and "Error!" not in process.stdout:
+            print(f"{name:<30} failed:\n{process.stderr}")
+            failed = True
+            continue
+        median = statistics.median(durations) * 1e3
+        print(f"{name:<30} median {median:7.1f} ms  min {min(durations) * 1e3:7.1f} ms")
+        if arguments[0] == "-c" and arguments[1] == "pass":
+            continue
+
+        imports = importTimes(arguments)
+        topLevel = sorted((i for i in imports if i[2] == 0), reverse=True)
+        for cumulative, module, _ in topLevel[: args.top]:
+            print(f"    {cumulative / 1e3:7.1f} ms  {module}")
+
+        eager = [module for _, module, _ in imports if module in LAZY_MODULES]
+        if eager:
+            print("    imported eagerly: " + ", ".join(eager))
+            failed = True
+
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"    median above {args.max_ms} ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Measures throughput of draining UartIoHandler output to a log file,
+comparing the per-chunk receive loop with receiveInto based paths,
+against a local TCP source in place of the remote `socat`.
+
+Usage: benchUartDrain.py [--size BYTES] [--rate BYTES_PER_SECOND] [--compression gzip|zstd]...
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from libs.IoCaptureEngine import IoCaptureEngine  # noqa: E402
+from libs.LogSink import LogSink  # noqa: E402
+from libs.UartIoHandler import UartIoHandler  # noqa: E402
+from tests.support.UartStreamServer import UartStreamServer  # noqa: E402
+
+
+def connect(server):
+    """
+    Returns handler connected directly to the stream server, without SSH.
+    """
+    handler = UartIoHandler("127.0.0.1", "", "", "/dev/null", 115200, server.port, "")
+    handler.uartSocket = handler._connectUartSocket()
+    return handler
+
+
+def receiveLoop(handler, log):
+    while True:
+        data = handler.receive(handler.OPTIMAL_READ_SIZE, timeout=0.1)
+        if len(data) == 0:
+            break
+        log.write(data)
+    log.flush()
+
+
+def drainToFile(handler, log):
+    handler.drainToFile(log, quietTime=0.1)
+
+
+def captureEngine(handler, log):
+    capture = IoCaptureEngine()
+    capture.add(handler, log)
+    capture.start()
+    capture.finish(quietTime=0.1)
+
+
+def readLog(path, compression):
+    if compression == "gzip":
+        with gzip.open(path, "rb") as log:
+            return log.read()
+    if compression == "zstd":
+        import zstandard
+
+        with open(path, "rb") as log:
+            return zstandard.ZstdDecompressor().stream_reader(log).read()
+    with open(path, "rb") as log:
+        return log.read()
+
+
+def report(name, size, elapsed, details=""):
+    print(f"{name:<30} {size / elapsed / 1e6:8.2f} MB/s  ({elapsed:.3f} s{details})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--rate", type=int)
+    parser.add_argument("--compression", action="append", default=[])
+    args = parser.parse_args()
+
+    server = UartStreamServer(args.size, args.rate)
+    server.start()
+    expected = server.expected()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "console.log")
+            for name, function in (
+                ("receive + write per chunk", receiveLoop),
+                ("drainToFile", drainToFile),
+                ("IoCaptureEngine", captureEngine),
+            ):
+                handler = connect(server)
+                with open(path, "wb", buffering=1024 * 1024) as log:
+                    start = time.perf_counter()
+                    function(handler, log)
+                    elapsed = time.perf_counter() - start
+                handler.uartSocket.close()
+
+                with open(path, "rb") as log:
+                    assert log.read() == expected, name + " lost data"
+                report(name, args.size, elapsed)
+
+            for compression in args.compression:
+                handler = connect(server)
+                log = LogSink(path, compression)
+                start = time.perf_counter()
+                captureEngine(handler, log)
+                elapsed = time.perf_counter() - start
+                handler.uartSocket.close()
+
+                name = "IoCaptureEngine + " + (log.compression or "LogSink")
+                assert readLog(log.path, log.compression) == expected, name + " lost data"
+                ratio = args.size / os.path.getsize(log.path)
+                report(name, args.size, elapsed, f", ratio {ratio:.1f}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
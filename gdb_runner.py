@@ -19,35 +19,74 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import binascii
 import atexit
-import configparser
+import contextvars
+import json
+import threading
 import time
-import timeout_decorator
 import os
 
-from libs.GdbInterface import GdbInterface
+from libs.ElfMetadataCache import ElfMetadataCache
+from libs.FlashCache import FlashCache
+from libs.GdbInterface import GdbInterface, GdbRuntimeError
 from libs.GdbServerInvoker import GdbServerInvoker
 from libs.ConnectionConfig import ConnectionConfig
+from libs.CoverageDecoder import CoverageDecoder
+from libs.IoCaptureEngine import IoCaptureEngine
+from libs.LogSink import LogSink
+from libs.RunnerConfig import RunnerConfig, parseMemoryRegions
+from libs.StreamMatcher import StreamMatcher
+from libs.Tracer import tracer
+
+
+class InvalidBinaryError(RuntimeError):
+    """
+    Exception indicating binary, which can't be run on the target,
+    found before the target is touched.
+    """
+
+    pass
 
-from configparser import ConfigParser
 
 class gdb_runner:
+    RESET_SYMBOL = "Reset_Handler"
+    STACK_SYMBOL = "_estack"
+
     __gdbSrv = None
     __gdb = None
     __ioConsole = None
     __ioUart4 = None
+    __capture = None
+    __sentinel = threading.Event()
+    __cleanupRegistered = False
+    __exitBreakpoints = {}
+    __runReport = {}
+    __matchers = []
 
-    __config = ConfigParser()
+    __config = RunnerConfig()
 
     def __init__(self, configPath, virtualConsole, virtualUart4):
-        self.__config = ConfigParser(os.environ)
-        self.__config.read(configPath)
+        self.__config = RunnerConfig(configPath)
         self.__config.set('ioConsole', 'virtualDeviceName', virtualConsole)
         self.__config.set('ioUart4', 'virtualDeviceName', virtualUart4)
+        self.__logPaths = {
+            'ioConsole': "virtualConsoleLog.txt",
+            'ioUart4': "virtualUart4log.txt",
+        }
+        self.__startTime = time.monotonic()
+
+        # a trace requested on the command line takes precedence
+        if self.__config.has_option('trace', 'file') and not tracer.enabled():
+            tracer.open(
+                self.__config.get('trace', 'file'),
+                self.__config.get('trace', 'format', fallback='jsonl'),
+            )
 
-    def __log(msg, *args, **kwargs):
-        print("GDB-RUNNER:", msg, *args, **kwargs)
+    def __log(self, msg, *args, **kwargs):
+        elapsed = time.monotonic() - self.__startTime
+        # a single write keeps lines of concurrent cleanup steps apart
+        line = " ".join(str(part) for part in ("GDB-RUNNER: [%9.3f]" % elapsed, msg) + args)
+        print(line + kwargs.pop("end", "\n"), end="", **kwargs)
 
     def __invokeGdbServer(self):
         self.__log("Starting GDB server...")
@@ -56,9 +95,20 @@ class gdb_runner:
             self.__config.get('gdbServer', 'args'),
             ConnectionConfig.fromConfig(self.__config['gdbServer']),
             verbosity=True,
+            outputBufferSize=self.__config.getint('gdbServer', 'outputBufferSize', fallback=64 * 1024),
+            outputLogPath=self.__config.get('gdbServer', 'outputLog', fallback=None),
         )
-        srv.open()
-        time.sleep(1)
+        with tracer.phase("gdbServer.start"):
+            srv.open()
+            try:
+                srv.waitUntilReady(
+                    self.__config.get('gdbServer', 'readyPattern', fallback=r"Listening on port \d+ for gdb connections"),
+                    self.__config.getfloat('gdbServer', 'readyTimeout', fallback=30),
+                )
+            except BaseException:
+                # the server is not kept by the session yet, so it would hold the probe
+                srv.close()
+                raise
         return srv
 
 
@@ -68,14 +118,51 @@ class gdb_runner:
             self.__config.get('gdb' ,'address'),
             self.__config.get('gdb' ,'path'),
             verbose=self.__config.get('gdb' ,'verbose'),
+            startupTimeout=self.__config.getfloat('gdb', 'startupTimeout', fallback=10),
+            memoryReadPacketSize=self.__config.getint('gdb', 'memoryReadPacketSize', fallback=4096),
         )
-        gdb.launch()
+        with tracer.phase("gdb.launch"):
+            try:
+                gdb.launch()
+            except BaseException:
+                # the GDB process is already started, it would be left behind
+                gdb.shutdown()
+                raise
         return gdb
 
 
     def __openIoHandler(self, config):
         self.__log("Starting IO Handler...")
 
+        handlerType = config.get("type", "uart")
+        if handlerType == "uart":
+            handler = self.__createUartIoHandler(config)
+        elif handlerType == "rtt":
+            handler = self.__createRttIoHandler(config)
+        elif handlerType == "serial":
+            handler = self.__createLocalSerialIoHandler(config)
+        else:
+            raise RuntimeError("Invalid IO handler type supplied in configuration: " + handlerType)
+
+        with tracer.phase("io.open", channel=config.name):
+            handler.open()
+        return handler
+
+    def __createRttIoHandler(self, config):
+        from libs.RttIoHandler import RttIoHandler
+        return RttIoHandler(
+            self.__gdb,
+            config["address"],
+            config["port"],
+            channel=config.get("channel", "0"),
+            searchAddress=config.get("searchAddress", "0x20400000"),
+            searchSize=config.get("searchSize", "0x60000"),
+            controlBlockId=config.get("controlBlockId", "SEGGER RTT", raw=True),
+            startSymbol=config.get("startSymbol", "main"),
+            readyTimeout=config.get("readyTimeout", "10"),
+        )
+
+    def __parity(self, config):
         from libs.UartIoHandler import Parity
         parityConfig: str = str(config["parity"])
         parity: Parity
@@ -88,6 +175,18 @@ class gdb_runner:
             parity = Parity.PARITY_NONE
         else:
             raise RuntimeError("Invalid parity settings supplied in configuration.")
+        return parity
+
+    def __createLocalSerialIoHandler(self, config):
+        from libs.LocalSerialIoHandler import LocalSerialIoHandler
+        return LocalSerialIoHandler(
+            config["hardwareDevicePath"],
+            config["baudrate"],
+            self.__parity(config),
+        )
+
+    def __createUartIoHandler(self, config):
+        parity = self.__parity(config)
 
         from libs.UartIoHandler import UartIoHandler
         handler = UartIoHandler(
@@ -99,56 +198,148 @@ class gdb_runner:
                 config["port"],
                 config["virtualDeviceName"],
                 parity,
-                debug=config["verbose"]
+                debug=config["verbose"],
+                readyTimeout=config.get("readyTimeout", "10"),
+                bridge=config.get("bridge", "session"),
+                bridgeDirectory=config.get(
+                    "bridgeDirectory", UartIoHandler.DEFAULT_BRIDGE_DIRECTORY
+                ),
             )
-        handler.open()
         return handler
 
 
-    def __receiveAndWriteLog(self, io, logPath):
-        with open(logPath, "wb") as logFile:
-            if not io.wasTrafficRedirrectedToPty():
-                while True:
-                    data = io.receive(io.getOptimalReadSize())
-                    if len(data) == 0:
-                        return
-                    logFile.write(data)
-
-
-    def __dumpLog(self, io, logPath, timeout):
-        @timeout_decorator.timeout(timeout)
-        def dumpLogTimeout(io, logPath):
-            self.__receiveAndWriteLog(io, logPath)
-
-        if timeout != 0:
-            dumpLogTimeout(io, logPath)
-
-        else:
-            self.__receiveAndWriteLog(io, logPath)
+    def __sentinelPatterns(self):
+        """
+        Returns {pattern: verdict} for the patterns listed (one per line)
+        in the `pass`, `fail` and `crash` options of the `sentinels` section.
+        """
+        patterns = {}
+        if self.__config.has_section('sentinels'):
+            for verdict in ('pass', 'fail', 'crash'):
+                lines = self.__config.get('sentinels', verdict, raw=True, fallback='')
+                for line in lines.splitlines():
+                    if line.strip():
+                        patterns.setdefault(line.strip(), verdict)
+        return patterns
+
+    def __startCapture(self):
+        self.__capture = IoCaptureEngine()
+        self.__sentinel = threading.Event()
+        self.__matchers = []
+        patterns = self.__sentinelPatterns()
+        for name, io in (('ioConsole', self.__ioConsole), ('ioUart4', self.__ioUart4)):
+            sinks = [
+                LogSink(
+                    self.__logPaths[name],
+                    self.__config.get(name, 'compression', fallback=None),
+                    self.__config.getint(name, 'compressionLevel', fallback=None),
+                )
+            ]
+            if self.__config.getboolean(name, 'coverage', fallback=False):
+                base, extension = os.path.splitext(self.__logPaths[name])
+                sinks.append(CoverageDecoder(base + "_clean" + extension))
+            if patterns:
+                self.__matchers.append(StreamMatcher(patterns, self.__sentinel))
+                sinks.append(self.__matchers[-1])
+            self.__capture.add(io, *sinks, name=name)
+        self.__capture.start()
 
 
     def __cleanup(self):#**ignored):
-        if self.__ioConsole is not None:
-            self.__log("Cleaning IO Handler...")
-            self.__ioConsole.close()
-            self.__ioConsole = None
-        if self.__ioUart4 is not None:
-            self.__log("Cleaning IO Handler...")
-            self.__ioUart4.close()
-            self.__ioUart4 = None
-        if self.__gdb is not None:
-            self.__log("Cleaning GDB...")
-            self.__gdb.shutdown()
-            self.__gdb = None
-        if self.__gdbSrv is not None:
-            self.__log("Cleaning GDB Server...")
-            self.__gdbSrv.close()
-            self.__gdbSrv = None
+        if self.__capture is not None:
+            # the handlers have to be closed even if the capture failed
+            try:
+                self.__capture.finish(quietTime=0)
+            except Exception as e:
+                self.__log("Capture failed:", e)
+            self.__capture = None
+
+        ios = [
+            (name, io)
+            for name, io in (('ioConsole', self.__ioConsole), ('ioUart4', self.__ioUart4))
+            if io is not None
+        ]
+        self.__ioConsole = None
+        self.__ioUart4 = None
+
+        # handlers driven through GDB have to be closed while it still runs,
+        # the rest is closed concurrently with GDB and then the GDB server
+        errors = []
+        for name, io in ios:
+            if io.requiresGdb:
+                self.__runCleanupStep(self.__cleanupIo, errors, name, io)
+        steps = [
+            self.__stepThread(self.__cleanupIo, errors, name, io)
+            for name, io in ios
+            if not io.requiresGdb
+        ]
+        steps.append(self.__stepThread(self.__cleanupGdb, errors))
+        with tracer.phase("cleanup"):
+            for step in steps:
+                step.start()
+            for step in steps:
+                step.join()
+        if errors:
+            raise errors[0]
+
+    @classmethod
+    def __stepThread(cls, step, errors, *args):
+        """
+        Returns thread running the step in a copy of the caller's context,
+        so that e.g. the runner daemon forwards its output with the run's.
+        """
+        return threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(cls.__runCleanupStep, step, errors, *args),
+        )
+
+    @staticmethod
+    def __runCleanupStep(step, errors, *args):
+        try:
+            step(*args)
+        except Exception as e:
+            errors.append(e)
+
+    def __cleanupIo(self, name, io):
+        self.__log("Cleaning IO Handler " + name + "...")
+        with tracer.phase("cleanup.io", channel=name):
+            io.close()
+
+    def __cleanupGdb(self):
+        # the references are dropped even if closing fails, so that the next run starts anew
+        gdb, self.__gdb = self.__gdb, None
+        gdbSrv, self.__gdbSrv = self.__gdbSrv, None
+        self.__exitBreakpoints = {}
+        try:
+            if gdb is not None:
+                self.__log("Cleaning GDB...")
+                with tracer.phase("cleanup.gdb"):
+                    gdb.shutdown()
+        finally:
+            if gdbSrv is not None:
+                self.__log("Cleaning GDB Server...")
+                with tracer.phase("cleanup.gdbServer"):
+                    gdbSrv.close()
 
     def __dumpIOLogs(self):
         self.__log("Downloading logs...")
-        self.__dumpLog(self.__ioConsole, "virtualConsoleLog.txt", int(100))
-        self.__dumpLog(self.__ioUart4, "virtualUart4log.txt", int(100))
+        if self.__capture is not None:
+            quietTime = 1
+            if self.__sentinel.is_set():
+                # the verdict is known, don't wait for more output
+                quietTime = self.__config.getfloat('sentinels', 'quietTime', fallback=0.1)
+            with tracer.phase("io.drain") as trace:
+                trace["bytes"] = self.__capture.finish(quietTime=quietTime, timeout=100)
+            # a failing sink doesn't make the run fail, it is reported with the result
+            errors = [
+                name + ": " + type(sink).__name__ + ": " + str(error)
+                for name, sink, error in self.__capture.sinkErrors
+            ]
+            for error in errors:
+                self.__log("Capture sink failed:", error)
+            if errors:
+                self.__runReport["captureErrors"] = errors
+            self.__capture = None
         self.__log("Log dumped.")
 
     def initTestEnv(self):
@@ -158,51 +349,340 @@ class gdb_runner:
         if self.__gdb is None:
             self.__gdb = self.__invokeGdb()
 
+        resets = []
         if self.__ioConsole is None:
             self.__ioConsole = self.__openIoHandler(self.__config['ioConsole'])
         else:
-            self.__ioConsole.reset()
+            resets.append(self.__ioConsole)
 
         if self.__ioUart4 is None:
             self.__ioUart4 = self.__openIoHandler(self.__config['ioUart4'])
         else:
-            self.__ioUart4.reset()
+            resets.append(self.__ioUart4)
+
+        # each reset waits for its channel to go quiet, so they run concurrently
+        errors = []
+        steps = [self.__stepThread(io.reset, errors) for io in resets]
+        for step in steps:
+            step.start()
+        for step in steps:
+            step.join()
+        if errors:
+            raise errors[0]
+
+        if not self.__cleanupRegistered:
+            atexit.register(self.__cleanup)
+            self.__cleanupRegistered = True
+
+    def setLogPaths(self, consoleLog, uart4Log):
+        self.__logPaths = {'ioConsole': consoleLog, 'ioUart4': uart4Log}
+
+    def shutdown(self):
+        self.__cleanup()
+
+
+    def __reflashSections(self, binaryPath, sections):
+        if any(section.address != section.loadAddress for section in sections):
+            return False
+        try:
+            for section in sections:
+                self.__log("Reflashing section " + section.name + "...")
+                self.__gdb.restore(
+                    binaryPath, section.address, section.address + section.size
+                )
+        except GdbRuntimeError as e:
+            self.__log(e)
+            return False
+        return True
+
+    def __readImage(self, binaryPath):
+        """
+        Returns metadata of the binary (cached by its contents) and checks,
+        before the target is touched, that it can be started and fits
+        the configured memory regions.
+        """
+        try:
+            image = ElfMetadataCache(
+                self.__config.get('gdb', 'flashCacheDir', fallback=FlashCache.DEFAULT_DIRECTORY)
+            ).get(binaryPath)
+        except (OSError, ValueError) as e:
+            raise InvalidBinaryError("Can't read " + binaryPath + ": " + str(e)) from e
+
+        for symbol in (self.RESET_SYMBOL, self.STACK_SYMBOL):
+            if image.symbol(symbol) is None:
+                raise InvalidBinaryError("Symbol " + symbol + " not found in " + binaryPath + ".")
+
+        regions = parseMemoryRegions(self.__config.get('gdb', 'memoryRegions', fallback=''))
+        if regions:
+            for section in image.loadableSections():
+                for address in {section.address, section.loadAddress}:
+                    if not any(
+                        start <= address and address + section.size <= end
+                        for start, end in regions
+                    ):
+                        raise InvalidBinaryError(
+                            "Section {} ({:#x}-{:#x}) of {} is outside of the target memory.".format(
+                                section.name, address, address + section.size, binaryPath
+                            )
+                        )
+        return image
+
+    def __loadBinary(self, binaryPath, image):
+        mode = self.__config.get('gdb', 'loadMode', fallback='full')
+        with tracer.phase("gdb.load", mode=mode) as trace:
+            if mode == 'full':
+                # keep the record of the flashed image valid for the cached mode
+                cache = self.__flashCache()
+                cache.invalidate()
+                self.__gdb.load(binaryPath, reset=True)
+                cache.store(image)
+                trace["bytes"] = image.loadSize()
+            else:
+                self.__gdb.reset()
+                trace["bytes"] = self.__loadIncrementally(binaryPath, image, mode)
+
+    def __flashCache(self):
+        return FlashCache(
+            self.__config.get('gdb', 'flashCacheDir', fallback=FlashCache.DEFAULT_DIRECTORY),
+            self.__config.get('gdb', 'address'),
+        )
+
+    def __loadIncrementally(self, binaryPath, image, mode):
+
+        cache = self.__flashCache()
+        self.__gdb.loadSymbols(binaryPath)
+
+        if mode == 'cached':
+            changed = cache.changedSections(image)
+        elif mode == 'compare':
+            mismatched = set(self.__gdb.compareSections())
+            changed = [s for s in image.loadableSections() if s.name in mismatched]
+        else:
+            raise RuntimeError("Invalid load mode supplied in configuration.")
 
-        atexit.register(self.__cleanup)
+        if not changed:
+            self.__log("Image already on target, skipping load.")
+            return 0
 
+        cache.invalidate()
+        loaded = sum(section.size for section in changed)
+        if not self.__reflashSections(binaryPath, changed):
+            self.__log("Loading whole image...")
+            self.__gdb.flash()
+            loaded = image.loadSize()
+        cache.store(image)
+        return loaded
 
     def startOnGdb(self, binaryPath):
-        self.initTestEnv()
+        image = self.__readImage(binaryPath)
+        with tracer.phase("env.init"):
+            self.initTestEnv()
 
-        self.__gdb.reset()
-        self.__gdb.load(binaryPath)
-        self.__gdb.execCmd("set $pc = &Reset_Handler")
-        self.__gdb.execCmd("set $sp = &_estack")
+        self.__loadBinary(binaryPath, image)
+        self.__prepareExecution(image)
+        self.__startRtt(image)
         self.__log("Starting execution...")
+        self.__startCapture()
         self.__gdb.start()
         self.__log("Execution started.")
 
+    def __startRtt(self, image):
+        """
+        Runs the binary until it initializes its RTT control block,
+        then starts the transfers of RTT channels.
+        """
+        from libs.RttIoHandler import RttIoHandler
+        handlers = [
+            io for io in (self.__ioConsole, self.__ioUart4) if isinstance(io, RttIoHandler)
+        ]
+        if not handlers:
+            return
+
+        with tracer.phase("io.rttStart", symbol=handlers[0].startSymbol):
+            address = image.symbol(handlers[0].startSymbol)
+            self.__gdb.insertBreakpoint(
+                handlers[0].startSymbol if address is None else "*{:#x}".format(address),
+                temporary=True,
+            )
+            self.__gdb.start()
+            if not self.__gdb.waitForFinish(timeout=handlers[0].readyTimeout):
+                self.__gdb.stop()
+                raise RuntimeError(
+                    "The binary did not reach " + handlers[0].startSymbol + "."
+                )
+            for handler in handlers:
+                handler.startTransfer()
+
+    def __prepareExecution(self, image):
+        """
+        Sets the initial PC and SP and replaces the previous exit breakpoints
+        with hardware breakpoints on the configured symbols marking the end
+        of the test (e.g. `_exit`, `abort` or the HardFault handler), in a single batch.
+        Addresses are taken from the image metadata, so GDB does not have to look them up.
+        """
+        commands = [
+            "set $pc = {:#x}".format(image.symbol(self.RESET_SYMBOL)),
+            "set $sp = {:#x}".format(image.symbol(self.STACK_SYMBOL)),
+        ]
+        if self.__exitBreakpoints:
+            commands.append(
+                "-break-delete " + " ".join(str(n) for n in self.__exitBreakpoints)
+            )
+        symbols = []
+        for symbol in self.__config.get('gdb', 'exitSymbols', fallback='').replace(',', ' ').split():
+            if image.symbol(symbol) is None:
+                self.__log("Exit breakpoint on " + symbol + " not set: symbol not found in the binary.")
+            else:
+                symbols.append(symbol)
+        required = len(commands)
+        commands += ["-break-insert -h *{:#x}".format(image.symbol(symbol)) for symbol in symbols]
+
+        results = self.__gdb.execBatch(commands, raiseOnError=False)
+        failures = [
+            command + ": " + result["payload"]["msg"]
+            for command, result in zip(commands[:required], results)
+            if result["message"] == "error"
+        ]
+        if failures:
+            raise GdbRuntimeError("\n".join(failures))
+
+        breakpoints = {}
+        for symbol, result in zip(symbols, results[required:]):
+            if result["message"] == "error":
+                self.__log("Exit breakpoint on " + symbol + " not set: " + result["payload"]["msg"])
+            else:
+                breakpoints[int(result["payload"]["bkpt"]["number"])] = symbol
+        self.__exitBreakpoints = breakpoints
+
+    def __checkExitBreakpoint(self):
+        """
+        Returns the exit symbol and code if the execution stopped on an exit breakpoint.
+        Only the symbols listed in `exitCodeSymbols` exit with a code, a stop on
+        any other exit symbol (e.g. `abort` or the HardFault handler) is a crash.
+        """
+        stop = self.__gdb.lastStop or {}
+        symbol = self.__exitBreakpoints.get(int(stop.get("bkptno", 0)))
+        if symbol is None:
+            return {}
+        exitCodeSymbols = self.__config.get('gdb', 'exitCodeSymbols', fallback='_exit').replace(',', ' ').split()
+        if symbol not in exitCodeSymbols:
+            self.__log("Reached " + symbol + ", verdict: crash")
+            return {"exitSymbol": symbol, "verdict": "crash"}
+        exitCode = int(self.__gdb.evaluate("$r0"), 0)
+        self.__log("Reached " + symbol + " with exit code " + str(exitCode))
+        return {"exitSymbol": symbol, "exitCode": exitCode}
+
+    def __writeSnapshot(self):
+        """
+        Writes the post-mortem state of the target as JSON next to the console log.
+        """
+        path = os.path.splitext(self.__logPaths['ioConsole'])[0] + ".snapshot.json"
+        try:
+            with tracer.phase("gdb.snapshot"):
+                snapshot = self.__gdb.snapshot(
+                    self.__config.getint('gdb', 'snapshotStackSize', fallback=256)
+                )
+        except Exception as e:
+            self.__log("Couldn't take the target snapshot: " + str(e))
+            return
+
+        frames = snapshot["frames"]
+        if isinstance(frames, list) and frames:
+            self.__log(
+                "Stopped in " + frames[0].get("func", "??") + " at " + frames[0].get("addr", "?")
+            )
+        with open(path, "w") as snapshotFile:
+            json.dump(snapshot, snapshotFile, indent=2)
+        self.__runReport["snapshot"] = path
+
+    def __checkSentinels(self):
+        """
+        Returns the verdict and the pattern, if a sentinel pattern appeared in the output.
+        """
+        for matcher in self.__matchers:
+            if matcher.verdict is not None:
+                pattern = matcher.pattern.decode("utf-8", errors="replace")
+                self.__log("Sentinel '" + pattern + "' found, verdict: " + matcher.verdict)
+                return {"verdict": matcher.verdict, "sentinel": pattern}
+        return {}
+
     def waitToFinishOnGdb(self):
-        
+        status = "finished"
+        self.__runReport = {}
         if self.__gdb.isRunning():
             try:
                 self.__log("Waiting for GDB to finish...")
-                if not self.__gdb.waitForFinish(timeout=int(1000)):
-                    self.__gdb.stop()
+                timeout = self.__config.getint('gdb', 'runTimeout', fallback=1000)
+                with tracer.phase("target.run") as trace:
+                    if not self.__gdb.waitForFinish(timeout, self.__sentinel):
+                        status = "timeout"
+                    trace["status"] = status
             except Exception as e:
                 self.__log(e)
-                self.__gdb.stop()
+                status = "error"
             except KeyboardInterrupt:
                 self.__log("Execution terminated by prressing ^C")
                 self.__gdb.terminate()
                 self.__log("Gdb client terminated")
                 self.__dumpIOLogs()
-                return
+                # ^C stops the whole batch, not only this run
+                raise
+            # a target that does not halt raises here, runBinary then drops the session
+            self.__gdb.stop()
 
         self.__log("Execution finished.")
-        self.__gdb.execCmd("bt", pollUntilDone=True)
-        self.__gdb.execCmd("info reg", pollUntilDone=True)
+        if status == "finished":
+            self.__runReport = self.__checkExitBreakpoint()
+        self.__writeSnapshot()
         self.__dumpIOLogs()
+        sentinel = self.__checkSentinels()
+        if self.__runReport.get("verdict") == "crash":
+            # the target stopped on a crash handler, whatever it printed before
+            sentinel.pop("verdict", None)
+        self.__runReport.update(sentinel)
+        return status
+
+    def runBinary(self, binaryPath):
+        """
+        Runs the binary on the target, reusing already initialized environment,
+        and returns dictionary describing the result.
+        """
+        result = {
+            "binary": binaryPath,
+            "logs": {
+                name: LogSink.pathFor(path, self.__config.get(name, 'compression', fallback=None))
+                for name, path in self.__logPaths.items()
+            },
+        }
+        start = time.monotonic()
+        try:
+            with tracer.phase("run", binary=binaryPath) as trace:
+                self.startOnGdb(binaryPath)
+                result["status"] = trace["status"] = self.waitToFinishOnGdb()
+                result.update(self.__runReport)
+        except InvalidBinaryError as e:
+            # found before the target was touched, the session is still fine
+            self.__log(e)
+            result["status"] = "error"
+            result["message"] = str(e)
+            result["invalidBinary"] = True
+        except Exception as e:
+            self.__log(e)
+            result["status"] = "error"
+            result["message"] = str(e)
+            # the session can't be trusted anymore, next run starts a new one
+            self.__dropSession()
+        except KeyboardInterrupt:
+            self.__dropSession()
+            raise
+        result["duration"] = time.monotonic() - start
+        return result
+
+    def __dropSession(self):
+        try:
+            self.__cleanup()
+        except Exception as e:
+            self.__log("Cleanup failed:", e)
 
     def __readMemoryFromGdb(self, env, address, size=4):
         self.initTestEnv(env)
@@ -211,26 +691,3 @@ class gdb_runner:
         value = self.__gdb.rmem(address, size)
         self.__log(f"0x{address:08x}: {value.hex()}")
         return value
-
-    def __convertCoverageLog(logFileName):
-        fileName = None
-        with open(logFileName) as log:
-            for line in log.readlines():
-                if line.startswith(">>>"):
-                    fileName = line[3:-1]
-                elif fileName is not None:
-                    with open(fileName, "wb") as outFile:
-                        outFile.write(binascii.a2b_hex(line.strip()))
-                    fileName = None
-
-
-    def __removeCoverageFromLog(source, target):
-        logLines = []
-        with open(source) as log:
-            for line in log:
-                logLines.append(line)
-                if line == ">> COVERAGE RESULT - BEGIN <<\n":
-                    logLines = logLines[:-2]  # begin line and \n before it
-                    break
-        with open(target, "w") as log:
-            log.writelines(logLines)
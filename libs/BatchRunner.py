@@ -0,0 +1,151 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import json
+import os
+import time
+
+
+def collectBinaries(patterns, manifestPath=None):
+    """
+    Expands binary paths and glob patterns, followed by the entries of
+    the manifest file (one path or pattern per line, `#` starts a comment).
+    """
+    entries = [(pattern, os.getcwd()) for pattern in patterns]
+    if manifestPath is not None:
+        baseDir = os.path.dirname(os.path.abspath(manifestPath))
+        with open(manifestPath) as manifest:
+            for line in manifest:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    entries.append((line, baseDir))
+
+    binaries = []
+    for pattern, baseDir in entries:
+        pattern = os.path.join(baseDir, os.path.expanduser(pattern))
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise RuntimeError("No binaries match " + pattern)
+            binaries += matches
+        else:
+            binaries.append(pattern)
+    return binaries
+
+
+def assignLogPaths(binaries, logDir):
+    """
+    Returns unique (console log, UART4 log) paths for each of the binaries.
+    """
+    usedNames = {}
+    paths = []
+    for binary in binaries:
+        name = os.path.splitext(os.path.basename(binary))[0]
+        if name in usedNames:
+            usedNames[name] += 1
+            name += "_" + str(usedNames[name])
+        else:
+            usedNames[name] = 0
+        paths.append(
+            (
+                os.path.join(logDir, name + ".virtualConsoleLog.txt"),
+                os.path.join(logDir, name + ".virtualUart4log.txt"),
+            )
+        )
+    return paths
+
+
+def outcome(result):
+    """
+    Returns the verdict of the run: the sentinel verdict, or `exit <code>`
+    if an exit breakpoint was hit, and `-` when neither is known.
+    """
+    if "verdict" in result:
+        return result["verdict"]
+    if "exitCode" in result:
+        return "exit " + str(result["exitCode"])
+    return "-"
+
+
+def isFailed(result, failOnTimeout=False):
+    """
+    Tells whether the run ended with an error, reached a fail or crash verdict
+    or exited with a non-zero code. A run stopped by the timeout is failed only
+    with `failOnTimeout`, since firmware without exit breakpoints or sentinels
+    can only end that way.
+    """
+    return (
+        result["status"] not in ("finished", "timeout")
+        or (result["status"] == "timeout" and failOnTimeout)
+        or result.get("verdict") in ("fail", "crash")
+        or result.get("exitCode", 0) != 0
+    )
+
+
+class BatchRunner:
+    """
+    Class running many binaries back to back in a single test environment
+    session, with separate log files for each binary.
+    `runOne(binary, consoleLog, uart4Log)` executes a single binary
+    and returns the result dictionary produced by `gdb_runner.runBinary`.
+    """
+
+    def __init__(self, runOne, logDir=".", failOnTimeout=False):
+        self.runOne = runOne
+        self.logDir = logDir
+        self.failOnTimeout = failOnTimeout
+        self.results = []
+        self.duration = 0
+
+    def run(self, binaries):
+        os.makedirs(self.logDir, exist_ok=True)
+        logPaths = assignLogPaths(binaries, self.logDir)
+        start = time.monotonic()
+        for index, binary in enumerate(binaries):
+            print(f"[{index + 1}/{len(binaries)}] Running {binary}")
+            consoleLog, uart4Log = logPaths[index]
+            self.results.append(self.runOne(binary, consoleLog, uart4Log))
+        self.duration = time.monotonic() - start
+        return self.results
+
+    def failed(self):
+        return [result for result in self.results if isFailed(result, self.failOnTimeout)]
+
+    def printSummary(self):
+        width = max([len(result["binary"]) for result in self.results] + [6])
+        print()
+        print(f"{'Binary':<{width}}  {'Status':<11}  {'Verdict':<8}  {'Time [s]':>9}")
+        for result in self.results:
+            print(
+                f"{result['binary']:<{width}}  {result['status']:<11}"
+                f"  {outcome(result):<8}  {result['duration']:9.2f}"
+            )
+        print(
+            f"{len(self.results)} binaries, {len(self.failed())} failed,"
+            f" {self.duration:.2f} s total"
+        )
+
+    def writeSummary(self, path):
+        with open(path, "w") as summary:
+            json.dump(
+                {"duration": self.duration, "results": self.results}, summary, indent=2
+            )
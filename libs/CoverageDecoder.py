@@ -0,0 +1,130 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import binascii
+
+
+class CoverageDecoder:
+    """
+    Sink decoding coverage results dumped by the application while the console
+    output is captured. Each `>>>filename` line is followed by a line of hex
+    encoded gcda contents, which is decoded into that file incrementally.
+    Console output preceding the `>> COVERAGE RESULT - BEGIN <<` marker
+    (without the marker and the line before it) is written to the clean log.
+    """
+
+    BEGIN_MARKER = b">> COVERAGE RESULT - BEGIN <<"
+    FILE_MARKER = b">>>"
+    BLANKS = b" \t\r"
+
+    def __init__(self, cleanLogPath):
+        self.cleanLog = open(cleanLogPath, "wb")
+        self.line = bytearray()
+        self.heldLine = None
+        self.coverageStarted = False
+
+        self.gcda = None
+        self.nibble = b""
+        self.files = []
+
+    def write(self, data):
+        data = bytes(data)
+        position = 0
+        while position < len(data):
+            if self.gcda is not None:
+                position = self.__decodeHex(data, position)
+                continue
+
+            end = data.find(b"\n", position)
+            if end < 0:
+                self.line += data[position:]
+                break
+            self.line += data[position : end + 1]
+            position = end + 1
+            self.__processLine(bytes(self.line))
+            self.line.clear()
+        return len(data)
+
+    def __processLine(self, line):
+        stripped = line.rstrip(b"\r\n")
+        if not self.coverageStarted:
+            if stripped == self.BEGIN_MARKER:
+                # the marker is preceded by an empty line, drop both
+                self.coverageStarted = True
+                self.heldLine = None
+            else:
+                self.__releaseHeldLine()
+                self.heldLine = line
+
+        if stripped.startswith(self.FILE_MARKER):
+            fileName = stripped[len(self.FILE_MARKER) :].decode("utf-8")
+            self.gcda = open(fileName, "wb")
+            self.files.append(fileName)
+
+    def __releaseHeldLine(self):
+        if self.heldLine is not None:
+            self.cleanLog.write(self.heldLine)
+            self.heldLine = None
+
+    def __decodeHex(self, data, position):
+        end = data.find(b"\n", position)
+        chunk = data[position : end if end >= 0 else len(data)]
+
+        if not self.coverageStarted:
+            self.__releaseHeldLine()
+            self.cleanLog.write(data[position : end + 1 if end >= 0 else len(data)])
+
+        digits = self.nibble + chunk.translate(None, self.BLANKS)
+        even = len(digits) & ~1
+        self.gcda.write(binascii.a2b_hex(digits[:even]))
+        self.nibble = digits[even:]
+
+        if end < 0:
+            return len(data)
+
+        self.gcda.close()
+        self.gcda = None
+        self.nibble = b""
+        return end + 1
+
+    def flush(self):
+        self.cleanLog.flush()
+
+    def close(self):
+        if self.gcda is not None:
+            self.gcda.close()
+            self.gcda = None
+        if not self.coverageStarted:
+            self.__releaseHeldLine()
+            self.cleanLog.write(self.line)
+        self.cleanLog.close()
+
+    @staticmethod
+    def decodeFile(logPath, cleanLogPath, chunkSize=1024 * 1024):
+        """
+        Decodes coverage results from an already captured log.
+        """
+        decoder = CoverageDecoder(cleanLogPath)
+        with open(logPath, "rb") as log:
+            for chunk in iter(lambda: log.read(chunkSize), b""):
+                decoder.write(chunk)
+        decoder.close()
+        return decoder.files
@@ -0,0 +1,231 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import hashlib
+import struct
+from typing import NamedTuple
+
+SHT_SYMTAB = 2
+SHT_NOBITS = 8
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+PT_LOAD = 1
+STT_FUNC = 2
+STB_LOCAL = 0
+SHN_UNDEF = 0
+EM_ARM = 40
+
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+
+
+class ElfError(ValueError):
+    """
+    Exception indicating malformed or unsupported ELF file.
+    """
+
+    pass
+
+
+class ElfSection(NamedTuple):
+    """
+    Tuple describing section of the ELF file.
+    `address` is the run-time (VMA) and `loadAddress` the load (LMA) address.
+    """
+
+    name: str
+    type: int
+    flags: int
+    address: int
+    loadAddress: int
+    offset: int
+    size: int
+
+    def isLoadable(self) -> bool:
+        return bool(self.flags & SHF_ALLOC) and self.type != SHT_NOBITS and self.size > 0
+
+    def isWritable(self) -> bool:
+        return bool(self.flags & SHF_WRITE)
+
+
+class ElfSegment(NamedTuple):
+    """
+    Tuple describing program header (segment) of the ELF file.
+    """
+
+    type: int
+    offset: int
+    address: int
+    loadAddress: int
+    fileSize: int
+    memorySize: int
+
+
+class ElfFile:
+    """
+    Minimal reader of ELF files, providing sections, segments and symbols
+    needed to plan loading of the image without asking GDB.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        if data is None:
+            with open(path, "rb") as elf:
+                data = elf.read()
+        self.data = data
+
+        if self.data[:4] != b"\x7fELF":
+            raise ElfError(path + " is not an ELF file.")
+
+        elfClass = self.data[4]
+        if elfClass not in (ELFCLASS32, ELFCLASS64):
+            raise ElfError("Unsupported ELF class in " + path)
+        self.is64Bit = elfClass == ELFCLASS64
+        self.byteOrder = "<" if self.data[5] == ELFDATA2LSB else ">"
+
+        header = self.__unpack("HHIQQQIHHHHHH" if self.is64Bit else "HHIIIIIHHHHHH", 16)
+        (
+            _,
+            self.machine,
+            _,
+            self.entry,
+            programHeaderOffset,
+            sectionHeaderOffset,
+            _,
+            _,
+            programHeaderSize,
+            programHeaderCount,
+            sectionHeaderSize,
+            sectionHeaderCount,
+            sectionNamesIndex,
+        ) = header
+
+        self.segments = [
+            self.__parseSegment(programHeaderOffset + i * programHeaderSize)
+            for i in range(programHeaderCount)
+        ]
+        rawSections = [
+            self.__unpack(
+                "IIQQQQIIQQ" if self.is64Bit else "IIIIIIIIII",
+                sectionHeaderOffset + i * sectionHeaderSize,
+            )
+            for i in range(sectionHeaderCount)
+        ]
+        self.sections = self.__parseSections(rawSections, sectionNamesIndex)
+        self.rawSections = rawSections
+
+    def __unpack(self, fields, offset):
+        try:
+            return struct.unpack_from(self.byteOrder + fields, self.data, offset)
+        except struct.error:
+            raise ElfError("Truncated ELF file " + self.path)
+
+    def __parseSegment(self, offset):
+        if self.is64Bit:
+            type, _, fileOffset, address, loadAddress, fileSize, memorySize, _ = (
+                self.__unpack("IIQQQQQQ", offset)
+            )
+        else:
+            type, fileOffset, address, loadAddress, fileSize, memorySize, _, _ = (
+                self.__unpack("IIIIIIII", offset)
+            )
+        return ElfSegment(type, fileOffset, address, loadAddress, fileSize, memorySize)
+
+    def __parseSections(self, rawSections, sectionNamesIndex):
+        names = b""
+        if sectionNamesIndex < len(rawSections):
+            _, _, _, _, offset, size, *_ = rawSections[sectionNamesIndex]
+            names = self.data[offset : offset + size]
+
+        sections = []
+        for nameOffset, type, flags, address, offset, size, *_ in rawSections:
+            end = names.find(b"\0", nameOffset)
+            name = names[nameOffset:end].decode("utf-8", "replace")
+            sections.append(
+                ElfSection(
+                    name,
+                    type,
+                    flags,
+                    address,
+                    self.__loadAddressOf(type, offset, size, address),
+                    offset,
+                    size,
+                )
+            )
+        return sections
+
+    def __loadAddressOf(self, type, offset, size, address):
+        if type == SHT_NOBITS:
+            return address
+        for segment in self.segments:
+            if (
+                segment.type == PT_LOAD
+                and segment.offset <= offset
+                and offset + size <= segment.offset + segment.fileSize
+            ):
+                return segment.loadAddress + (offset - segment.offset)
+        return address
+
+    def symbols(self):
+        """
+        Returns addresses of the symbols defined in the symbol table, by name.
+        Global symbols take precedence over local ones, Thumb bit is cleared
+        from the ARM function addresses.
+        """
+        symbols = {}
+        bindings = {}
+        for _, type, _, _, offset, size, link, _, _, entrySize in self.rawSections:
+            if type != SHT_SYMTAB or entrySize == 0 or link >= len(self.rawSections):
+                continue
+            _, _, _, _, namesOffset, namesSize, *_ = self.rawSections[link]
+            names = self.data[namesOffset : namesOffset + namesSize]
+            for entry in range(offset, offset + size, entrySize):
+                if self.is64Bit:
+                    nameOffset, info, _, index, value, _ = self.__unpack("IBBHQQ", entry)
+                else:
+                    nameOffset, value, _, info, _, index = self.__unpack("IIIBBH", entry)
+                if index == SHN_UNDEF or nameOffset == 0:
+                    continue
+                name = names[nameOffset : names.find(b"\0", nameOffset)].decode(
+                    "utf-8", "replace"
+                )
+                if name in symbols and bindings[name] != STB_LOCAL:
+                    continue
+                if self.machine == EM_ARM and info & 0xF == STT_FUNC:
+                    value &= ~1
+                symbols[name] = value
+                bindings[name] = info >> 4
+        return symbols
+
+    def digest(self):
+        return hashlib.sha256(self.data).hexdigest()
+
+    def loadableSections(self):
+        return [section for section in self.sections if section.isLoadable()]
+
+    def sectionData(self, section):
+        return memoryview(self.data)[section.offset : section.offset + section.size]
+
+    def sectionDigest(self, section):
+        return hashlib.sha256(self.sectionData(section)).hexdigest()
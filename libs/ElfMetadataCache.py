@@ -0,0 +1,122 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+
+from .ElfFile import ElfFile, ElfSection
+
+
+class ElfMetadata:
+    """
+    Information about the image needed to load and start it (loadable sections
+    with their digests, symbols, entry point), read once from the ELF file.
+    Provides the same interface for load planning as `ElfFile`.
+    """
+
+    def __init__(self, sha256, entry, machine, sections, digests, symbols):
+        self.sha256 = sha256
+        self.entry = entry
+        self.machine = machine
+        self.sections = sections
+        self.digests = digests
+        self.symbols = symbols
+
+    @classmethod
+    def fromElf(cls, elf, sha256):
+        sections = elf.loadableSections()
+        return cls(
+            sha256,
+            elf.entry,
+            elf.machine,
+            sections,
+            {section.name: elf.sectionDigest(section) for section in sections},
+            elf.symbols(),
+        )
+
+    @classmethod
+    def fromDict(cls, values):
+        return cls(
+            values["sha256"],
+            values["entry"],
+            values["machine"],
+            [ElfSection(**section) for section in values["sections"]],
+            values["digests"],
+            values["symbols"],
+        )
+
+    def toDict(self):
+        return {
+            "sha256": self.sha256,
+            "entry": self.entry,
+            "machine": self.machine,
+            "sections": [section._asdict() for section in self.sections],
+            "digests": self.digests,
+            "symbols": self.symbols,
+        }
+
+    def loadableSections(self):
+        return self.sections
+
+    def sectionDigest(self, section):
+        return self.digests[section.name]
+
+    def loadSize(self):
+        return sum(section.size for section in self.sections)
+
+    def symbol(self, name):
+        return self.symbols.get(name)
+
+
+class ElfMetadataCache:
+    """
+    On-disk cache of `ElfMetadata`, keyed by the digest of the image contents,
+    so that the ELF file is parsed only once however many times it is run.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+
+    def __path(self, sha256):
+        return os.path.join(self.directory, "elf-" + sha256 + ".json")
+
+    def get(self, binaryPath):
+        with open(binaryPath, "rb") as binary:
+            data = binary.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.__path(sha256)
+        try:
+            with open(path) as cached:
+                return ElfMetadata.fromDict(json.load(cached))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        metadata = ElfMetadata.fromElf(ElfFile(binaryPath, data), sha256)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporaryPath = "{}.{}.tmp".format(path, os.getpid())
+            with open(temporaryPath, "w") as cached:
+                json.dump(metadata.toDict(), cached)
+            os.replace(temporaryPath, path)
+        except OSError:
+            pass  # the cache is only an optimization
+        return metadata
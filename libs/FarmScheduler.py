@@ -0,0 +1,272 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import contextlib
+import os
+import time
+
+from .BatchRunner import BatchRunner, assignLogPaths
+
+
+def _boardWorker(configPath, runnerFactory, logPath, connection):
+    with open(logPath, "a", buffering=1) as log, contextlib.redirect_stdout(log):
+        runner = runnerFactory(configPath)
+        try:
+            while True:
+                job = connection.recv()
+                if job is None:
+                    break
+                _, binary, consoleLog, uart4Log = job
+                runner.setLogPaths(consoleLog, uart4Log)
+                connection.send(runner.runBinary(binary))
+        finally:
+            runner.shutdown()
+
+
+class _Board:
+    """
+    Worker process owning the runner session of a single board. Jobs and
+    results go through a pipe of its own, so a worker dying mid-write can
+    only lose its own result, which its pipe then reports as end of file.
+    """
+
+    def __init__(self, index, configPath, context, runnerFactory, logDir):
+        self.index = index
+        self.configPath = configPath
+        self.connection, workerConnection = context.Pipe()
+        self.job = None
+        self.deadline = None
+        self.failures = 0
+        self.quarantined = False
+        self.process = context.Process(
+            target=_boardWorker,
+            args=(
+                configPath,
+                runnerFactory,
+                os.path.join(logDir, "board" + str(index) + ".log"),
+                workerConnection,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        # only the worker may hold its end, otherwise its exit would go unnoticed
+        workerConnection.close()
+
+    def submit(self, job, timeout):
+        self.job = job
+        self.deadline = time.monotonic() + timeout
+        try:
+            self.connection.send(job)
+        except OSError:
+            pass  # the worker is gone, its pipe reports end of file
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+
+
+class FarmScheduler(BatchRunner):
+    """
+    Class distributing test binaries across several boards in parallel.
+    Each board is described by its own configuration file and driven by
+    a separate runner session created with `runnerFactory(configPath)`.
+    Runs ending with an error are retried on the next free board, unless
+    the binary itself is invalid; a board failing `quarantineAfter` runs in
+    a row is taken out of the farm and its configuration path is listed
+    in `quarantined`. So is a board whose worker exited or whose run did
+    not finish within `jobTimeout` seconds; its worker is then terminated.
+    """
+
+    JOB_TIMEOUT = 3600
+
+    def __init__(
+        self,
+        configPaths,
+        runnerFactory,
+        logDir=".",
+        maxRetries=1,
+        quarantineAfter=2,
+        failOnTimeout=False,
+        jobTimeout=JOB_TIMEOUT,
+    ):
+        super().__init__(None, logDir, failOnTimeout)
+        self.configPaths = list(configPaths)
+        self.runnerFactory = runnerFactory
+        self.maxRetries = maxRetries
+        self.quarantineAfter = quarantineAfter
+        self.jobTimeout = jobTimeout
+
+    def run(self, binaries):
+        os.makedirs(self.logDir, exist_ok=True)
+        logPaths = assignLogPaths(binaries, self.logDir)
+        pending = collections.deque(
+            (jobId, binary, *logPaths[jobId]) for jobId, binary in enumerate(binaries)
+        )
+        attempts = collections.Counter()
+        self.failedOn = {}
+        self.quarantined = []
+        results = [None] * len(binaries)
+
+        import multiprocessing
+        import multiprocessing.connection
+
+        # fork keeps the runner factory usable without pickling it
+        context = multiprocessing.get_context("fork")
+        boards = [
+            _Board(index, path, context, self.runnerFactory, self.logDir)
+            for index, path in enumerate(self.configPaths)
+        ]
+
+        start = time.monotonic()
+        try:
+            while pending or any(board.job is not None for board in boards):
+                for board in boards:
+                    if board.job is None and not board.quarantined and pending:
+                        job = self.__nextJob(board, boards, pending)
+                        if job is None:
+                            continue
+                        attempts[job[0]] += 1
+                        print(f"Board {board.index}: running {job[1]}")
+                        board.submit(job, self.jobTimeout)
+
+                busy = [board for board in boards if board.job is not None]
+                if not busy:
+                    break  # every board is quarantined
+
+                timeout = min(board.deadline for board in busy) - time.monotonic()
+                ready = multiprocessing.connection.wait(
+                    [board.connection for board in busy], max(timeout, 0)
+                )
+                for board in busy:
+                    if board.connection in ready:
+                        self.__receive(board, pending, attempts, results)
+                    elif time.monotonic() >= board.deadline:
+                        board.process.terminate()
+                        self.__abandon(
+                            board,
+                            f"The run did not finish within {self.jobTimeout} s.",
+                            f"as its run did not finish within {self.jobTimeout} s",
+                            pending,
+                            attempts,
+                            results,
+                        )
+        finally:
+            for board in boards:
+                board.stop()
+            for board in boards:
+                board.process.join(timeout=30)
+                if board.process.is_alive():
+                    board.process.terminate()
+                board.connection.close()
+
+        for jobId, result in enumerate(results):
+            if result is None:
+                results[jobId] = {
+                    "binary": binaries[jobId],
+                    "status": "error",
+                    "message": "No healthy board left to run the binary.",
+                    "duration": 0,
+                    "attempts": attempts[jobId],
+                }
+
+        self.results = results
+        self.duration = time.monotonic() - start
+        return self.results
+
+    def __nextJob(self, board, boards, pending):
+        """
+        Picks the first pending job, which has not just failed on the board,
+        unless there is no other healthy board to retry it on.
+        """
+        healthy = [b for b in boards if not b.quarantined]
+        for job in pending:
+            if self.failedOn.get(job[0]) != board.index or len(healthy) == 1:
+                pending.remove(job)
+                return job
+        return None
+
+    def __complete(self, board, job, result, pending, attempts, results):
+        if result["status"] != "error":
+            board.failures = 0
+            results[job[0]] = result
+            return
+        if result.get("invalidBinary"):
+            # the binary is at fault, it would fail on any board
+            results[job[0]] = result
+            return
+
+        self.failedOn[job[0]] = board.index
+        board.failures += 1
+        if board.failures >= self.quarantineAfter and not board.quarantined:
+            self.__quarantine(board, f"after {board.failures} failures")
+
+        if attempts[job[0]] <= self.maxRetries:
+            print(f"Retrying {job[1]}")
+            pending.appendleft(job)
+        else:
+            results[job[0]] = result
+
+    def __receive(self, board, pending, attempts, results):
+        try:
+            result = board.connection.recv()
+        except (EOFError, OSError):
+            # the worker exited, possibly in the middle of sending the result
+            self.__abandon(
+                board,
+                "Board worker exited unexpectedly.",
+                "as its worker exited",
+                pending,
+                attempts,
+                results,
+            )
+            return
+
+        job, board.job = board.job, None
+        result["board"] = board.configPath
+        result["attempts"] = attempts[job[0]]
+        self.__complete(board, job, result, pending, attempts, results)
+
+    def __abandon(self, board, message, reason, pending, attempts, results):
+        """
+        Fails the job of a board whose session is gone or stuck.
+        """
+        job, board.job = board.job, None
+        result = {
+            "binary": job[1],
+            "status": "error",
+            "message": message,
+            "duration": 0,
+            "board": board.configPath,
+            "attempts": attempts[job[0]],
+        }
+        # don't hand the board more jobs
+        self.__quarantine(board, reason)
+        self.__complete(board, job, result, pending, attempts, results)
+
+    def __quarantine(self, board, reason):
+        print(f"Board {board.index} quarantined {reason}.")
+        board.quarantined = True
+        self.quarantined.append(board.configPath)
+        board.stop()
@@ -0,0 +1,87 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import re
+
+
+class FlashCache:
+    """
+    Record of the image sections last written to the target,
+    kept between runs to find sections which have to be reflashed.
+    """
+
+    DEFAULT_DIRECTORY = "~/.cache/remote-target-runner"
+
+    def __init__(self, directory, target):
+        self.path = os.path.join(
+            os.path.expanduser(directory),
+            "flash-" + re.sub(r"[^\w.-]", "_", target) + ".json",
+        )
+
+    def __read(self):
+        try:
+            with open(self.path) as cache:
+                return json.load(cache)
+        except (OSError, ValueError):
+            return {}
+
+    def changedSections(self, elf):
+        """
+        Returns loadable sections of the image which differ from the cached state.
+        Sections writable in place are always reported, as the previous run
+        could have modified them.
+        """
+        flashed = self.__read()
+        changed = []
+        for section in elf.loadableSections():
+            entry = flashed.get(section.name)
+            if (
+                entry is None
+                or (section.isWritable() and section.address == section.loadAddress)
+                or entry["loadAddress"] != section.loadAddress
+                or entry["size"] != section.size
+                or entry["sha256"] != elf.sectionDigest(section)
+            ):
+                changed.append(section)
+        return changed
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, elf):
+        flashed = {
+            section.name: {
+                "loadAddress": section.loadAddress,
+                "size": section.size,
+                "sha256": elf.sectionDigest(section),
+            }
+            for section in elf.loadableSections()
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporaryPath = self.path + ".tmp"
+        with open(temporaryPath, "w") as cache:
+            json.dump(flashed, cache, indent=2)
+        os.replace(temporaryPath, self.path)
@@ -20,11 +20,13 @@
 # limitations under the License.
 
 from __future__ import print_function
+import re
+import select
+import signal
 import time
-from pygdbmi.gdbcontroller import GdbController
 from pygdbmi.constants import GdbTimeoutError
 
-import timeout_decorator
+from .Tracer import tracer
 
 
 class GdbInvalidCommandError(ValueError):
@@ -56,13 +58,40 @@ class GdbInterface:
     Class representing connection to the GDB server.
     """
 
-    def __init__(self, address, path="gdb", verbose=False):
+    MI_COMMAND_TIMEOUT = 30
+    # time to wait for the first response to a command which may keep running, e.g. load
+    RESPONSE_TIMEOUT = 1
+    POLL_INTERVAL = 0.1
+    EXECUTION_TIMEOUT = 1000
+    STOP_TIMEOUT = 10
+    LOAD_TIMEOUT = 600
+    # Cortex-M configurable, hard, debug fault status and fault address registers
+    FAULT_REGISTERS_ADDRESS = 0xE000ED28
+    FAULT_REGISTERS = ("CFSR", "HFSR", "DFSR", "MMFAR", "BFAR", "AFSR")
+    COMPARE_SECTIONS_RE = re.compile(
+        r"Section (\S+), range 0x[0-9a-fA-F]+ -- 0x[0-9a-fA-F]+: (matched|MIS-MATCHED)"
+    )
+
+    def __init__(
+        self,
+        address,
+        path="gdb",
+        verbose=False,
+        startupTimeout=10,
+        memoryReadPacketSize=4096,
+    ):
         self.address = address
         self.verbose = verbose
         self.path = path
+        self.startupTimeout = startupTimeout
+        self.memoryReadPacketSize = int(memoryReadPacketSize)
 
         self.gdbmi = None
         self.running = False
+        # payload of the last *stopped record, e.g. the breakpoint which was hit
+        self.lastStop = None
+        self.registerNames = None
+        self.lastToken = 0
         self.launched = False
 
     def printVerbose(self, *args, **kwargs):
@@ -72,65 +101,239 @@ class GdbInterface:
             print(msg, *args[1:], **kwargs)
 
     def printFormatedResponse(self, response):
-        console_msgs = [
-            entry["payload"] for entry in response if entry["type"] == "console"
-        ]
-        for msg in console_msgs:
-            self.printVerbose(msg, end="")
+        self._printConsole(response)
         errors = [
             entry["payload"]["msg"] for entry in response if entry["message"] == "error"
         ]
         if errors:
             raise GdbRuntimeError(errors[0])
 
+    def _printConsole(self, response):
+        console_msgs = [
+            entry["payload"] for entry in response if entry["type"] == "console"
+        ]
+        for msg in console_msgs:
+            self.printVerbose(msg, end="")
+
     def execCmd(self, command, pollUntilDone=False):
         response = self.execCmdAsync(command)
         if not [x for x in response if x["message"] == "done"]:
             if pollUntilDone:
                 response += self._pollUntilDone()
-            else:
-                self.waitForFinish()
+            elif not self.waitForFinish():
+                raise GdbTimeoutError("'" + command + "' did not finish.")
         return response
 
     def execCmdAsync(self, command):
+        """
+        Executes command and returns the output received until its result record.
+        The output of commands which keep running is left for _pollUntilDone.
+        """
         self.printVerbose(" " + command)
 
         try:
-            response = self.gdbmi.write(command)
+            self.gdbmi.write(command, read_response=False)
         except TypeError:
             raise GdbInvalidCommandError(
                 "Invalid command supplied to execCmd: " + str(command)
             )
 
+        response = self._readUntilResult(self.RESPONSE_TIMEOUT)
+        if not response:
+            raise GdbTimeoutError("No response to '" + command + "' received.")
+        self.printFormatedResponse(response)
+        return response
+
+    def _readResponses(self, timeout):
+        """
+        Waits at most `timeout` seconds for GDB output and returns the records
+        read so far, without waiting for any additional output.
+        """
+        readable, _, _ = select.select([self.gdbmi.gdb_process.stdout], [], [], timeout)
+        if not readable:
+            return []
+        return self.gdbmi.get_gdb_response(timeout_sec=0, raise_error_on_timeout=False)
+
+    def execMiCmd(self, command, timeout=MI_COMMAND_TIMEOUT):
+        """
+        Executes MI command and returns as soon as its result record arrives.
+        """
+        response = self._execUntilResult(command, timeout)
         self.printFormatedResponse(response)
         return response
 
+    def _execUntilResult(self, command, timeout):
+        self.printVerbose(" " + command)
+        self.gdbmi.write(command, read_response=False)
+
+        response = self._readUntilResult(timeout)
+        if not [x for x in response if x["type"] == "result"]:
+            raise GdbTimeoutError("No result of '" + command + "' received.")
+        return response
+
+    def _readUntilResult(self, timeout):
+        """
+        Returns GDB output read until a result record arrives, at most `timeout` seconds.
+        Unlike GdbController.write, it does not linger for more output after the result.
+        """
+        deadline = time.monotonic() + timeout
+        response = []
+        while not [x for x in response if x["type"] == "result"]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            response += self._readResponses(remaining)
+        return response
+
+    def execBatch(self, commands, timeout=MI_COMMAND_TIMEOUT, raiseOnError=True):
+        """
+        Executes MI or CLI commands pipelined: all of them are written at once,
+        tagged with tokens, so the whole batch costs a single round-trip.
+        Returns the result record of each command, in order. Raises GdbRuntimeError
+        listing every failed command, unless `raiseOnError` is False.
+        """
+        indexes = {}
+        lines = []
+        for command in commands:
+            self.printVerbose(" " + command)
+            self.lastToken += 1
+            indexes[self.lastToken] = len(lines)
+            lines.append(str(self.lastToken) + command)
+
+        results = [None] * len(commands)
+        with tracer.phase("gdb.batch", commands=len(commands)):
+            self.gdbmi.write(lines, read_response=False)
+            deadline = time.monotonic() + timeout
+            pending = len(commands)
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    missing = [c for c, result in zip(commands, results) if result is None]
+                    raise GdbTimeoutError(
+                        "No result of '" + "', '".join(missing) + "' received."
+                    )
+                response = self._readResponses(remaining)
+                self._printConsole(response)
+                for entry in response:
+                    index = indexes.get(entry.get("token"))
+                    if (
+                        entry["type"] == "result"
+                        and index is not None
+                        and results[index] is None
+                    ):
+                        results[index] = entry
+                        pending -= 1
+
+        failures = [
+            command + ": " + result["payload"]["msg"]
+            for command, result in zip(commands, results)
+            if result["message"] == "error"
+        ]
+        if failures and raiseOnError:
+            raise GdbRuntimeError("\n".join(failures))
+        return results
+
     def monitor(self, command, pollUntilDone=False):
-        return self.execCmd(command, pollUntilDone)
+        with tracer.phase("gdb.command", command=command):
+            return self.execCmd(command, pollUntilDone)
+
+    def _waitUntilReady(self):
+        self.gdbmi.write("-list-features", read_response=False)
+        response = self._readUntilResult(self.startupTimeout)
+        self.printFormatedResponse(response)
+        if not [x for x in response if x["message"] == "done"]:
+            raise GdbCommunicationError(
+                "GDB did not respond within " + str(self.startupTimeout) + " s."
+            )
 
     def launch(self):
-        self.gdbmi = GdbController([self.path, "--interpreter=mi3"])
-        time.sleep(1)
-
-        self.monitor("target extended-remote " + self.address)
-        # self.monitor("set download-write-size 4096")
-        self.monitor("set remote memory-write-packet-size 1024")
-        self.monitor("set remote memory-write-packet-size fixed")
-        self.monitor("set remote memory-read-packet-size 4096")
-        self.monitor("set remote memory-read-packet-size fixed")
-        self.monitor("set remotetimeout 30")
+        self.registerNames = None
+        from pygdbmi.gdbcontroller import GdbController
+
+        with tracer.phase("gdb.start"):
+            self.gdbmi = GdbController([self.path, "--interpreter=mi3"])
+            self._waitUntilReady()
+
+        with tracer.phase("gdb.connect", address=self.address):
+            # the settings apply to the connection, so they are sent only once it succeeded
+            self.execBatch(["target extended-remote " + self.address])
+            self.execBatch(
+                [
+                    # "set download-write-size 4096",
+                    "set remote memory-write-packet-size 1024",
+                    "set remote memory-write-packet-size fixed",
+                    "set remote memory-read-packet-size " + str(self.memoryReadPacketSize),
+                    "set remote memory-read-packet-size fixed",
+                    "set remotetimeout 30",
+                ]
+            )
         self.launched = True
 
-    def load(self, path):
+    def loadSymbols(self, path):
         self.monitor("file " + path)
+
+    def flash(self):
         self.monitor("load")
 
+    def load(self, path, reset=False):
+        """
+        Loads symbols, optionally resetting the target in the same batch,
+        and flashes the image once both succeeded.
+        """
+        commands = ["monitor reset halt"] if reset else []
+        self.execBatch(commands + ["file " + path])
+        self.execBatch(["load"], self.LOAD_TIMEOUT)
+
+    def restore(self, path, start, end):
+        """
+        Writes the contents of the file sections placed within [start, end).
+        """
+        self.monitor("restore " + path + " 0 " + hex(start) + " " + hex(end))
+
+    def compareSections(self):
+        """
+        Returns names of the sections which contents on the target
+        differ from the file loaded by `loadSymbols`.
+        """
+        response = self._execUntilResult("compare-sections", self.MI_COMMAND_TIMEOUT)
+        console = "".join(
+            entry["payload"] for entry in response if entry["type"] == "console"
+        )
+        sections = self.COMPARE_SECTIONS_RE.findall(console)
+        if not sections:
+            self.printFormatedResponse(response)
+        # GDB reports an error when any section does not match
+        return [name for name, result in sections if result != "matched"]
+
+    def insertBreakpoint(self, location, hardware=True, temporary=False):
+        """
+        Inserts breakpoint at `location` (e.g. a function name) and returns its number.
+        """
+        flags = (" -h" if hardware else "") + (" -t" if temporary else "")
+        response = self.execMiCmd("-break-insert" + flags + " " + location)
+        for entry in response:
+            if entry["type"] == "result" and entry["message"] == "done":
+                return int(entry["payload"]["bkpt"]["number"])
+        raise GdbRuntimeError("Couldn't insert breakpoint at " + location)
+
+    def evaluate(self, expression):
+        """
+        Returns value of the expression, as formatted by GDB.
+        """
+        response = self.execMiCmd("-data-evaluate-expression " + expression)
+        for entry in response:
+            if entry["type"] == "result" and entry["message"] == "done":
+                return entry["payload"]["value"]
+        raise GdbRuntimeError("Couldn't evaluate " + expression)
+
     def reset(self):
         self.monitor("monitor reset halt")
 
     def start(self):
         self.running = True
+        self.lastStop = None
         response = self.execCmdAsync("continue")
+        self._recordStop(response)
         if self._checkIfExecutionStopped(response):
             self.running = False
 
@@ -139,73 +342,215 @@ class GdbInterface:
             x for x in response if x["message"] == "done" or x["message"] == "stopped"
         ]
 
-    def _pollUntilDone(self):
+    def _recordStop(self, response):
+        for entry in response:
+            if entry["type"] == "notify" and entry["message"] == "stopped":
+                self.lastStop = entry["payload"] or {}
+
+    def _pollUntilDone(self, timeout=EXECUTION_TIMEOUT, interruptEvent=None):
+        """
+        Collects GDB output until the execution stops. Raises GdbTimeoutError
+        if it does not stop within `timeout` seconds.
+        The target is interrupted once `interruptEvent` gets set, e.g. by another thread.
+        The wait relies on the deadline only, so it is safe to use from any thread.
+        """
+        deadline = time.monotonic() + timeout
+        interrupted = False
         output = []
         while True:
-            try:
-                response = self.gdbmi.get_gdb_response(timeout_sec=1000)
-            except timeout_decorator.TimeoutError as error:
-                raise GdbTimeoutError(error)
+            if interruptEvent is not None and not interrupted and interruptEvent.is_set():
+                self.interrupt()
+                interrupted = True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise GdbTimeoutError(
+                    "Execution did not stop within " + str(timeout) + " s."
+                )
+            if interruptEvent is not None and not interrupted:
+                remaining = min(remaining, self.POLL_INTERVAL)
+            response = self._readResponses(remaining)
             self.printFormatedResponse(response)
+            self._recordStop(response)
             output += response
             if self._checkIfExecutionStopped(response):
                 break
         return output
 
-    def waitForFinish(self, timeout=0):
-        def _waitForDoneLambda():
-            self._pollUntilDone()
-            self.running = False
-
-        @timeout_decorator.timeout(timeout)
-        def _waitForDone():
-            _waitForDoneLambda()
-
-        if timeout == 0:
-            _waitForDoneLambda()
-            return True
-
+    def waitForFinish(self, timeout=EXECUTION_TIMEOUT, interruptEvent=None):
+        """
+        Waits until the execution stops, at most `timeout` seconds.
+        Setting `interruptEvent` halts the target early. Returns False if the timeout expired.
+        """
         try:
-            _waitForDone()
-            return True
+            self._pollUntilDone(timeout, interruptEvent)
         except GdbTimeoutError:
             return False
+        self.running = False
+        return True
+
+    def interrupt(self):
+        """
+        Halts the running target, the same way as Ctrl+C in an interactive session.
+        """
+        self.gdbmi.gdb_process.send_signal(signal.SIGINT)
 
     def terminate(self):
         if self.running:
-            self.gdbmi.interrupt_gdb()
-            self.gdbmi.exit
+            self.interrupt()
+            self.gdbmi.exit()
             self.running = False
 
     def stop(self):
+        """
+        Halts the target. Raises GdbTimeoutError if it does not halt
+        within STOP_TIMEOUT seconds; GDB has to be shut down then.
+        """
         if self.running:
-            self.gdbmi.interrupt_gdb()
+            self.interrupt()
 
-            self.waitForFinish()
+            if not self.waitForFinish(self.STOP_TIMEOUT):
+                self.running = False
+                raise GdbTimeoutError(
+                    "The target did not halt within " + str(self.STOP_TIMEOUT) + " s."
+                )
         self.running = False
 
     def shutdown(self):
-        self.stop()
-
-        if self.launched:
+        try:
+            self.stop()
+        finally:
+            # GDB is also started when connecting to the target failed
+            if self.gdbmi is not None:
+                self.gdbmi.exit()
             self.launched = False
-            self.gdbmi.exit()
 
-        self.running = False
-        self.gdbmi = None
+            self.running = False
+            self.gdbmi = None
+
+    def iterMemory(self, address, size, chunkSize=None):
+        """
+        Yields contents of the target memory region, read in chunks which
+        fit into a single remote packet.
+        """
+        if chunkSize is None:
+            # memory contents are hex-encoded in the remote protocol
+            chunkSize = self.memoryReadPacketSize // 2
+
+        end = address + size
+        while address < end:
+            count = min(chunkSize, end - address)
+            response = self.execMiCmd(
+                "-data-read-memory-bytes " + hex(address) + " " + str(count)
+            )
+            yield self._parseMemoryContents(response, address, count)
+            address += count
+
+    def _parseMemoryContents(self, response, address, count):
+        blocks = [
+            block
+            for entry in response
+            if entry["message"] == "done"
+            for block in entry["payload"]["memory"]
+        ]
+        blocks.sort(key=lambda block: int(block["begin"], 16))
+        if not blocks:
+            raise GdbRuntimeError("No memory contents received for " + hex(address))
+
+        data = b"".join(bytes.fromhex(block["contents"]) for block in blocks)
+        if len(data) != count or int(blocks[0]["begin"], 16) != address:
+            raise GdbRuntimeError(
+                "Unable to read " + str(count) + " bytes at " + hex(address)
+            )
+        return data
+
+    def readMemoryInto(self, address, buffer, chunkSize=None):
+        view = memoryview(buffer).cast("B")
+        offset = 0
+        for chunk in self.iterMemory(address, len(view), chunkSize):
+            view[offset : offset + len(chunk)] = chunk
+            offset += len(chunk)
+        return offset
+
+    def readMemory(self, address, size, chunkSize=None):
+        buffer = bytearray(size)
+        self.readMemoryInto(address, buffer, chunkSize)
+        return memoryview(buffer)
+
+    def dumpMemory(self, address, size, path, chunkSize=None):
+        """
+        Streams contents of the target memory region directly to a file.
+        """
+        with open(path, "wb") as dump:
+            for chunk in self.iterMemory(address, size, chunkSize):
+                dump.write(chunk)
 
     def rmem(self, address, count=4):
-        response = self.monitor(
-            "x/" + str(count) + "ub " + hex(address), pollUntilDone=True
-        )
-        outbytes = bytearray()
-        for entry in [
-            entry["payload"] for entry in response if entry["type"] == "console"
-        ]:
-            for byte in entry.split("\\t")[1:]:
-                outbytes.append(int(byte.split("\\n")[0]))
-
+        outbytes = bytearray(count)
+        self.readMemoryInto(address, outbytes)
         return outbytes
 
+    def snapshot(self, stackSize=256):
+        """
+        Returns state of the halted target: stop reason, call stack, registers,
+        fault status registers and `stackSize` bytes from the stack pointer up,
+        all requested in a single round-trip. Parts which couldn't be read
+        are replaced with the error reported by GDB.
+        """
+        commands = [
+            "-stack-list-frames",
+            "-data-list-register-values x",
+            "-data-read-memory-bytes "
+            + hex(self.FAULT_REGISTERS_ADDRESS)
+            + " "
+            + str(4 * len(self.FAULT_REGISTERS)),
+            "-data-read-memory-bytes $sp " + str(stackSize),
+        ]
+        if self.registerNames is None:
+            commands.append("-data-list-register-names")
+        results = [
+            entry["payload"] if entry["message"] == "done" else {"error": entry["payload"]["msg"]}
+            for entry in self.execBatch(commands, raiseOnError=False)
+        ]
+        frames, registers, faults, stack = results[:4]
+        if self.registerNames is None and "error" not in results[4]:
+            self.registerNames = results[4]["register-names"]
+
+        snapshot = {"stopReason": self.lastStop}
+        if "error" in frames:
+            snapshot["frames"] = frames
+        else:
+            # frames may come as a list of frame={...} tuples
+            snapshot["frames"] = [frame.get("frame", frame) for frame in frames["stack"]]
+
+        if "error" in registers or self.registerNames is None:
+            snapshot["registers"] = registers
+        else:
+            snapshot["registers"] = {
+                self.registerNames[int(register["number"])]: register["value"]
+                for register in registers["register-values"]
+                if int(register["number"]) < len(self.registerNames)
+                and self.registerNames[int(register["number"])]
+            }
+
+        if "error" in faults:
+            snapshot["faultRegisters"] = faults
+        else:
+            data = bytes.fromhex(faults["memory"][0]["contents"])
+            snapshot["faultRegisters"] = {
+                name: "0x%08x" % int.from_bytes(data[4 * i : 4 * i + 4], "little")
+                for i, name in enumerate(self.FAULT_REGISTERS)
+                if len(data) >= 4 * i + 4
+            }
+
+        if "error" in stack:
+            snapshot["stack"] = stack
+        else:
+            snapshot["stack"] = {
+                "address": stack["memory"][0]["begin"],
+                "contents": "".join(block["contents"] for block in stack["memory"]),
+            }
+        return snapshot
+
     def isRunning(self):
         return self.running
@@ -19,9 +19,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import codecs
+import os
 import sys
 import threading
 
+from .OutputRingBuffer import OutputRingBuffer
 from .RemoteAppInvoker import RemoteAppInvoker
 
 
@@ -31,6 +34,8 @@ class GdbServerInvoker(RemoteAppInvoker):
     It can invoke it locally or remotely via SSH.
     """
 
+    READ_SIZE = 4096
+
     def __init__(
         self,
         path,
@@ -38,6 +43,8 @@ class GdbServerInvoker(RemoteAppInvoker):
         config=None,
         initDelay=None,
         verbosity=False,
+        outputBufferSize=64 * 1024,
+        outputLogPath=None,
     ):
 
         super().__init__(path, args, config, initDelay)
@@ -46,11 +53,20 @@ class GdbServerInvoker(RemoteAppInvoker):
 
         self.reader = None
         self.verbose = verbosity
-        self.output = ""
+        self.buffer = OutputRingBuffer(outputBufferSize)
+        self.outputLogPath = outputLogPath
+
+    @property
+    def output(self):
+        """
+        The most recent output of the GDB server.
+        """
+        return self.buffer.getvalue()
 
     def open(self):
         super().open()
 
+        self.buffer = OutputRingBuffer(self.buffer.capacity)
         self.reader = threading.Thread(
             target=self.__stdoutRead, kwargs={"stdout": self.handle.stdout}
         )
@@ -58,25 +74,66 @@ class GdbServerInvoker(RemoteAppInvoker):
         self.reader.kill = threading.Event()
         self.reader.start()
 
-    def close(self):
-        self.reader.kill.set()
-        self.reader.join(timeout=1)
+    def waitFor(self, pattern, timeout=None, since=0):
+        """
+        Blocks until the GDB server output matches `pattern` (regular expression)
+        and returns the match, or None if it did not appear within `timeout` seconds.
+        """
+        return self.buffer.waitFor(pattern, timeout, since)
+
+    def waitUntilReady(self, pattern, timeout):
+        """
+        Blocks until GDB server prints `pattern`, e.g. its listening banner.
+        """
+        if self.waitFor(pattern, timeout) is not None:
+            return
+        if not self.reader.is_alive():
+            raise RuntimeError("GDB server exited before it became ready.")
+        raise RuntimeError(
+            "GDB server did not report '" + pattern + "' within " + str(timeout) + " s."
+        )
 
+    def close(self):
+        reader = self.reader
+        reader.kill.set()
+        # the reader is blocked on the output until the server is gone
         super().close()
-        self.reader = None
+        reader.join(timeout=1)
+
+    def __readChunk(self, stdout):
+        if hasattr(stdout, "channel"):
+            # output received together with the PID comes first
+            if self.pendingOutput:
+                pending, self.pendingOutput = self.pendingOutput, b""
+                return pending
+            return stdout.channel.recv(self.READ_SIZE)
+        return os.read(stdout.fileno(), self.READ_SIZE)
 
     def __stdoutRead(self, stdout):
         if self.handle is None:
             return
 
-        while not self.reader.kill.is_set():
-            out = stdout.read(1)
-            if isinstance(out, (bytes, bytearray)):
-                out = out.decode("utf-8")
-            if out != "":
-                self.output += out
+        kill = self.reader.kill
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        tee = open(self.outputLogPath, "a") if self.outputLogPath else None
+        try:
+            while not kill.is_set():
+                try:
+                    chunk = self.__readChunk(stdout)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+
+                out = decoder.decode(chunk)
+                self.buffer.append(out)
+                if tee is not None:
+                    tee.write(out)
+                    tee.flush()
                 if self.verbose:
                     sys.stdout.write(out)
                     sys.stdout.flush()
-            else:
-                break
+        finally:
+            self.buffer.close()
+            if tee is not None:
+                tee.close()
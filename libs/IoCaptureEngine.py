@@ -0,0 +1,163 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2020-2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import selectors
+import threading
+import time
+
+
+class IoCaptureEngine:
+    """
+    Class responsible for draining IO handlers into their sinks in the background,
+    for the whole time the application is executed on HWTB.
+    """
+
+    POLL_INTERVAL = 0.1
+    BUFFER_SIZE = 256 * 1024
+
+    def __init__(self):
+        self.channels = {}
+        self.buffers = {}
+        self.names = {}
+        self.byteCounts = {}
+        self.selector = None
+        self.thread = None
+        self.error = None
+        # (channel name, sink, exception) of every sink detached after a failure
+        self.sinkErrors = []
+
+        self.stopRequest = threading.Event()
+        self.quietTime = 0
+        self.stopTime = None
+        self.deadline = None
+
+    def add(self, io, *sinks, name=None):
+        """
+        Registers IO handler, which output should be written to all given sinks.
+        Sinks are closed by the engine when the capture is finished. The data passed
+        to `write` is a view of a reused buffer, valid only for the duration of the call.
+        A sink raising an exception is detached, the other sinks keep receiving the output.
+        """
+        if self.thread is not None:
+            raise RuntimeError("Channels can't be added to a running capture engine!")
+        self.channels[io] = list(sinks)
+        self.buffers[io] = memoryview(bytearray(self.BUFFER_SIZE))
+        self.names[io] = name if name is not None else str(len(self.names))
+        self.byteCounts[io] = 0
+
+    def start(self):
+        self.selector = selectors.DefaultSelector()
+        for io in self.channels:
+            if io.fileno() is not None:
+                self.selector.register(io, selectors.EVENT_READ)
+
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def isRunning(self):
+        return self.thread is not None
+
+    def __run(self):
+        try:
+            start = time.monotonic()
+            lastActivity = {io: start for io in self.channels}
+            while self.selector.get_map():
+                events = self.selector.select(self.POLL_INTERVAL)
+                now = time.monotonic()
+                for key, _ in events:
+                    io = key.fileobj
+                    buffer = self.buffers[io]
+                    count = io.receiveInto(
+                        buffer[: min(io.getOptimalReadSize(), len(buffer))],
+                        timeout=self.POLL_INTERVAL,
+                    )
+                    if count == 0:
+                        # readable, but nothing to read - the connection was closed
+                        self.__finishChannel(io)
+                        continue
+                    data = buffer[:count]
+                    for sink in list(self.channels[io]):
+                        try:
+                            sink.write(data)
+                        except Exception as e:
+                            self.__detachSink(io, sink, e)
+                    self.byteCounts[io] += count
+                    lastActivity[io] = now
+
+                if self.stopRequest.is_set():
+                    if now >= self.deadline:
+                        break
+                    # each channel ends as soon as it goes quiet, regardless of the others
+                    for key in list(self.selector.get_map().values()):
+                        io = key.fileobj
+                        if now - max(lastActivity[io], self.stopTime) >= self.quietTime:
+                            self.__finishChannel(io)
+        except Exception as e:
+            self.error = e
+
+    def __finishChannel(self, io):
+        self.selector.unregister(io)
+        self.__closeSinks(io)
+
+    def __detachSink(self, io, sink, error):
+        self.sinkErrors.append((self.names[io], sink, error))
+        self.channels[io].remove(sink)
+        try:
+            sink.close()
+        except Exception:
+            pass
+
+    def __closeSinks(self, io):
+        for sink in self.channels.pop(io, []):
+            try:
+                sink.flush()
+                sink.close()
+            except Exception as e:
+                self.sinkErrors.append((self.names[io], sink, e))
+
+    def finish(self, quietTime=1, timeout=100):
+        """
+        Stops the capture of each channel once no data arrived on it for `quietTime`
+        seconds, or after `timeout` seconds at most, flushing and closing its sinks.
+        Returns number of bytes captured from each channel. A failing sink is
+        only detached from its channel, its error is left in `sinkErrors`.
+        """
+        if self.thread is None:
+            return {}
+
+        self.quietTime = quietTime
+        self.stopTime = time.monotonic()
+        self.deadline = self.stopTime + timeout
+        self.stopRequest.set()
+        self.thread.join()
+        self.thread = None
+
+        self.selector.close()
+        self.selector = None
+
+        for io in list(self.channels):
+            self.__closeSinks(io)
+        self.buffers = {}
+
+        if self.error is not None:
+            raise self.error
+        return {self.names[io]: count for io, count in self.byteCounts.items()}
@@ -19,6 +19,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import socket
+import time
 from abc import ABC, abstractmethod
 
 
@@ -27,6 +29,11 @@ class IoHandler(ABC):
     Interface for handling output of the application executed on HWTB.
     """
 
+    # the handler is driven through GDB, so it has to be closed before GDB
+    requiresGdb = False
+    READY_POLL_INTERVAL = 0.05
+    receiveBuffer = None
+
     @abstractmethod
     def getOptimalReadSize(self):
         pass
@@ -39,10 +46,49 @@ class IoHandler(ABC):
     def close(self):
         pass
 
+    def receive(self, maxlen=1, timeout=1):
+        """
+        Receives at most `maxlen` bytes through `receiveInto`,
+        using a buffer kept between the calls.
+        """
+        if self.receiveBuffer is None or len(self.receiveBuffer) < maxlen:
+            self.receiveBuffer = memoryview(
+                bytearray(max(maxlen, self.getOptimalReadSize()))
+            )
+        count = self.receiveInto(self.receiveBuffer[:maxlen], timeout)
+        return bytes(self.receiveBuffer[:count])
+
     @abstractmethod
-    def receive(self, maxlen, timeout):
+    def receiveInto(self, buffer, timeout=1):
+        """
+        Receives data into `buffer`, returns number of received bytes.
+        """
         pass
 
     @abstractmethod
     def reset(self):
         pass
+
+    def _connectTcp(self, address, port, timeout):
+        """
+        Connects to the given TCP port, retrying until the peer starts
+        listening or `timeout` seconds pass.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection = socket.create_connection((address, port), timeout=timeout)
+                connection.settimeout(None)
+                return connection
+            except socket.error:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(self.READY_POLL_INTERVAL)
+
+    @abstractmethod
+    def fileno(self):
+        """
+        Returns descriptor which can be waited on for incoming data,
+        or None if the output is not received by the handler itself.
+        """
+        pass
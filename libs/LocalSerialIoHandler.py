@@ -0,0 +1,108 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import select
+
+import serial
+
+from .IoHandler import IoHandler
+from .UartIoHandler import Parity
+
+
+class LocalSerialIoHandler(IoHandler):
+    """
+    Class responsible for gathering the output of the application executed on HWTB,
+    when the UART is connected directly to the host running the tests.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    PARITIES = {
+        Parity.PARITY_EVEN: serial.PARITY_EVEN,
+        Parity.PARITY_ODD: serial.PARITY_ODD,
+        Parity.PARITY_NONE: serial.PARITY_NONE,
+    }
+
+    def __init__(self, device, baudrate, parity=Parity.PARITY_NONE):
+        if parity not in self.PARITIES:
+            raise RuntimeError("Invalid parity settings supplied.")
+
+        self.device = device
+        self.baudrate = int(baudrate)
+        self.parity = parity
+        self.port = None
+
+    def getOptimalReadSize(self):
+        return self.READ_SIZE
+
+    def open(self):
+        if self.port is not None:
+            raise RuntimeError(
+                "LocalSerialIoHandler has to be closed before opening it again!"
+            )
+
+        self.port = serial.Serial(
+            self.device,
+            self.baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=self.PARITIES[self.parity],
+            stopbits=serial.STOPBITS_ONE,
+            rtscts=False,
+            timeout=0,
+        )
+
+    def close(self):
+        if self.port is None:
+            return
+
+        self.port.close()
+        self.port = None
+
+    def send(self, data):
+        if self.port is None:
+            raise RuntimeError("The serial handler has not been open()'d!")
+
+        self.port.write(data)
+
+    def receiveInto(self, buffer, timeout=1):
+        if self.port is None:
+            raise RuntimeError("The serial handler has not been open()'d!")
+
+        try:
+            readable, _, _ = select.select(
+                [self.port.fileno()], [], [], timeout if timeout else None
+            )
+            if not readable:
+                return 0
+            # read straight from the descriptor, whatever the kernel has buffered
+            return os.readv(self.port.fileno(), [buffer])
+        except OSError:
+            return 0
+
+    def reset(self):
+        self.port.reset_input_buffer()
+
+    def fileno(self):
+        if self.port is None:
+            return None
+        return self.port.fileno()
@@ -0,0 +1,101 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import importlib.util
+import zlib
+
+
+class LogSink:
+    """
+    Sink writing the captured output to a log file, optionally compressed on the fly
+    with `gzip`, or with `zstd` when the zstandard module is available (gzip otherwise).
+    The output is collected into large batches before it is compressed and written.
+    """
+
+    BATCH_SIZE = 1024 * 1024
+    EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+    DEFAULT_LEVELS = {"gzip": 1, "zstd": 3}
+
+    @staticmethod
+    def resolveCompression(compression):
+        """
+        Returns the compression which will be used for the configured one.
+        """
+        if compression is None or compression.lower() in ("", "none"):
+            return None
+        compression = compression.lower()
+        if compression not in LogSink.EXTENSIONS:
+            raise RuntimeError("Invalid log compression: " + compression)
+        if compression == "zstd" and importlib.util.find_spec("zstandard") is None:
+            return "gzip"
+        return compression
+
+    @staticmethod
+    def pathFor(path, compression):
+        """
+        Returns path of the log file written for the configured compression.
+        """
+        return path + LogSink.EXTENSIONS[LogSink.resolveCompression(compression)]
+
+    def __init__(self, path, compression=None, level=None):
+        self.compression = self.resolveCompression(compression)
+        self.path = self.pathFor(path, compression)
+        if level is None and self.compression is not None:
+            level = self.DEFAULT_LEVELS[self.compression]
+
+        if self.compression == "gzip":
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif self.compression == "zstd":
+            import zstandard
+
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self.compressor = None
+
+        self.file = open(self.path, "wb")
+        self.batch = bytearray()
+
+    def write(self, data):
+        self.batch += data
+        if len(self.batch) >= self.BATCH_SIZE:
+            self.__writeBatch()
+        return len(data)
+
+    def __writeBatch(self):
+        if not self.batch:
+            return
+        if self.compressor is not None:
+            self.file.write(self.compressor.compress(self.batch))
+        else:
+            self.file.write(self.batch)
+        self.batch.clear()
+
+    def flush(self):
+        self.__writeBatch()
+        self.file.flush()
+
+    def close(self):
+        self.__writeBatch()
+        if self.compressor is not None:
+            self.file.write(self.compressor.flush())
+            self.compressor = None
+        self.file.close()
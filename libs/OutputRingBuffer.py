@@ -0,0 +1,92 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import threading
+import time
+
+
+class OutputRingBuffer:
+    """
+    Thread-safe buffer keeping the last `capacity` characters of a process output,
+    which allows to block until the output matches a pattern.
+    """
+
+    def __init__(self, capacity=64 * 1024):
+        self.capacity = capacity
+        self.condition = threading.Condition()
+        self.text = ""
+        self.start = 0  # offset of the first retained character in the whole output
+        self.closed = False
+        self.waiters = []
+
+    def append(self, text):
+        with self.condition:
+            self.text += text
+            # match pending patterns before the text is discarded
+            for waiter in self.waiters:
+                if waiter["match"] is None:
+                    waiter["match"] = self.__search(waiter["regex"], waiter["since"])
+            excess = len(self.text) - self.capacity
+            if excess > 0:
+                self.text = self.text[excess:]
+                self.start += excess
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def getvalue(self):
+        with self.condition:
+            return self.text
+
+    def end(self):
+        """
+        Returns offset of the end of the output received so far.
+        """
+        with self.condition:
+            return self.start + len(self.text)
+
+    def waitFor(self, pattern, timeout=None, since=0):
+        """
+        Blocks until the retained output written after offset `since` matches
+        `pattern` (regular expression). Returns the match, or None when
+        the timeout expires or the output is closed first.
+        """
+        regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            waiter = {"regex": regex, "since": since, "match": self.__search(regex, since)}
+            self.waiters.append(waiter)
+            try:
+                while waiter["match"] is None and not self.closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                return waiter["match"]
+            finally:
+                self.waiters.remove(waiter)
+
+    def __search(self, regex, since):
+        return regex.search(self.text, max(since - self.start, 0))
@@ -23,8 +23,19 @@ import os
 import shutil
 import subprocess
 import time
+from typing import NamedTuple
 
-import paramiko
+from .SshConnectionPool import sshConnectionPool
+
+
+class RemoteProcess(NamedTuple):
+    """
+    Tuple representing standard streams of the process launched via SSH.
+    """
+
+    stdin: object
+    stdout: object
+    stderr: object
 
 
 class RemoteAppInvoker:
@@ -33,6 +44,8 @@ class RemoteAppInvoker:
     depending on configuration.
     """
 
+    PID_READ_SIZE = 1024
+
     def __init__(
         self,
         path,
@@ -51,11 +64,13 @@ class RemoteAppInvoker:
         self.running = False
         self.handle = None
         self.pid = None
+        # output of the remote application received together with its PID
+        self.pendingOutput = b""
 
+        self.ssh = None
         self.sshOpened = False
 
     def __launchLocally(self):
-        self.output = ""
         binPath = (
             os.path.realpath(self.path)
             if os.path.isfile(os.path.realpath(self.path))
@@ -70,19 +85,37 @@ class RemoteAppInvoker:
             shell=False,
             stdout=subprocess.PIPE,
             stdin=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
         )
 
     def __launchRemotely(self):
         self.openSsh()
         command = "echo $$; exec " + self.path + " " + self.args
         print("Executing remotely:", command)
-        (
-            self.handle.stdin,
-            self.handle.stdout,
-            self.handle.stderr,
-        ) = self.handle.exec_command(command, get_pty=True)
-        self.pid = int(self.handle.stdout.readline())
+        try:
+            self.handle = RemoteProcess(*self.ssh.exec_command(command, get_pty=True))
+            self.pid = self.__readPid(self.handle.stdout.channel)
+        except Exception:
+            # the pooled connection is shared, don't keep a reference to it
+            if self.handle is not None:
+                self.handle.stdout.channel.close()
+                self.handle = None
+            self.closeSsh()
+            raise
+
+    def __readPid(self, channel):
+        """
+        Reads the PID line straight from the channel, the application output
+        following it in the same packets is kept in `pendingOutput`.
+        """
+        data = b""
+        while b"\n" not in data:
+            chunk = channel.recv(self.PID_READ_SIZE)
+            if not chunk:
+                raise RuntimeError("Remote shell exited before reporting the PID.")
+            data += chunk
+        line, self.pendingOutput = data.split(b"\n", 1)
+        return int(line)
 
     def open(self):
         if self.running:
@@ -102,11 +135,12 @@ class RemoteAppInvoker:
         self.handle.terminate()
 
     def __shutdownRemotely(self):
-        self.handle.exec_command(
+        _, stdout, _ = self.ssh.exec_command(
             "kill " + str(self.pid),
         )
-        self.handle.close()
-        self.sshOpened = False
+        stdout.channel.recv_exit_status()
+        self.handle.stdout.channel.close()
+        self.closeSsh()
 
     def close(self):
         if self.connectionConfig is not None:
@@ -116,25 +150,20 @@ class RemoteAppInvoker:
 
         self.handle = None
         self.reader = None
+        self.pendingOutput = b""
         self.running = False
 
     def openSsh(self):
         if self.sshOpened:
             return
 
-        try:
-            self.handle = paramiko.SSHClient()
-            self.handle.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.handle.connect(
-                self.connectionConfig.host(),
-                self.connectionConfig.port(22),
-                self.connectionConfig.username,
-                self.connectionConfig.password,
-            )
-        except Exception:
-            if self.handle is not None and self.handle._transport is not None:
-                self.handle.close()
-            self.handle = None
-            raise
-
+        self.ssh = sshConnectionPool.acquire(self.connectionConfig)
         self.sshOpened = True
+
+    def closeSsh(self):
+        if not self.sshOpened:
+            return
+
+        sshConnectionPool.release(self.connectionConfig)
+        self.ssh = None
+        self.sshOpened = False
@@ -0,0 +1,133 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import select
+import socket
+
+from .IoHandler import IoHandler
+
+
+class RttIoHandler(IoHandler):
+    """
+    Class responsible for gathering the output of the application executed on HWTB,
+    when the output is written to SEGGER RTT buffers in the target memory.
+    The buffers are read by openocd, which serves RTT channel on a TCP port.
+    openocd is configured through `monitor` commands of the given GdbInterface.
+    """
+
+    READ_SIZE = 64 * 1024
+    requiresGdb = True
+
+    def __init__(
+        self,
+        gdb,
+        address,
+        port,
+        channel=0,
+        searchAddress=0x20400000,
+        searchSize=0x60000,
+        controlBlockId="SEGGER RTT",
+        startSymbol="main",
+        readyTimeout=10,
+    ):
+        self.gdb = gdb
+        self.address = address
+        self.port = int(port)
+        self.channel = int(channel)
+        self.searchAddress = int(str(searchAddress), 0)
+        self.searchSize = int(str(searchSize), 0)
+        self.controlBlockId = controlBlockId
+        self.startSymbol = startSymbol
+        self.readyTimeout = float(readyTimeout)
+
+        self.rttSocket = None
+
+    def getOptimalReadSize(self):
+        return self.READ_SIZE
+
+    def open(self):
+        if self.rttSocket is not None:
+            raise RuntimeError("RttIoHandler has to be closed before opening it again!")
+
+        self.gdb.monitor(
+            "monitor rtt setup "
+            + hex(self.searchAddress)
+            + " "
+            + hex(self.searchSize)
+            + ' "'
+            + self.controlBlockId
+            + '"'
+        )
+        self.gdb.monitor(
+            "monitor rtt server start " + str(self.port) + " " + str(self.channel)
+        )
+        try:
+            self.rttSocket = self._connectTcp(self.address, self.port, self.readyTimeout)
+        except socket.error:
+            self.gdb.monitor("monitor rtt server stop " + str(self.port))
+            raise
+
+    def startTransfer(self):
+        """
+        Looks up the control block, which has to be initialized by the application
+        already, and starts forwarding the channel data to the TCP port.
+        """
+        self.gdb.monitor("monitor rtt stop")
+        self.gdb.monitor("monitor rtt start")
+
+    def close(self):
+        if self.rttSocket is None:
+            return
+
+        self.rttSocket.close()
+        self.rttSocket = None
+        self.gdb.monitor("monitor rtt stop")
+        self.gdb.monitor("monitor rtt server stop " + str(self.port))
+
+    def send(self, data):
+        if self.rttSocket is None:
+            raise RuntimeError("The RTT handler has not been open()'d!")
+
+        self.rttSocket.sendall(data)
+
+    def receiveInto(self, buffer, timeout=1):
+        if self.rttSocket is None:
+            raise RuntimeError("The RTT handler has not been open()'d!")
+
+        try:
+            readable, _, _ = select.select(
+                [self.rttSocket], [], [], timeout if timeout else None
+            )
+            if not readable:
+                return 0
+            return self.rttSocket.recv_into(buffer, len(buffer))
+        except OSError:
+            return 0
+
+    def reset(self):
+        while self.receive(self.READ_SIZE, timeout=0.1):
+            pass  # read all cached incoming bytes
+
+    def fileno(self):
+        if self.rttSocket is None:
+            return None
+        return self.rttSocket.fileno()
@@ -0,0 +1,207 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+from configparser import BasicInterpolation, ConfigParser, Error, NoOptionError, NoSectionError
+
+_UNSET = object()
+
+
+def _address(value):
+    """
+    Integer in any base Python accepts, e.g. 0x20400000, as the RTT handler reads it.
+    """
+    return int(value, 0)
+
+
+def _pattern(value):
+    try:
+        return re.compile(value)
+    except re.error as e:
+        raise ValueError(str(e))
+
+
+def parseMemoryRegions(value):
+    """
+    Returns (start, end) of each `start+size` region listed, separated with commas or spaces.
+    """
+    regions = []
+    for region in value.replace(",", " ").split():
+        start, _, size = region.partition("+")
+        try:
+            regions.append((int(start, 0), int(start, 0) + int(size, 0)))
+        except ValueError:
+            raise ValueError("invalid memory region " + region)
+    return regions
+
+
+class EnvironmentInterpolation(BasicInterpolation):
+    """
+    Interpolation of `%(name)s` references, which falls back to the environment
+    variables for names not defined in the section.
+    """
+
+    def __init__(self, environment):
+        self.environment = {name.lower(): value for name, value in environment.items()}
+
+    def before_get(self, parser, section, option, value, defaults):
+        return super().before_get(
+            parser, section, option, value, {**self.environment, **defaults}
+        )
+
+
+class RunnerConfig(ConfigParser):
+    """
+    Configuration of the runner. Options are validated when the configuration is read
+    and resolved values are kept, so that the environment is interpolated only once
+    for each option however many times it is looked up.
+    """
+
+    CHANNELS = ("ioConsole", "ioUart4")
+    REQUIRED = {
+        "gdbServer": ("path", "args"),
+        "gdb": ("address", "path", "verbose"),
+    }
+    CHANNEL_REQUIRED = {
+        "uart": (
+            "address", "username", "password", "hardwareDevicePath",
+            "baudrate", "port", "parity", "verbose",
+        ),
+        "serial": ("hardwareDevicePath", "baudrate", "parity"),
+        "rtt": ("address", "port"),
+    }
+    TYPES = {
+        ("gdbServer", "outputBufferSize"): int,
+        ("gdbServer", "readyPattern"): _pattern,
+        ("gdbServer", "readyTimeout"): float,
+        ("gdb", "startupTimeout"): float,
+        ("gdb", "memoryReadPacketSize"): int,
+        ("gdb", "runTimeout"): int,
+        ("gdb", "snapshotStackSize"): int,
+        ("gdb", "loadMode"): ("full", "cached", "compare"),
+        ("gdb", "memoryRegions"): parseMemoryRegions,
+        ("sentinels", "quietTime"): float,
+        ("trace", "format"): ("jsonl", "chrome"),
+    }
+    CHANNEL_TYPES = {
+        "type": tuple(CHANNEL_REQUIRED),
+        "baudrate": int,
+        "port": int,
+        "readyTimeout": float,
+        "coverage": bool,
+        "channel": int,
+        "searchAddress": _address,
+        "searchSize": _address,
+        "compression": ("", "none", "gzip", "zstd"),
+        "compressionLevel": int,
+        "parity": ("PARITY_NONE", "PARITY_EVEN", "PARITY_ODD"),
+        "bridge": ("session", "managed"),
+    }
+
+    def __init__(self, paths=(), environment=os.environ):
+        self.__resolved = {}
+        super().__init__(interpolation=EnvironmentInterpolation(environment))
+        if paths:
+            self.read(paths)
+            self.validate()
+
+    def get(self, section, option, *, raw=False, vars=None, fallback=_UNSET, **kwargs):
+        if vars is not None:
+            if fallback is _UNSET:
+                return super().get(section, option, raw=raw, vars=vars)
+            return super().get(section, option, raw=raw, vars=vars, fallback=fallback)
+
+        key = (section, self.optionxform(option), raw)
+        try:
+            return self.__resolved[key]
+        except KeyError:
+            pass
+        try:
+            value = super().get(section, option, raw=raw)
+        except (NoSectionError, NoOptionError):
+            if fallback is _UNSET:
+                raise
+            return fallback
+        self.__resolved[key] = value
+        return value
+
+    def set(self, section, option, value=None):
+        super().set(section, option, value)
+        option = self.optionxform(option)
+        self.__resolved = {
+            key: resolved
+            for key, resolved in self.__resolved.items()
+            if key[:2] != (section, option)
+        }
+
+    def read(self, filenames, encoding=None):
+        self.__resolved = {}
+        return super().read(filenames, encoding)
+
+    def validate(self):
+        """
+        Checks that the required options are present and all typed options
+        can be converted, raising RuntimeError listing every problem found.
+        """
+        errors = []
+        required = dict(self.REQUIRED)
+        types = dict(self.TYPES)
+        for channel in self.CHANNELS:
+            if not self.has_section(channel):
+                errors.append("missing section [" + channel + "]")
+                continue
+            handlerType = self.get(channel, "type", fallback="uart")
+            required[channel] = self.CHANNEL_REQUIRED.get(handlerType, ())
+            types.update(
+                ((channel, option), kind) for option, kind in self.CHANNEL_TYPES.items()
+            )
+
+        for section, options in required.items():
+            for option in options:
+                if not self.has_option(section, option):
+                    errors.append("missing option '" + option + "' in [" + section + "]")
+                    continue
+                try:
+                    self.get(section, option)
+                except Error as e:
+                    errors.append(e.message)
+
+        for (section, option), kind in types.items():
+            if not self.has_option(section, option):
+                continue
+            try:
+                value = self.get(section, option)
+                if isinstance(kind, tuple):
+                    if value not in kind:
+                        raise ValueError("expected one of " + ", ".join(kind))
+                elif kind is bool:
+                    self.getboolean(section, option)
+                else:
+                    # the same conversion as the reader, e.g. getint() for int
+                    kind(value)
+            except Error as e:
+                errors.append(e.message)
+            except ValueError as e:
+                errors.append("invalid '" + option + "' in [" + section + "]: " + str(e))
+
+        if errors:
+            raise RuntimeError("Invalid configuration:\n  " + "\n  ".join(dict.fromkeys(errors)))
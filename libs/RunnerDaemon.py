@@ -0,0 +1,209 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import contextvars
+import json
+import os
+import socket
+import sys
+import threading
+
+
+# output stream of the run executed in the current context
+_runOutput = contextvars.ContextVar("runOutput", default=None)
+
+
+def _sendMessage(connection, message):
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+class _OutputForwarder:
+    """
+    Text stream sending everything written to it to the client as output messages.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.broken = False
+        # the run and its worker threads write concurrently
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            if text and not self.broken:
+                try:
+                    _sendMessage(self.connection, {"type": "output", "data": text})
+                except OSError:
+                    # the client went away, the run is finished regardless
+                    self.broken = True
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _RunOutput:
+    """
+    Text stream passing writes made in the context of a run to its output, and
+    the other writes, e.g. of GDB server readers, to `fallback`. Worker threads
+    of the runner are started with a copy of the run's context, so their
+    writes belong to the run as well.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        output = _runOutput.get()
+        if output is None:
+            return self.fallback.write(text)
+        return output.write(text)
+
+    def flush(self):
+        if _runOutput.get() is None:
+            self.fallback.flush()
+
+
+class RunnerDaemon:
+    """
+    Server owning a single, long-lived gdb_runner session and executing
+    binaries submitted by clients over a UNIX socket, one at a time.
+    Runner output is streamed back to the client, followed by the result.
+    """
+
+    RUN_FIELDS = ("binary", "consoleLog", "uart4Log")
+    REQUEST_TIMEOUT = 10
+
+    def __init__(self, runner, socketPath):
+        self.runner = runner
+        self.socketPath = socketPath
+        self.server = None
+        self.running = False
+
+    def serveForever(self):
+        if os.path.exists(self.socketPath):
+            os.remove(self.socketPath)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socketPath)
+        self.server.listen()
+        self.running = True
+        print("Runner daemon listening on", self.socketPath)
+        try:
+            while self.running:
+                connection, _ = self.server.accept()
+                with connection:
+                    try:
+                        self.__handle(connection)
+                    except Exception as e:
+                        # a failed request must not end the session of the next ones
+                        print("Request failed:", e)
+        finally:
+            self.server.close()
+            self.server = None
+            os.remove(self.socketPath)
+            self.runner.shutdown()
+
+    def __handle(self, connection):
+        # a client which never sends its request must not block the others
+        connection.settimeout(self.REQUEST_TIMEOUT)
+        try:
+            with connection.makefile("r", encoding="utf-8") as requests:
+                request = json.loads(requests.readline())
+        except socket.timeout:
+            request = None
+        except (OSError, ValueError):
+            return
+        connection.settimeout(None)
+
+        if request is None:
+            message = f"No request received within {self.REQUEST_TIMEOUT} s."
+            result = {"status": "error", "message": message}
+        elif not isinstance(request, dict):
+            result = {"status": "error", "message": "Request is not a JSON object."}
+        elif request.get("command") == "shutdown":
+            self.running = False
+            result = {"status": "shutdown"}
+        elif request.get("command") == "run":
+            try:
+                result = self.__run(connection, request)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+        else:
+            result = {"status": "error", "message": "Unknown request."}
+
+        try:
+            _sendMessage(connection, dict(result, type="result"))
+        except OSError:
+            pass
+
+    def __run(self, connection, request):
+        for field in self.RUN_FIELDS:
+            if not isinstance(request.get(field), str):
+                return {"status": "error", "message": "Run request lacks '" + field + "'."}
+
+        self.runner.setLogPaths(request["consoleLog"], request["uart4Log"])
+        # sys.stdout is process-wide, only the prints made in the run's context belong to it
+        token = _runOutput.set(_OutputForwarder(connection))
+        try:
+            with contextlib.redirect_stdout(_RunOutput(sys.stdout)):
+                return self.runner.runBinary(request["binary"])
+        finally:
+            _runOutput.reset(token)
+
+
+class RunnerClient:
+    """
+    Client submitting requests to the RunnerDaemon.
+    """
+
+    def __init__(self, socketPath):
+        self.socketPath = socketPath
+
+    def __request(self, request, output):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socketPath)
+            _sendMessage(connection, request)
+            with connection.makefile("r", encoding="utf-8") as messages:
+                for line in messages:
+                    message = json.loads(line)
+                    if message["type"] == "output":
+                        output.write(message["data"])
+                        output.flush()
+                    elif message["type"] == "result":
+                        del message["type"]
+                        return message
+        raise RuntimeError("Runner daemon closed the connection without result.")
+
+    def run(self, binaryPath, consoleLog, uart4Log, output=sys.stdout):
+        return self.__request(
+            {
+                "command": "run",
+                "binary": os.path.abspath(binaryPath),
+                "consoleLog": os.path.abspath(consoleLog),
+                "uart4Log": os.path.abspath(uart4Log),
+            },
+            output,
+        )
+
+    def shutdown(self):
+        return self.__request({"command": "shutdown"}, sys.stdout)
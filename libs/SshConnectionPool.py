@@ -0,0 +1,93 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+
+class SshConnectionPool:
+    """
+    Class sharing one authenticated SSH connection between all users
+    of the same connection configuration. Channels for remote commands,
+    shells and file transfers are then opened on the shared transport.
+    `clientFactory(config)`, if set, creates the clients instead of paramiko,
+    e.g. to run against simulated hosts.
+    """
+
+    def __init__(self, clientFactory=None):
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.refCounts = {}
+        self.clientFactory = clientFactory
+
+    def acquire(self, config):
+        with self.lock:
+            client = self.clients.get(config)
+            if client is not None and not self.__isAlive(client):
+                client.close()
+                client = None
+
+            if client is None:
+                client = self._connect(config)
+                self.clients[config] = client
+                self.refCounts.setdefault(config, 0)
+
+            self.refCounts[config] += 1
+            return client
+
+    def release(self, config):
+        with self.lock:
+            if config not in self.refCounts:
+                return
+
+            self.refCounts[config] -= 1
+            if self.refCounts[config] > 0:
+                return
+
+            del self.refCounts[config]
+            self.clients.pop(config).close()
+
+    def _connect(self, config):
+        if self.clientFactory is not None:
+            return self.clientFactory(config)
+
+        import paramiko
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                config.host(),
+                config.port(22),
+                config.username,
+                config.password,
+            )
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    @staticmethod
+    def __isAlive(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+sshConnectionPool = SshConnectionPool()
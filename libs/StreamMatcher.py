@@ -0,0 +1,113 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import collections
+import re
+import threading
+
+
+class StreamMatcher:
+    """
+    Sink searching the captured output for a set of patterns, using Aho-Corasick
+    automaton, so the cost stays linear in the output size regardless of the number
+    of patterns. Matches spanning separate writes are found as well.
+    The first match sets `verdict` (the value assigned to the pattern) and `event`.
+    """
+
+    def __init__(self, patterns, event=None):
+        self.event = event if event is not None else threading.Event()
+        self.verdict = None
+        self.pattern = None
+        self.state = 0
+        self.__build(
+            {
+                pattern.encode("utf-8") if isinstance(pattern, str) else bytes(pattern): verdict
+                for pattern, verdict in patterns.items()
+            }
+        )
+
+    def __build(self, patterns):
+        goto = [{}]
+        outputs = [None]
+        for pattern, verdict in patterns.items():
+            if not pattern:
+                raise ValueError("Stream patterns can't be empty.")
+            state = 0
+            for byte in pattern:
+                if byte not in goto[state]:
+                    goto[state][byte] = len(goto)
+                    goto.append({})
+                    outputs.append(None)
+                state = goto[state][byte]
+            if outputs[state] is None:
+                outputs[state] = (pattern, verdict)
+
+        # turn the trie into a DFA, resolving failure links breadth first
+        failure = [0] * len(goto)
+        table = [None] * len(goto)
+        table[0] = [goto[0].get(byte, 0) for byte in range(256)]
+        queue = collections.deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            table[state] = list(table[failure[state]])
+            for byte, target in goto[state].items():
+                table[state][byte] = target
+                failure[target] = table[failure[state]][byte]
+                if outputs[target] is None:
+                    outputs[target] = outputs[failure[target]]
+                queue.append(target)
+
+        self.table = table
+        self.outputs = outputs
+        firstBytes = b"".join(re.escape(bytes([byte])) for byte in goto[0])
+        self.firstByte = re.compile(b"[" + firstBytes + b"]") if firstBytes else None
+
+    def write(self, data):
+        if self.verdict is not None or self.firstByte is None:
+            return len(data)
+
+        table = self.table
+        outputs = self.outputs
+        state = self.state
+        position = 0
+        end = len(data)
+        while position < end:
+            if state == 0:
+                # skip quickly to the next byte which can start a pattern
+                found = self.firstByte.search(data, position)
+                if found is None:
+                    break
+                position = found.start()
+            state = table[state][data[position]]
+            position += 1
+            if outputs[state] is not None:
+                self.pattern, self.verdict = outputs[state]
+                self.event.set()
+                break
+        self.state = state
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,111 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """
+    Class recording durations of the runner phases, either as JSON lines
+    or as Chrome trace events (viewable in chrome://tracing or Perfetto).
+    Phases are not recorded until the output is opened.
+    """
+
+    FORMATS = ("jsonl", "chrome")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.output = None
+        self.format = None
+        self.origin = time.perf_counter()
+
+    def open(self, path, format="jsonl"):
+        if format not in self.FORMATS:
+            raise RuntimeError("Invalid trace format: " + str(format))
+
+        self.close()
+        self.format = format
+        if format == "chrome":
+            # the closing bracket is optional, so the trace is valid at any point
+            self.output = open(path, "w")
+            self.output.write("[\n")
+        else:
+            self.output = open(path, "a")
+
+    def close(self):
+        with self.lock:
+            if self.output is not None:
+                self.output.close()
+                self.output = None
+
+    def enabled(self):
+        return self.output is not None
+
+    @contextlib.contextmanager
+    def phase(self, name, **args):
+        """
+        Records duration of the enclosed block. The yielded dictionary
+        can be filled with additional values, e.g. byte counts.
+        """
+        if self.output is None:
+            yield args
+            return
+
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.__record(name, start, time.perf_counter() - start, args)
+
+    def __record(self, name, start, duration, args):
+        if self.format == "chrome":
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6),
+                "dur": round(duration * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+            line = json.dumps(event, default=str) + ",\n"
+        else:
+            event = {
+                "phase": name,
+                "timestamp": time.time() - duration,
+                "duration": duration,
+                "pid": os.getpid(),
+                "thread": threading.current_thread().name,
+            }
+            event.update(args)
+            line = json.dumps(event, default=str) + "\n"
+
+        with self.lock:
+            if self.output is not None:
+                self.output.write(line)
+                self.output.flush()
+
+
+tracer = Tracer()
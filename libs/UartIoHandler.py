@@ -21,13 +21,12 @@
 
 import select
 import socket
+import subprocess
 import time
-import os
-
-import paramiko
-import scp
 
+from .ConnectionConfig import ConnectionConfig
 from .IoHandler import IoHandler
+from .SshConnectionPool import sshConnectionPool
 from enum import Enum
 
 class Parity(Enum):
@@ -39,12 +38,24 @@ class UartIoHandler(IoHandler):
     """
     Class responsible for gathering the output of the application executed on HWTB,
     when the output is transimtted over UART (forwarded via `socat`).
+
+    With the `session` bridge, `socat` is started for each run and killed when
+    the handler is closed. With the `managed` bridge, `socat` is left running
+    between runs, with its PID kept in a lease file of the device on the remote
+    host together with its settings, and a run only checks the lease and attaches
+    to it over TCP.
     """
 
     OPTIMAL_READ_SIZE = 4096
+    MAX_READ_SIZE = 256 * 1024
+    DRAIN_BATCH_SIZE = 1024 * 1024
+    STALE_QUIET_TIME = 0.05
+    STALE_DRAIN_TIMEOUT = 2
+    DEFAULT_BRIDGE_DIRECTORY = "/tmp/remote-target-runner"
+    LOCAL_SOCAT_STOP_TIMEOUT = 2
 
     def getOptimalReadSize(self):
-        return self.OPTIMAL_READ_SIZE
+        return self.readSize
 
     def __init__(
         self,
@@ -57,6 +68,9 @@ class UartIoHandler(IoHandler):
         virtualDeviceName = None,
         parity = Parity.PARITY_NONE,
         debug = False,
+        readyTimeout = 10,
+        bridge = "session",
+        bridgeDirectory = DEFAULT_BRIDGE_DIRECTORY,
     ):
         self.address = address
         self.port = int(port)
@@ -73,54 +87,91 @@ class UartIoHandler(IoHandler):
         self.uartDevice = uartDevice
         self.uartBaud = uartBaud
 
+        self.sshConfig = ConnectionConfig(address, username, password)
         self.sshUart = None
+        self.uartSession = None
         self.uartSocket = None
         self.opened = False
         self.handle = None
         self.parity = parity
 
         self.debug = debug
+        self.readyTimeout = float(readyTimeout)
+
+        if bridge not in ("session", "managed"):
+            raise RuntimeError("Invalid UART bridge supplied: " + str(bridge))
+        self.bridge = bridge
+        deviceName = self.uartDevice.replace("/", "")
+        self.pidPath = bridgeDirectory + "/" + deviceName + ".pid"
+        self.lockPath = bridgeDirectory + "/" + deviceName + ".lock"
+        self.settingsPath = bridgeDirectory + "/" + deviceName + ".args"
+        self.runLeasePath = bridgeDirectory + "/" + deviceName + ".run"
+        self.leaseSession = None
+        self.bridgeDirectory = bridgeDirectory
+        self.socatPid = None
+        # local socat exposing the channel as a pty, when the traffic is redirected
+        self.localSocat = None
+
+        self.readSize = self.OPTIMAL_READ_SIZE
+
+    def _connectUartSocket(self):
+        """
+        Connects to the remote `socat`, retrying until it starts listening
+        or `readyTimeout` expires.
+        """
+        return self._connectTcp(self.address, self.port, self.readyTimeout)
 
     def _openUartSocket(self):
         try:
-            self.uartSocket = socket.socket()
-            self.uartSocket.connect((self.address, self.port))
+            self.uartSocket = self._connectUartSocket()
         except socket.error:
-            self.sshUart.uartSession.send(chr(3))
+            self.uartSession.send(chr(3))
             time.sleep(0.5)
-            self.sshUart.close()
+            self.uartSession.close()
+            self.uartSession = None
             raise
 
     def _linkSocketWithVirtualTty(self):
+        # make sure the remote end listens before the local socat dials it
+        self._connectUartSocket().close()
         try:
-            socatLinkString = (
-                "socat pty,link="
-                + self.virtualDeviceName
-                +",raw,echo=0 tcp:"
-                + str(self.address)
-                + ":"
-                + str(self.port)
-                + " &"
+            self.localSocat = subprocess.Popen(
+                [
+                    "socat",
+                    "pty,link=" + self.virtualDeviceName + ",raw,echo=0",
+                    "tcp:" + str(self.address) + ":" + str(self.port),
+                ]
             )
-            os.system(socatLinkString)
-        except os.error:
+        except OSError:
             raise RuntimeError("Couldn't link socket with virtual tty.")
 
-    def _spawnRemoteSocat(self):
+    def __stopLocalSocat(self):
+        if self.localSocat is None:
+            return
+        self.localSocat.terminate()
+        try:
+            self.localSocat.wait(self.LOCAL_SOCAT_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.localSocat.kill()
+            self.localSocat.wait()
+        self.localSocat = None
+
+    def __socatCommand(self, listenOptions=""):
         debugFlag = "-x" if self.debug else ""
-        socatExecString = (
+        return (
             "socat "
             + debugFlag
             + " tcp-l:"
             + str(self.port)
-            + ",reuseaddr,fork "
+            + ",reuseaddr,fork"
+            + listenOptions
+            + " "
             + self.uartDevice
             + ",raw,echo=0,b"
             + str(self.uartBaud)
-            + " &> socat_"
-            + self.uartDevice.replace("/", "")
-            + "_gdb.log"
         )
+
+    def __sttyCommand(self):
         sttyArgs = str(self.uartBaud) + " cs8 -cstopb -crtscts "
 
         if self.parity == Parity.PARITY_EVEN:
@@ -131,50 +182,216 @@ class UartIoHandler(IoHandler):
             sttyArgs += "-parenb"
         else:
             raise RuntimeError("Invalid parity settings supplied.")
+        return "stty -F " + self.uartDevice + " " + sttyArgs
+
+    def __aliveCheck(self):
+        """
+        Returns shell condition true when the lease of the device
+        belongs to a running `socat`.
+        """
+        return (
+            "{ [ -f " + self.pidPath + " ]"
+            + " && kill -0 $(cat " + self.pidPath + ") 2>/dev/null"
+            + " && grep -q socat /proc/$(cat " + self.pidPath + ")/cmdline; }"
+        )
+
+    def __bridgeSettings(self):
+        """
+        Returns the line settings and `socat` arguments of the managed bridge,
+        kept with its lease to tell whether a running bridge can be reused.
+        """
+        return self.__sttyCommand() + " | " + self.__socatCommand(",max-children=1")
+
+    def __reapCommand(self):
+        """
+        Returns shell command stopping the leased `socat` of the device, if any,
+        and removing its lease.
+        """
+        return (
+            "{ if " + self.__aliveCheck() + "; then p=$(cat " + self.pidPath + "); kill $p; i=0;"
+            + " while [ $i -lt 100 ] && grep -q socat /proc/$p/cmdline 2>/dev/null;"
+            + " do sleep 0.05; i=$((i + 1)); done;"
+            + " grep -q socat /proc/$p/cmdline 2>/dev/null && kill -9 $p; fi;"
+            + " rm -f " + self.pidPath + " " + self.settingsPath + "; }"
+        )
+
+    def _spawnRemoteSocat(self):
+        socatExecString = (
+            self.__socatCommand()
+            + " &> socat_"
+            + self.uartDevice.replace("/", "")
+            + "_gdb.log"
+        )
 
-        sshUart = self.sshUart
+        _, stdout, stderr = self.sshUart.exec_command(self.__sttyCommand())
+        if stdout.channel.recv_exit_status() != 0:
+            raise RuntimeError(
+                "Couldn't configure "
+                + self.uartDevice
+                + ": "
+                + stderr.read().decode("utf-8")
+            )
+
+        import paramiko
+
+        uartSession = None
         try:
-            transport = sshUart.get_transport()
+            transport = self.sshUart.get_transport()
             uartSession = transport.open_session()
             uartSession.get_pty()
-            uartSession.invoke_shell()
-            time.sleep(2)
-            uartSession.send("stty -F " + self.uartDevice + " " + sttyArgs + "\n")
-            time.sleep(1)
-            uartSession.send(socatExecString + "\n")
-            time.sleep(1)
-            sshUart.uartSession = uartSession
+            # the lease records the shell's PID, which `exec` hands over to socat
+            uartSession.exec_command(
+                "mkdir -p " + self.bridgeDirectory
+                + "; rm -f " + self.settingsPath
+                + "; echo $$ > " + self.pidPath
+                + "; echo $$; exec " + socatExecString
+            )
+            self.uartSession = uartSession
+            self.socatPid = int(uartSession.makefile("r").readline())
         except paramiko.SSHException:
-            sshUart.close()
+            if uartSession is not None:
+                uartSession.close()
             raise
 
-    def __checkIfLaunched(self):
-        psout = (
-            self.sshUart.exec_command("ps | grep socat")[1]
-            .read()
-            .decode("utf-8")
-            .splitlines()
+    def __reapLeftSocat(self):
+        """
+        Stops the leased `socat` of the device, left by a run which ended
+        without closing the handler (the run lease is free, so nobody uses it).
+        """
+        _, stdout, _ = self.sshUart.exec_command(
+            "mkdir -p " + self.bridgeDirectory
+            + " && exec 9>" + self.lockPath
+            + " && flock 9"
+            + " && " + self.__reapCommand()
         )
+        stdout.channel.recv_exit_status()
+
+    def __startBridge(self):
+        """
+        Starts the managed `socat` of the device, unless its lease shows it is
+        running already with the same settings. Leases of dead processes, and bridges
+        started with different settings, are reaped. Returns PID of the bridge.
+        """
+        settings = self.__bridgeSettings()
+        script = (
+            "mkdir -p " + self.bridgeDirectory
+            + " && exec 9>" + self.lockPath
+            + " && flock 9"
+            + " && if " + self.__aliveCheck()
+            + " && [ \"$(cat " + self.settingsPath + " 2>/dev/null)\" = '" + settings + "' ];"
+            + " then cat " + self.pidPath + ";"
+            + " else " + self.__reapCommand()
+            + " && " + self.__sttyCommand()
+            + " && { setsid " + self.__socatCommand(",max-children=1")
+            + " </dev/null >" + self.bridgeDirectory + "/socat_"
+            + self.uartDevice.replace("/", "") + ".log 2>&1 9>&- &"
+            + " echo $! > " + self.pidPath + "; echo '" + settings + "' > " + self.settingsPath
+            + "; cat " + self.pidPath + "; }; fi"
+        )
+        _, stdout, stderr = self.sshUart.exec_command(script)
+        output = stdout.read().decode("utf-8").strip()
+        if stdout.channel.recv_exit_status() != 0 or not output.isdigit():
+            raise RuntimeError(
+                "Couldn't start bridge of "
+                + self.uartDevice
+                + ": "
+                + stderr.read().decode("utf-8")
+            )
+        return int(output)
+
+    def stopBridge(self):
+        """
+        Stops the `socat` of the device (a managed bridge, or one left by a session)
+        by the PID from its lease.
+        """
+        sshUart = sshConnectionPool.acquire(self.sshConfig)
+        try:
+            _, stdout, _ = sshUart.exec_command(
+                "exec 9>" + self.lockPath
+                + " && flock 9"
+                + " && " + self.__reapCommand()
+            )
+            stdout.channel.recv_exit_status()
+        finally:
+            sshConnectionPool.release(self.sshConfig)
+
+    def __acquireRunLease(self):
+        """
+        Takes the lease of the device for the run, held by a remote command
+        until its session is closed (also when the connection is lost).
+        Raises RuntimeError when another run holds it.
+        """
+        session = self.sshUart.get_transport().open_session()
+        session.exec_command(
+            "mkdir -p " + self.bridgeDirectory
+            + " && exec 8>" + self.runLeasePath
+            + " && flock -n 8 && echo leased && exec cat >/dev/null"
+        )
+        if session.makefile("r").readline().strip() != "leased":
+            session.close()
+            raise RuntimeError("UartIoHandler is already running elsewhere.")
+        self.leaseSession = session
+
+    def __attachBridge(self):
+        """
+        Takes the run lease of the device and connects to the managed bridge,
+        (re)starting it first unless it runs with the configured settings.
+        Discards the output left from the previous run.
+        """
+        self.sshUart = sshConnectionPool.acquire(self.sshConfig)
+        try:
+            self.__acquireRunLease()
+            self.socatPid = self.__startBridge()
+            try:
+                uartSocket = self._connectUartSocket()
+            except socket.error:
+                self.stopBridge()
+                raise
+        except Exception:
+            self.__closeSsh()
+            raise
+
+        self.uartSocket = uartSocket
+        self.__drainStale()
 
-        for line in psout:
-            if "socat" in line:
-                return True
-        return False
+    def __drainStale(self):
+        """
+        Discards bytes received before the run, until the line is quiet
+        for STALE_QUIET_TIME or STALE_DRAIN_TIMEOUT expires.
+        """
+        deadline = time.monotonic() + self.STALE_DRAIN_TIMEOUT
+        while time.monotonic() < deadline and self.receive(
+            self.MAX_READ_SIZE, timeout=self.STALE_QUIET_TIME
+        ):
+            pass
 
     def open(self):
         super().open()
-        if self.opened:
+        if self.opened or self.sshUart is not None:
             raise RuntimeError(
                 "UartIoHandler has to be closed before opening it again!"
             )
 
+        if self.bridge == "managed":
+            self.__attachBridge()
+            if self.redirectTraficToPty:
+                self.uartSocket.close()
+                self.uartSocket = None
+                try:
+                    self._linkSocketWithVirtualTty()
+                except Exception:
+                    self.close()
+                    raise
+            else:
+                self.handle = self.uartSocket.fileno()
+                self.opened = True
+            return
+
         try:
-            self.sshUart = paramiko.SSHClient()
-            self.sshUart.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.sshUart.connect(self.address, 22, self.username, self.password)
+            self.sshUart = sshConnectionPool.acquire(self.sshConfig)
 
-            if self.__checkIfLaunched():
-                raise RuntimeError("UartIoHandler is already running elsewhere.")
+            self.__acquireRunLease()
+            self.__reapLeftSocat()
             self._spawnRemoteSocat()
             
             if self.redirectTraficToPty:
@@ -185,80 +402,151 @@ class UartIoHandler(IoHandler):
                 self.opened = True
 
         except Exception:
-            if self.sshUart is not None and self.sshUart._transport is not None:
-                self.checkAndForceClose()
-                self.sshUart.close()
-            self.sshUart = None
+            if self.sshUart is not None:
+                if self.sshUart.get_transport() is not None:
+                    self.checkAndForceClose()
+                self.__closeSsh()
             raise
 
     def checkAndForceClose(self):
-        psout = (
-            self.sshUart.exec_command("ps | grep socat")[1]
-            .read()
-            .decode("utf-8")
-            .splitlines()
-        )
+        if self.socatPid is None:
+            return
 
-        for line in psout:
-            if "socat" in line:
-                self.sshUart.exec_command("kill " + str(line.split()[0]))
-                break
+        pid = str(self.socatPid)
+        _, stdout, _ = self.sshUart.exec_command(
+            "kill " + pid + " 2>/dev/null;"
+            + " if [ \"$(cat " + self.pidPath + " 2>/dev/null)\" = " + pid + " ];"
+            + " then rm -f " + self.pidPath + "; fi"
+        )
+        stdout.channel.recv_exit_status()
+        self.socatPid = None
 
     def close(self):
-        if not self.opened:
-            return
-
+        # resources are released one by one, a handler redirecting the traffic
+        # to a pty is never `opened`, but holds the lease and the bridge as well
         self.opened = False
         self.handle = None
 
-        self.uartSocket.shutdown(socket.SHUT_RDWR)
-        self.uartSocket.close()
-        self.uartSocket = None
+        if self.uartSocket is not None:
+            self.uartSocket.shutdown(socket.SHUT_RDWR)
+            self.uartSocket.close()
+            self.uartSocket = None
+
+        self.__stopLocalSocat()
+
+        if self.sshUart is None:
+            return
+
+        if self.bridge == "managed":
+            # the bridge is left running for the next run
+            self.__closeSsh()
+            super().close()
+            return
 
         if self.debug:
+            import scp
+
             scpClient = scp.SCPClient(self.sshUart.get_transport())
             scpClient.get("socat_" + self.uartDevice.replace("/", "") + "_gdb.log")
             scpClient.close()
 
         self.checkAndForceClose()
-        self.sshUart.close()
-        self.sshUart = None
+        self.__closeSsh()
 
         super().close()
 
+    def __closeSsh(self):
+        if self.uartSession is not None:
+            self.uartSession.close()
+            self.uartSession = None
+        if self.leaseSession is not None:
+            self.leaseSession.close()
+            self.leaseSession = None
+        if self.sshUart is not None:
+            sshConnectionPool.release(self.sshConfig)
+            self.sshUart = None
+
     def send(self, data):
         if self.uartSocket is None:
             raise RuntimeError("The UART handler has not been open()'d!")
 
         self.uartSocket.send(data)
 
-    def receive(self, maxlen=1, timeout=1):
+    def receiveInto(self, buffer, timeout=1):
+        """
+        Receives data directly into `buffer` (bytearray or memoryview), waiting
+        up to `timeout` seconds for it (indefinitely if the timeout is 0 or None).
+        Returns number of received bytes, 0 if none arrived or the connection was closed.
+        """
         if self.uartSocket is None:
             raise RuntimeError("The UART handler has not been open()'d!")
 
-        data = b""
-        if timeout > 0:
+        try:
+            # avoid select() when data is already waiting in the socket
+            count = self.uartSocket.recv_into(buffer, len(buffer), socket.MSG_DONTWAIT)
+        except BlockingIOError:
             try:
-                readable, _, _ = select.select([self.uartSocket], [], [], timeout)
-                if readable:
-                    data = self.uartSocket.recv(maxlen)
+                readable, _, _ = select.select(
+                    [self.uartSocket], [], [], timeout if timeout else None
+                )
+                if not readable:
+                    return 0
+                count = self.uartSocket.recv_into(buffer, len(buffer))
             except OSError:
-                pass
-        else:
-            while True:
-                try:
-                    readable, _, _ = select.select([self.uartSocket], [], [], 1)
-                    if readable:
-                        data = self.uartSocket.recv(maxlen)
-                        break
-                except OSError:
-                    break
-        return data
+                return 0
+        except OSError:
+            return 0
+
+        self.__adaptReadSize(count, len(buffer))
+        return count
+
+    def __adaptReadSize(self, count, requested):
+        """
+        Grows the optimal read size while reads fill the buffer, shrinks it
+        back when the output slows down.
+        """
+        if count == requested:
+            self.readSize = min(self.readSize * 2, self.MAX_READ_SIZE)
+        elif count < requested // 4:
+            self.readSize = max(self.readSize // 2, self.OPTIMAL_READ_SIZE)
+
+    def drainToFile(self, file, quietTime=1, timeout=100):
+        """
+        Writes incoming data to `file` in large batches, until no data arrived
+        for `quietTime` seconds, the connection was closed or `timeout` expired.
+        Returns number of written bytes.
+        """
+        batch = memoryview(bytearray(self.DRAIN_BATCH_SIZE))
+        deadline = time.monotonic() + timeout
+        filled = 0
+        total = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            count = 0
+            if remaining > 0:
+                count = self.receiveInto(
+                    batch[filled : filled + self.readSize], min(quietTime, remaining)
+                )
+            filled += count
+            if count == 0 or filled + self.readSize > len(batch):
+                file.write(batch[:filled])
+                total += filled
+                filled = 0
+            if count == 0:
+                break
+        file.flush()
+        return total
 
     def reset(self):
-        while len(self.receive(8 * 1024)) > 0:
-            pass  # read all cached incoming bytes
+        # with the traffic redirected to a pty, the output belongs to its reader
+        if self.uartSocket is not None:
+            self.__drainStale()
         super().reset()
 
+    def fileno(self):
+        if self.uartSocket is None:
+            return None
+        return self.uartSocket.fileno()
+
     def wasTrafficRedirrectedToPty(self):
         return self.redirectTraficToPty;
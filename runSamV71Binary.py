@@ -5,21 +5,46 @@ import sys
 import getopt
 from pathlib import Path
 
-import gdb_runner
-from libs.GdbServerInvoker import GdbServerInvoker
+from libs.BatchRunner import BatchRunner, collectBinaries, isFailed, outcome
+from libs.FarmScheduler import FarmScheduler
+from libs.RunnerDaemon import RunnerClient, RunnerDaemon
+from libs.Tracer import tracer
+
+
+def createRunner(configPath, virtualConsole='', virtualUart4=''):
+    # imported only when binaries are run by this process, not by a daemon
+    import gdb_runner
+    return gdb_runner.gdb_runner(configPath, virtualConsole, virtualUart4)
+
 
 virtualConsole = ''
 virtualUart4 = ''
 configPath = str(Path(__file__).resolve().parent) + '/Config/taste.cfg'
+farmConfigPaths = []
+daemonSocket = None
+serveSocket = None
+stopDaemon = False
+manifestPath = None
+logDir = "."
+summaryPath = None
+tracePath = None
+traceFormat = "jsonl"
+failOnTimeout = False
+jobTimeout = FarmScheduler.JOB_TIMEOUT
 
-try :
-    binary = sys.argv[1]
-except:
-    print("Error! SamV71 binary path was not passed to the script!")
-    quit()
+consoleLog = "virtualConsoleLog.txt"
+uart4Log = "virtualUart4log.txt"
 
 try:
-    opts, args = getopt.getopt(sys.argv[2:],"c:v:u:",["config=","vconsole=","uart"])
+    opts, args = getopt.gnu_getopt(
+        sys.argv[1:],
+        "c:v:u:d:m:l:",
+        [
+            "config=", "vconsole=", "uart=", "daemon=", "serve=", "stop-daemon",
+            "manifest=", "log-dir=", "summary=", "trace=", "trace-format=",
+            "fail-on-timeout", "job-timeout=",
+        ],
+    )
 except getopt.GetoptError:
     print("Error while parsing arguments.")
     sys.exit(2)
@@ -27,11 +52,80 @@ except getopt.GetoptError:
 for opt, arg in opts:
     if opt in ("-c", "--config"):
         configPath = arg
-    elif opt in ("-v", "--vConsole"):
+        farmConfigPaths.append(arg)
+    elif opt in ("-v", "--vconsole"):
         virtualConsole = arg
     elif opt in ("-u", "--uart"):
         virtualUart4 = arg
+    elif opt in ("-d", "--daemon"):
+        daemonSocket = arg
+    elif opt == "--serve":
+        serveSocket = arg
+    elif opt == "--stop-daemon":
+        stopDaemon = True
+    elif opt in ("-m", "--manifest"):
+        manifestPath = arg
+    elif opt in ("-l", "--log-dir"):
+        logDir = arg
+    elif opt == "--summary":
+        summaryPath = arg
+    elif opt == "--trace":
+        tracePath = arg
+    elif opt == "--trace-format":
+        traceFormat = arg
+    elif opt == "--fail-on-timeout":
+        failOnTimeout = True
+    elif opt == "--job-timeout":
+        jobTimeout = float(arg)
+
+if tracePath is not None:
+    tracer.open(tracePath, traceFormat)
+
+if serveSocket is not None:
+    gdbRunner = createRunner(configPath, virtualConsole, virtualUart4)
+    RunnerDaemon(gdbRunner, serveSocket).serveForever()
+    sys.exit(0)
+
+if stopDaemon and daemonSocket is not None:
+    RunnerClient(daemonSocket).shutdown()
+    sys.exit(0)
+
+binaries = collectBinaries(args, manifestPath)
+if not binaries:
+    print("Error! SamV71 binary path was not passed to the script!")
+    quit()
+
+if len(farmConfigPaths) > 1:
+    farm = FarmScheduler(
+        farmConfigPaths,
+        createRunner,
+        logDir,
+        failOnTimeout=failOnTimeout,
+        jobTimeout=jobTimeout,
+    )
+    farm.run(binaries)
+    farm.printSummary()
+    if summaryPath is not None:
+        farm.writeSummary(summaryPath)
+    sys.exit(1 if farm.failed() else 0)
+
+if daemonSocket is not None:
+    runOne = RunnerClient(daemonSocket).run
+else:
+    gdbRunner = createRunner(configPath, virtualConsole, virtualUart4)
+
+    def runOne(binary, consoleLog, uart4Log):
+        gdbRunner.setLogPaths(consoleLog, uart4Log)
+        return gdbRunner.runBinary(binary)
+
+if len(binaries) == 1 and manifestPath is None:
+    result = runOne(binaries[0], consoleLog, uart4Log)
+    print("Run", result["status"], "(" + outcome(result) + ") in", "%.2f" % result["duration"], "s")
+    sys.exit(1 if isFailed(result, failOnTimeout) else 0)
 
-gdbRunner = gdb_runner.gdb_runner(configPath, virtualConsole, virtualUart4)
-gdbRunner.startOnGdb(binary)
-gdbRunner.waitToFinishOnGdb()
+batch = BatchRunner(runOne, logDir, failOnTimeout)
+batch.run(binaries)
+batch.printSummary()
+if summaryPath is not None:
+    batch.writeSummary(summaryPath)
+sys.exit(1 if batch.failed() else 0)
@@ -0,0 +1,124 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import struct
+
+SHT_PROGBITS = 1
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+STT_OBJECT = 1
+STT_FUNC = 2
+STB_GLOBAL = 1
+SHN_ABS = 0xFFF1
+PT_LOAD = 1
+EM_ARM = 40
+
+
+def writeElf(path, sections, symbols, entry=None):
+    """
+    Writes minimal 32-bit little endian ARM executable, which GDB can load.
+    `sections` is a list of (name, address, data, flags) loaded at their addresses,
+    `symbols` is a list of (name, value, type), placed in the section containing
+    the value, if any; functions are assumed to be Thumb code and get the lowest
+    bit of their address set.
+    """
+    names = bytearray(b"\0")
+
+    def addName(table, name):
+        offset = len(table)
+        table += name.encode() + b"\0"
+        return offset
+
+    headers = 52 + 32 * len(sections)
+    offset = headers
+    contents = bytearray()
+    sectionHeaders = [struct.pack("<10I", *([0] * 10))]
+    programHeaders = b""
+    for name, address, data, flags in sections:
+        padding = -offset % 4
+        contents += b"\0" * padding
+        offset += padding
+        sectionHeaders.append(
+            struct.pack(
+                "<10I", addName(names, name), SHT_PROGBITS, flags, address,
+                offset, len(data), 0, 0, 4, 0,
+            )
+        )
+        segmentFlags = 4 | (1 if flags & SHF_EXECINSTR else 0) | (2 if flags & SHF_WRITE else 0)
+        programHeaders += struct.pack(
+            "<8I", PT_LOAD, offset, address, address, len(data), len(data), segmentFlags, 4
+        )
+        contents += data
+        offset += len(data)
+
+    strings = bytearray(b"\0")
+    symbolTable = struct.pack("<IIIBBH", 0, 0, 0, 0, 0, 0)
+    for name, value, symbolType in symbols:
+        index = SHN_ABS
+        for sectionIndex, (_, address, data, _) in enumerate(sections, 1):
+            if address <= value < address + len(data):
+                index = sectionIndex
+        if symbolType == STT_FUNC:
+            value |= 1
+        symbolTable += struct.pack(
+            "<IIIBBH", addName(strings, name), value, 0,
+            (STB_GLOBAL << 4) | symbolType, 0, index,
+        )
+
+    symtabIndex = len(sectionHeaders)
+    for name, sectionType, data, link, info, entrySize in (
+        (".symtab", SHT_SYMTAB, symbolTable, symtabIndex + 1, 1, 16),
+        (".strtab", SHT_STRTAB, strings, 0, 0, 0),
+        (".shstrtab", SHT_STRTAB, None, 0, 0, 0),
+    ):
+        nameOffset = addName(names, name)
+        if data is None:
+            data = names
+        padding = -offset % 4
+        contents += b"\0" * padding
+        offset += padding
+        sectionHeaders.append(
+            struct.pack(
+                "<10I", nameOffset, sectionType, 0, 0, offset, len(data),
+                link, info, 4, entrySize,
+            )
+        )
+        contents += data
+        offset += len(data)
+
+    padding = -offset % 4
+    contents += b"\0" * padding
+    offset += padding
+
+    if entry is None:
+        entry = sections[0][1] | 1
+    header = struct.pack(
+        "<4sBBBB8xHHIIIIIHHHHHH",
+        b"\x7fELF", 1, 1, 1, 0,
+        2, EM_ARM, 1, entry, 52, offset, 0x05000000,
+        52, 32, len(sections), 40, len(sectionHeaders), len(sectionHeaders) - 1,
+    )
+    with open(path, "wb") as elf:
+        elf.write(header + programHeaders + contents + b"".join(sectionHeaders))
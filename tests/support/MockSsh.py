@@ -0,0 +1,168 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import re
+import threading
+
+
+class MockChannel:
+    """
+    Channel of a finished remote command.
+    """
+
+    def __init__(self, exitStatus=0):
+        self.exitStatus = exitStatus
+
+    def recv_exit_status(self):
+        return self.exitStatus
+
+    def close(self):
+        pass
+
+
+class MockFile(io.BytesIO):
+    def __init__(self, data=b"", exitStatus=0):
+        super().__init__(data)
+        self.channel = MockChannel(exitStatus)
+
+
+class MockSession:
+    """
+    Interactive session running the remote `socat`, simulated by a stream server
+    listening on its port for as long as the session is open.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.server = None
+        self.command = ""
+        self.lease = None
+        self.pid = client.nextPid()
+
+    def get_pty(self):
+        pass
+
+    def makefile(self, mode="r"):
+        if "flock -n" in self.command:
+            return io.StringIO("leased\n" if self.lease is not None else "")
+        return io.StringIO(str(self.pid) + "\n")
+
+    def exec_command(self, command):
+        self.command = command
+        lease = re.search(r"exec 8>(\S+) && flock -n 8", command)
+        if lease is not None:
+            self.lease = self.client.takeLease(lease.group(1))
+        match = re.search(r"tcp-l:(\d+)", command)
+        if match is not None and self.client.streamFactory is not None:
+            self.server = self.client.streamFactory(int(match.group(1)))
+            self.server.start()
+
+    def send(self, data):
+        return len(data)
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+        if self.lease is not None:
+            self.client.releaseLease(self.lease)
+            self.lease = None
+
+
+class MockTransport:
+    def __init__(self, client):
+        self.client = client
+
+    def is_active(self):
+        return not self.client.closed
+
+    def open_session(self):
+        return MockSession(self.client)
+
+
+class MockSshClient:
+    """
+    Stand-in for paramiko.SSHClient of the host with the UART adapters.
+    Remote commands succeed without output, except that starting a managed bridge
+    prints its PID. Run leases are held like with `flock -n`, until the session
+    holding them is closed. If `streamFactory(port)` is given, `socat` sessions and managed
+    bridges serve the output of the UartStreamServer it creates, otherwise
+    the output is expected to be served on the port already.
+    """
+
+    def __init__(self, streamFactory=None):
+        self.streamFactory = streamFactory
+        self.closed = False
+        self.commands = []
+        self.lock = threading.Lock()
+        self.pid = 1000
+        self.bridges = {}
+        self.leases = set()
+
+    def nextPid(self):
+        with self.lock:
+            self.pid += 1
+            return self.pid
+
+    def takeLease(self, path):
+        """
+        Returns `path` if its lease was free and is now taken, None otherwise.
+        """
+        with self.lock:
+            if path in self.leases:
+                return None
+            self.leases.add(path)
+            return path
+
+    def releaseLease(self, path):
+        with self.lock:
+            self.leases.discard(path)
+
+    def exec_command(self, command, get_pty=False):
+        with self.lock:
+            self.commands.append(command)
+        match = re.search(r"setsid socat .*tcp-l:(\d+)", command)
+        if match is None:
+            return MockFile(), MockFile(), MockFile()
+
+        port = int(match.group(1))
+        with self.lock:
+            if port not in self.bridges:
+                server = None
+                if self.streamFactory is not None:
+                    server = self.streamFactory(port)
+                    server.start()
+                self.bridges[port] = (self.pid + 1, server)
+                self.pid += 1
+        return MockFile(), MockFile(str(self.bridges[port][0]).encode()), MockFile()
+
+    def get_transport(self):
+        return MockTransport(self)
+
+    def close(self):
+        self.closed = True
+        self.leases = set()
+        for _, server in self.bridges.values():
+            if server is not None:
+                server.stop()
+        self.bridges = {}
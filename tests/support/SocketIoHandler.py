@@ -0,0 +1,52 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+
+from libs.IoHandler import IoHandler
+
+
+class SocketIoHandler(IoHandler):
+    """
+    IO handler reading one end of a socket pair, the test writes to the other.
+    """
+
+    def __init__(self):
+        self.socket, self.peer = socket.socketpair()
+
+    def getOptimalReadSize(self):
+        return 4096
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.socket.close()
+        self.peer.close()
+
+    def receiveInto(self, buffer, timeout=1):
+        return self.socket.recv_into(buffer, len(buffer))
+
+    def reset(self):
+        pass
+
+    def fileno(self):
+        return self.socket.fileno()
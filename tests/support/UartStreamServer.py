@@ -0,0 +1,123 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import socket
+import threading
+import time
+
+
+class UartStreamServer:
+    """
+    TCP server standing in for the remote `socat`, streaming `size` bytes
+    of console-like output followed by `trailer` to each client at `rate` bytes
+    per second (as fast as possible if the rate is None), then closing the connection.
+    If `triggered` is set, connections are kept open and the output is streamed
+    to all of them on each `trigger()` instead, like a target printing while it runs.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, size, rate=None, port=0, trailer=b"", triggered=False):
+        self.size = size
+        self.rate = rate
+        self.trailer = trailer
+        self.triggered = triggered
+        line = b"".join(b"%08d: test output line\r\n" % n for n in range(2048))
+        self.payload = (line * (self.CHUNK_SIZE // len(line) + 1))[: self.CHUNK_SIZE]
+
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", port))
+        self.server.listen(4)
+        self.port = self.server.getsockname()[1]
+
+        self.thread = None
+        self.stopped = threading.Event()
+        self.connections = []
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        try:
+            # wakes the blocked accept(), the port stays taken until it returns
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        for connection in self.connections:
+            connection.close()
+
+    def serve(self):
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            if self.triggered:
+                self.connections.append(connection)
+                continue
+            try:
+                self.__stream(connection)
+                connection.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            connection.close()
+
+    def trigger(self):
+        """
+        Streams the output to all connected clients in the background.
+        """
+        for connection in list(self.connections):
+            thread = threading.Thread(target=self.__streamSafely, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def expected(self):
+        """
+        Returns the bytes streamed to each client.
+        """
+        repeats = self.size // self.CHUNK_SIZE + 1
+        return (self.payload * repeats)[: self.size] + self.trailer
+
+    def __streamSafely(self, connection):
+        try:
+            self.__stream(connection)
+        except OSError:
+            self.connections.remove(connection)
+
+    def __stream(self, connection):
+        start = time.monotonic()
+        sent = 0
+        while sent < self.size:
+            chunk = self.payload[: min(self.CHUNK_SIZE, self.size - sent)]
+            if self.rate is not None:
+                delay = start + sent / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                chunk = chunk[: max(int(self.rate * 0.01), 1)]
+            connection.sendall(chunk)
+            sent += len(chunk)
+        connection.sendall(self.trailer)
@@ -0,0 +1,76 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+
+from libs.BatchRunner import BatchRunner, isFailed, outcome
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"status": "finished"},
+        {"status": "finished", "verdict": "pass"},
+        {"status": "finished", "exitSymbol": "_exit", "exitCode": 0},
+        {"status": "timeout"},
+    ],
+)
+def test_passingRuns(result):
+    assert not isFailed(result)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"status": "error"},
+        {"status": "interrupted"},
+        {"status": "finished", "verdict": "fail"},
+        {"status": "finished", "exitSymbol": "HardFault_Handler", "verdict": "crash"},
+        {"status": "finished", "exitSymbol": "_exit", "exitCode": 3},
+    ],
+)
+def test_failingRuns(result):
+    assert isFailed(result)
+
+
+def test_timeoutFailsOnlyWhenRequested():
+    assert isFailed({"status": "timeout"}, failOnTimeout=True)
+    assert not isFailed({"status": "finished"}, failOnTimeout=True)
+
+
+def test_outcomePrefersVerdict():
+    assert outcome({"verdict": "crash", "exitSymbol": "abort"}) == "crash"
+    assert outcome({"exitCode": 1}) == "exit 1"
+    assert outcome({}) == "-"
+
+
+def test_failedRunsOfBatch(tmp_path):
+    statuses = {"a.elf": "finished", "b.elf": "timeout", "c.elf": "error"}
+
+    def runOne(binary, consoleLog, uart4Log):
+        return {"binary": binary, "status": statuses[binary], "duration": 0}
+
+    batch = BatchRunner(runOne, str(tmp_path))
+    batch.run(list(statuses))
+    assert [result["binary"] for result in batch.failed()] == ["c.elf"]
+    batch.failOnTimeout = True
+    assert [result["binary"] for result in batch.failed()] == ["b.elf", "c.elf"]
@@ -0,0 +1,80 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import binascii
+import os
+
+import pytest
+
+from libs.CoverageDecoder import CoverageDecoder
+
+GCDA = {
+    "first.gcda": bytes(range(256)) * 3,
+    "second.gcda": b"\x00gcda\xff" * 50,
+}
+CLEAN_OUTPUT = b"Booting...\r\nTest 1 passed\r\n"
+
+
+def coverageLog():
+    log = CLEAN_OUTPUT + b"\r\n" + CoverageDecoder.BEGIN_MARKER + b"\r\n"
+    for name, contents in GCDA.items():
+        hexContents = binascii.b2a_hex(contents)
+        # line breaks are only allowed at the end of the hex line, blanks anywhere
+        hexContents = hexContents[:100] + b" \t" + hexContents[100:]
+        log += CoverageDecoder.FILE_MARKER + name.encode() + b"\r\n" + hexContents + b"\r\n"
+    return log + b"done\r\n"
+
+
+def decodeInChunks(log, chunkSize):
+    decoder = CoverageDecoder("clean.txt")
+    for position in range(0, len(log), chunkSize):
+        decoder.write(log[position : position + chunkSize])
+    decoder.close()
+    return decoder
+
+
+@pytest.mark.parametrize("chunkSize", list(range(1, 40)) + [97, 256, 1000, 1 << 20])
+def test_decodesAcrossChunkBoundaries(tmp_path, monkeypatch, chunkSize):
+    monkeypatch.chdir(tmp_path)
+    decoder = decodeInChunks(coverageLog(), chunkSize)
+
+    assert decoder.files == list(GCDA)
+    for name, contents in GCDA.items():
+        assert (tmp_path / name).read_bytes() == contents
+    assert (tmp_path / "clean.txt").read_bytes() == CLEAN_OUTPUT
+
+
+def test_outputWithoutCoverageIsKeptWhole(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log = b"line 1\nline 2\nunterminated"
+    decodeInChunks(log, 5)
+    assert (tmp_path / "clean.txt").read_bytes() == log
+
+
+def test_decodeFile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "log.txt").write_bytes(coverageLog())
+    files = CoverageDecoder.decodeFile("log.txt", "clean.txt", chunkSize=7)
+    assert files == list(GCDA)
+    assert (tmp_path / "second.gcda").read_bytes() == GCDA["second.gcda"]
+    assert os.path.getsize(tmp_path / "clean.txt") == len(CLEAN_OUTPUT)
@@ -0,0 +1,87 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import struct
+
+import pytest
+
+from libs.ElfFile import ElfError, ElfFile
+from tests.support.ElfWriter import SHF_ALLOC, SHF_EXECINSTR, SHF_WRITE, STT_FUNC, STT_OBJECT, writeElf
+
+TEXT = (".text", 0x00400000, bytes(range(64)), SHF_ALLOC | SHF_EXECINSTR)
+DATA = (".data", 0x20400000, b"\x01\x02\x03\x04", SHF_ALLOC | SHF_WRITE)
+SYMBOLS = [
+    ("Reset_Handler", 0x00400010, STT_FUNC),
+    ("counter", 0x20400000, STT_OBJECT),
+    ("_estack", 0x20460000, STT_OBJECT),
+]
+
+
+@pytest.fixture
+def elfPath(tmp_path):
+    path = str(tmp_path / "test.elf")
+    writeElf(path, [TEXT, DATA], SYMBOLS)
+    return path
+
+
+def test_readsSections(elfPath):
+    elf = ElfFile(elfPath)
+    sections = {section.name: section for section in elf.loadableSections()}
+    assert list(sections) == [".text", ".data"]
+    assert sections[".text"].address == sections[".text"].loadAddress == 0x00400000
+    assert bytes(elf.sectionData(sections[".text"])) == TEXT[2]
+    assert sections[".data"].isWritable()
+    assert not sections[".text"].isWritable()
+
+
+def test_readsSymbolsWithoutThumbBit(elfPath):
+    assert ElfFile(elfPath).symbols() == {
+        "Reset_Handler": 0x00400010,
+        "counter": 0x20400000,
+        "_estack": 0x20460000,
+    }
+
+
+def test_loadAddressComesFromSegment(elfPath):
+    with open(elfPath, "rb") as elf:
+        data = bytearray(elf.read())
+    # the second program header loads .data from flash
+    struct.pack_into("<I", data, 52 + 32 + 12, 0x00410000)
+
+    elf = ElfFile(elfPath, bytes(data))
+    section = elf.loadableSections()[1]
+    assert (section.address, section.loadAddress) == (0x20400000, 0x00410000)
+
+
+def test_digestChangesWithContents(elfPath):
+    with open(elfPath, "rb") as elf:
+        data = elf.read()
+    assert ElfFile(elfPath, data).digest() != ElfFile(elfPath, data[:-1] + b"\x01").digest()
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"MZ\x90\x00" * 16, b"\x7fELF\x03\x01" + bytes(58), b"\x7fELF\x01\x01" + bytes(10)]
+)
+def test_rejectsMalformedFiles(data):
+    with pytest.raises(ElfError):
+        ElfFile("broken.elf", data)
@@ -0,0 +1,130 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import time
+
+from libs.FarmScheduler import FarmScheduler
+
+
+class FakeRunner:
+    """
+    Runner of a simulated board: `ok` boards finish every run, `broken` ones end
+    every run with an error, the worker of a `dead` board exits during a run,
+    the one of a `flaky` board right after sending the result of its first run,
+    and `stuck` boards never finish a run.
+    Binaries named `invalid*` are rejected like by the binary validation.
+    """
+
+    def __init__(self, configPath):
+        self.kind = os.path.basename(configPath)
+        self.runs = 0
+
+    def setLogPaths(self, consoleLog, uart4Log):
+        pass
+
+    def runBinary(self, binaryPath):
+        self.runs += 1
+        result = {"binary": binaryPath, "status": "finished", "duration": 0}
+        if os.path.basename(binaryPath).startswith("invalid"):
+            result.update(status="error", invalidBinary=True)
+        elif self.kind == "broken":
+            result["status"] = "error"
+        elif self.kind == "dead" or (self.kind == "flaky" and self.runs > 1):
+            os._exit(3)
+        elif self.kind == "stuck":
+            time.sleep(60)
+        return result
+
+    def shutdown(self):
+        pass
+
+
+def runFarm(tmp_path, kinds, binaries, **kwargs):
+    farm = FarmScheduler(kinds, FakeRunner, str(tmp_path), **kwargs)
+    return farm, farm.run(binaries)
+
+
+def test_everyBinaryRunsOnce(tmp_path):
+    farm, results = runFarm(tmp_path, ["ok", "ok"], ["a.elf", "b.elf", "c.elf"])
+    assert [result["binary"] for result in results] == ["a.elf", "b.elf", "c.elf"]
+    assert all(result["status"] == "finished" for result in results)
+    assert all(result["attempts"] == 1 for result in results)
+    assert not farm.failed() and not farm.quarantined
+
+
+def test_failedRunIsRetriedOnAnotherBoard(tmp_path):
+    farm, results = runFarm(tmp_path, ["broken", "ok"], ["a.elf"])
+    assert results[0]["status"] == "finished"
+    assert results[0]["board"] == "ok"
+    assert results[0]["attempts"] == 2
+
+
+def test_boardFailingInARowIsQuarantined(tmp_path, capsys):
+    farm, results = runFarm(
+        tmp_path, ["broken", "ok"], ["a.elf", "b.elf", "c.elf", "d.elf"]
+    )
+    assert farm.quarantined == ["broken"]
+    assert all(result["status"] == "finished" for result in results)
+    assert "Board 0 quarantined after 2 failures." in capsys.readouterr().out
+
+
+def test_invalidBinaryIsNeitherRetriedNorCounted(tmp_path):
+    farm, results = runFarm(
+        tmp_path, ["ok"], ["invalid1.elf", "invalid2.elf", "a.elf"], quarantineAfter=1
+    )
+    assert [result["attempts"] for result in results] == [1, 1, 1]
+    assert results[2]["status"] == "finished"
+    assert not farm.quarantined
+    assert len(farm.failed()) == 2
+
+
+def test_deadWorkerQuarantinesItsBoardOnce(tmp_path, capsys):
+    farm, results = runFarm(tmp_path, ["dead", "ok"], ["a.elf", "b.elf"])
+    assert farm.quarantined == ["dead"]
+    assert all(result["status"] == "finished" for result in results)
+    output = capsys.readouterr().out
+    assert "Board 0 quarantined as its worker exited." in output
+    assert "failures" not in output
+
+
+def test_runsWithoutHealthyBoardsAreReported(tmp_path):
+    farm, results = runFarm(tmp_path, ["broken"], ["a.elf", "b.elf", "c.elf"])
+    assert farm.quarantined == ["broken"]
+    assert [result["status"] for result in results] == ["error"] * 3
+    assert results[2]["message"] == "No healthy board left to run the binary."
+
+
+def test_workerExitFailsOnlyItsRunningJob(tmp_path):
+    farm, results = runFarm(tmp_path, ["flaky"], ["a.elf", "b.elf"], maxRetries=0)
+    assert [result["status"] for result in results] == ["finished", "error"]
+    assert results[1]["message"] == "Board worker exited unexpectedly."
+    assert farm.quarantined == ["flaky"]
+
+
+def test_stuckBoardIsQuarantined(tmp_path, capsys):
+    start = time.monotonic()
+    farm, results = runFarm(tmp_path, ["stuck", "ok"], ["a.elf", "b.elf"], jobTimeout=0.5)
+    assert time.monotonic() - start < 10
+    assert farm.quarantined == ["stuck"]
+    assert all(result["status"] == "finished" for result in results)
+    assert "Board 0 quarantined as its run did not finish within 0.5 s." in capsys.readouterr().out
@@ -0,0 +1,108 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import struct
+
+import pytest
+
+from libs.ElfFile import ElfFile
+from libs.FlashCache import FlashCache
+from tests.support.ElfWriter import SHF_ALLOC, SHF_EXECINSTR, SHF_WRITE, writeElf
+
+TEXT = (".text", 0x00400000, bytes(range(64)), SHF_ALLOC | SHF_EXECINSTR)
+RODATA = (".rodata", 0x00400040, b"constant", SHF_ALLOC)
+DATA = (".data", 0x20400000, b"\x01\x02\x03\x04", SHF_ALLOC | SHF_WRITE)
+
+
+def writeImage(path, sections, dataLoadAddress=None):
+    writeElf(path, sections, [])
+    if dataLoadAddress is not None:
+        with open(path, "r+b") as elf:
+            # physical address of the last program header, as the linker sets it
+            # for .data copied from flash by the startup code
+            elf.seek(52 + 32 * (len(sections) - 1) + 12)
+            elf.write(struct.pack("<I", dataLoadAddress))
+    return ElfFile(path)
+
+
+def names(sections):
+    return [section.name for section in sections]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FlashCache(str(tmp_path / "cache"), "localhost:3333")
+
+
+def test_everySectionChangedWithoutRecord(tmp_path, cache):
+    elf = writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA, DATA])
+    assert names(cache.changedSections(elf)) == [".text", ".rodata", ".data"]
+
+
+def test_onlyWritableInPlaceSectionsAreReloaded(tmp_path, cache):
+    elf = writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA, DATA])
+    cache.store(elf)
+    assert names(cache.changedSections(elf)) == [".data"]
+
+
+def test_writableSectionLoadedFromFlashIsCompared(tmp_path, cache):
+    elf = writeImage(str(tmp_path / "a.elf"), [TEXT, DATA], dataLoadAddress=0x00410000)
+    cache.store(elf)
+    assert cache.changedSections(elf) == []
+
+
+def test_changedContentsAreReported(tmp_path, cache):
+    cache.store(writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA, DATA]))
+    modified = (".rodata", RODATA[1], b"CONSTANT", RODATA[3])
+    elf = writeImage(str(tmp_path / "b.elf"), [TEXT, modified, DATA])
+    assert names(cache.changedSections(elf)) == [".rodata", ".data"]
+
+
+def test_movedOrResizedSectionsAreReported(tmp_path, cache):
+    cache.store(writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA]))
+    moved = (".rodata", RODATA[1] + 0x40, RODATA[2], RODATA[3])
+    grown = (".text", TEXT[1], TEXT[2] + b"\0" * 4, TEXT[3])
+    movedElf = writeImage(str(tmp_path / "b.elf"), [TEXT, moved])
+    grownElf = writeImage(str(tmp_path / "c.elf"), [grown, RODATA])
+    assert names(cache.changedSections(movedElf)) == [".rodata"]
+    assert names(cache.changedSections(grownElf)) == [".text"]
+
+
+def test_recordIsKeptPerTarget(tmp_path, cache):
+    elf = writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA])
+    cache.store(elf)
+    other = FlashCache(str(tmp_path / "cache"), "otherhost:3333")
+    assert names(other.changedSections(elf)) == [".text", ".rodata"]
+
+
+def test_invalidatedOrBrokenRecordReloadsEverything(tmp_path, cache):
+    elf = writeImage(str(tmp_path / "a.elf"), [TEXT, RODATA])
+    cache.store(elf)
+    cache.invalidate()
+    assert names(cache.changedSections(elf)) == [".text", ".rodata"]
+
+    cache.store(elf)
+    with open(cache.path, "w") as record:
+        record.write("{not json")
+    assert names(cache.changedSections(elf)) == [".text", ".rodata"]
+    cache.invalidate()
+    cache.invalidate()
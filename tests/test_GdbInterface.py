@@ -0,0 +1,351 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import re
+import signal
+from types import SimpleNamespace
+
+import pytest
+from pygdbmi.constants import GdbTimeoutError
+
+from libs.GdbInterface import GdbInterface, GdbRuntimeError
+
+
+class FakeGdbController:
+    """
+    GdbController stand-in answering the written MI commands with result
+    records produced by `respond(command)`, returned in reverse order and mixed
+    with console output and results of other tokens. A pipe stands for GDB's
+    stdout, so that the interface waits for the output like for real GDB.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.lines = []
+        self.pending = []
+        self.signals = []
+        self.exited = False
+        self.readFd, self.writeFd = os.pipe()
+        self.gdb_process = SimpleNamespace(stdout=self.readFd, send_signal=self.sendSignal)
+
+    def sendSignal(self, signum):
+        self.signals.append(signum)
+        self.pending.append(
+            {"type": "notify", "message": "stopped", "payload": {"reason": "signal-received"}}
+        )
+        os.write(self.writeFd, b"x")
+
+    def write(self, lines, read_response=True):
+        if isinstance(lines, str):
+            lines = [lines]
+        self.lines += lines
+        records = [
+            {"type": "console", "message": None, "payload": "noise\n", "token": None}
+        ]
+        for line in lines:
+            token, command = re.match(r"(\d*)(.*)", line).groups()
+            result = self.respond(command)
+            if result is None:
+                continue
+            message, payload = result
+            records.append(
+                {
+                    "type": "result",
+                    "message": message,
+                    "payload": payload,
+                    "token": int(token) if token else None,
+                }
+            )
+            # a stale result of an earlier token must not be taken for this one
+            if token:
+                records.append(
+                    {"type": "result", "message": "error", "payload": {"msg": "stale"}, "token": 0}
+                )
+        self.pending += reversed(records)
+        os.write(self.writeFd, b"x")
+
+    def get_gdb_response(self, timeout_sec=0, raise_error_on_timeout=False):
+        os.read(self.readFd, 1024)
+        response, self.pending = self.pending, []
+        return response
+
+    def exit(self):
+        self.exited = True
+        self.close()
+
+    def close(self):
+        os.close(self.readFd)
+        os.close(self.writeFd)
+
+
+def evaluate(command):
+    value = command.split()[-1]
+    if value == "bad":
+        return "error", {"msg": "No symbol \"bad\" in current context."}
+    return "done", {"value": value}
+
+
+@pytest.fixture
+def gdb():
+    gdb = GdbInterface("localhost:3333")
+    yield gdb
+    if gdb.gdbmi is not None:
+        gdb.gdbmi.close()
+
+
+def test_resultsAreMatchedByToken(gdb):
+    gdb.gdbmi = FakeGdbController(evaluate)
+    commands = ["-data-evaluate-expression " + str(value) for value in (1, 2, 3)]
+    results = gdb.execBatch(commands)
+
+    assert [result["payload"]["value"] for result in results] == ["1", "2", "3"]
+    assert gdb.gdbmi.lines == [
+        str(token) + command for token, command in enumerate(commands, 1)
+    ]
+
+
+def test_tokensKeepGrowingAcrossBatches(gdb):
+    gdb.gdbmi = FakeGdbController(evaluate)
+    gdb.execBatch(["-data-evaluate-expression 1"])
+    results = gdb.execBatch(["-data-evaluate-expression 2"])
+
+    assert results[0]["token"] == 2
+    assert results[0]["payload"]["value"] == "2"
+
+
+def test_everyErrorIsReported(gdb):
+    gdb.gdbmi = FakeGdbController(evaluate)
+    commands = ["-data-evaluate-expression " + value for value in ("bad", "1", "bad")]
+    with pytest.raises(GdbRuntimeError) as error:
+        gdb.execBatch(commands)
+
+    assert str(error.value).splitlines() == [
+        commands[0] + ': No symbol "bad" in current context.',
+        commands[2] + ': No symbol "bad" in current context.',
+    ]
+
+
+def test_errorsCanBeReturned(gdb):
+    gdb.gdbmi = FakeGdbController(evaluate)
+    results = gdb.execBatch(
+        ["-data-evaluate-expression bad", "-data-evaluate-expression 1"], raiseOnError=False
+    )
+
+    assert [result["message"] for result in results] == ["error", "done"]
+
+
+def test_missingResultsTimeOut(gdb):
+    gdb.gdbmi = FakeGdbController(
+        lambda command: None if command.endswith("2") else evaluate(command)
+    )
+    with pytest.raises(GdbTimeoutError, match="'-data-evaluate-expression 2'"):
+        gdb.execBatch(
+            ["-data-evaluate-expression 1", "-data-evaluate-expression 2"], timeout=0.2
+        )
+
+
+
+def test_commandReturnsOutputUntilItsResult(gdb):
+    gdb.gdbmi = FakeGdbController(evaluate)
+    response = gdb.execCmd("-data-evaluate-expression 1")
+
+    assert [entry["payload"] for entry in response if entry["message"] == "done"] == [
+        {"value": "1"}
+    ]
+
+def test_stopInterruptsRunningTarget(gdb):
+    gdbmi = gdb.gdbmi = FakeGdbController(evaluate)
+    gdb.running = True
+    gdb.stop()
+
+    assert gdbmi.signals == [signal.SIGINT]
+    assert gdb.lastStop == {"reason": "signal-received"}
+    assert not gdb.running
+
+
+def test_shutdownExitsGdbWhichFailedToConnect(gdb):
+    gdbmi = gdb.gdbmi = FakeGdbController(evaluate)
+    gdb.shutdown()
+
+    assert gdbmi.exited
+    assert gdb.gdbmi is None
+
+
+FRAMES = [
+    {"level": "0", "addr": "0x00400510", "func": "HardFault_Handler"},
+    {"level": "1", "addr": "0x00400200", "func": "main"},
+]
+
+
+def targetState(frames):
+    """
+    Returns a responder describing a halted target, with the call stack
+    listed as `frames`.
+    """
+
+    def respond(command):
+        if command == "-stack-list-frames":
+            return "done", {"stack": frames}
+        if command == "-data-list-register-values x":
+            return "done", {
+                "register-values": [
+                    {"number": "0", "value": "0x3"},
+                    {"number": "13", "value": "0x2045fff0"},
+                    {"number": "15", "value": "0x400510"},
+                    # registers without a name, or beyond the names, are skipped
+                    {"number": "16", "value": "0x0"},
+                    {"number": "40", "value": "0x0"},
+                ]
+            }
+        if command == "-data-list-register-names":
+            return "done", {"register-names": ["r0"] + [""] * 12 + ["sp", "lr", "pc", ""]}
+        if command == "-data-read-memory-bytes 0xe000ed28 24":
+            contents = (0x8200).to_bytes(4, "little") + (0x40000000).to_bytes(4, "little")
+            contents += bytes(16)
+            return "done", {"memory": [{"begin": "0xe000ed28", "contents": contents.hex()}]}
+        if command == "-data-read-memory-bytes $sp 8":
+            return "done", {
+                "memory": [
+                    {"begin": "0x2045fff0", "contents": "01020304"},
+                    {"begin": "0x2045fff4", "contents": "05060708"},
+                ]
+            }
+        return "error", {"msg": "unexpected command " + command}
+
+    return respond
+
+
+@pytest.mark.parametrize(
+    "frames", [FRAMES, [{"frame": frame} for frame in FRAMES]], ids=["frames", "frameTuples"]
+)
+def test_snapshotOfHaltedTarget(gdb, frames):
+    gdb.gdbmi = FakeGdbController(targetState(frames))
+    gdb.lastStop = {"reason": "breakpoint-hit"}
+    snapshot = gdb.snapshot(stackSize=8)
+
+    assert snapshot["stopReason"] == {"reason": "breakpoint-hit"}
+    assert snapshot["frames"] == FRAMES
+    assert snapshot["registers"] == {"r0": "0x3", "sp": "0x2045fff0", "pc": "0x400510"}
+    assert snapshot["faultRegisters"] == {
+        "CFSR": "0x00008200",
+        "HFSR": "0x40000000",
+        "DFSR": "0x00000000",
+        "MMFAR": "0x00000000",
+        "BFAR": "0x00000000",
+        "AFSR": "0x00000000",
+    }
+    assert snapshot["stack"] == {"address": "0x2045fff0", "contents": "0102030405060708"}
+
+
+def test_registerNamesAreListedOnce(gdb):
+    gdb.gdbmi = FakeGdbController(targetState(FRAMES))
+    gdb.snapshot(stackSize=8)
+    gdb.snapshot(stackSize=8)
+
+    assert [line for line in gdb.gdbmi.lines if line.endswith("-data-list-register-names")] == [
+        "5-data-list-register-names"
+    ]
+
+
+def test_unreadablePartsOfSnapshotAreReported(gdb):
+    def respond(command):
+        if command.startswith("-data-read-memory-bytes"):
+            return "error", {"msg": "Cannot access memory at address 0xe000ed28"}
+        return targetState(FRAMES)(command)
+
+    gdb.gdbmi = FakeGdbController(respond)
+    snapshot = gdb.snapshot(stackSize=8)
+
+    assert snapshot["frames"] == FRAMES
+    assert snapshot["faultRegisters"] == {"error": "Cannot access memory at address 0xe000ed28"}
+    assert snapshot["stack"] == {"error": "Cannot access memory at address 0xe000ed28"}
+
+
+def pattern(address, count):
+    return bytes((address + i) & 0xFF for i in range(count))
+
+
+def targetMemory(command):
+    match = re.match(r"-data-read-memory-bytes (0x[0-9a-f]+) (\d+)$", command)
+    address, count = int(match.group(1), 16), int(match.group(2))
+    return "done", {"memory": [{"begin": hex(address), "contents": pattern(address, count).hex()}]}
+
+
+def memoryReads(gdbmi):
+    return [line.split(" ", 1)[1] for line in gdbmi.lines]
+
+
+def test_memoryIsReadInPacketSizedChunks(gdb):
+    gdb.gdbmi = FakeGdbController(targetMemory)
+    data = gdb.readMemory(0x20400000, 5000)
+
+    assert bytes(data) == pattern(0x20400000, 5000)
+    # hex-encoded contents of 2048 bytes fill the default 4096 byte packet
+    assert memoryReads(gdb.gdbmi) == ["0x20400000 2048", "0x20400800 2048", "0x20401000 904"]
+
+
+def test_memoryIsDumpedInGivenChunks(gdb, tmp_path):
+    gdb.gdbmi = FakeGdbController(targetMemory)
+    gdb.dumpMemory(0x20400000, 1000, tmp_path / "dump.bin", chunkSize=256)
+
+    assert (tmp_path / "dump.bin").read_bytes() == pattern(0x20400000, 1000)
+    assert memoryReads(gdb.gdbmi) == [
+        "0x20400000 256",
+        "0x20400100 256",
+        "0x20400200 256",
+        "0x20400300 232",
+    ]
+
+
+def memoryResponse(*blocks):
+    return [
+        {"type": "console", "message": None, "payload": "noise\n"},
+        {"type": "result", "message": "done", "payload": {"memory": list(blocks)}},
+    ]
+
+
+def test_memoryBlocksAreJoinedInAddressOrder(gdb):
+    response = memoryResponse(
+        {"begin": "0x20400004", "contents": "05060708"},
+        {"begin": "0x20400000", "contents": "01020304"},
+    )
+    assert gdb._parseMemoryContents(response, 0x20400000, 8) == bytes(range(1, 9))
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        memoryResponse({"begin": "0x20400000", "contents": "01020304"}),
+        memoryResponse({"begin": "0x20400004", "contents": "0102030405060708"}),
+    ],
+    ids=["short", "misplaced"],
+)
+def test_partialMemoryReadIsRejected(gdb, response):
+    with pytest.raises(GdbRuntimeError, match="Unable to read 8 bytes at 0x20400000"):
+        gdb._parseMemoryContents(response, 0x20400000, 8)
+
+
+def test_missingMemoryContentsAreRejected(gdb):
+    response = [{"type": "result", "message": "error", "payload": {"msg": "Cannot access memory"}}]
+    with pytest.raises(GdbRuntimeError, match="No memory contents received for 0x20400000"):
+        gdb._parseMemoryContents(response, 0x20400000, 8)
@@ -0,0 +1,139 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import queue
+
+import pytest
+
+from libs.ConnectionConfig import ConnectionConfig
+from libs.GdbServerInvoker import GdbServerInvoker
+from libs.SshConnectionPool import sshConnectionPool
+
+
+class FakeChannel:
+    """
+    Channel of the remote command, returning the queued packets from recv(),
+    and b"" once it is closed.
+    """
+
+    def __init__(self, packets):
+        self.packets = queue.Queue()
+        for packet in packets:
+            self.packets.put(packet)
+
+    def recv(self, size):
+        packet = self.packets.get()
+        assert len(packet) <= size
+        return packet
+
+    def recv_exit_status(self):
+        return 0
+
+    def close(self):
+        self.packets.put(b"")
+
+
+class FakeFile:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeSshClient:
+    def __init__(self, packets):
+        self.packets = packets
+        self.commands = []
+        self.closed = False
+
+    def exec_command(self, command, get_pty=False):
+        self.commands.append(command)
+        if command.startswith("kill"):
+            return None, FakeFile(FakeChannel([])), None
+        channel = FakeChannel(self.packets)
+        return None, FakeFile(channel), FakeFile(channel)
+
+    def get_transport(self):
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def remoteServer(monkeypatch):
+    def create(packets):
+        client = FakeSshClient(packets)
+        monkeypatch.setattr(sshConnectionPool, "clientFactory", lambda config: client)
+        config = ConnectionConfig("gdbhost:22", "user", "password")
+        return client, GdbServerInvoker("openocd", "-f board.cfg", config)
+
+    return create
+
+
+def test_outputReceivedWithThePidIsKept(remoteServer):
+    client, server = remoteServer(
+        [b"42", b"31\r\nOpen On-Chip Debugger\r\nInfo : Listening on port 6666 ", b"for tcl"]
+        + [b" connections\r\nInfo : Listening on port 3333 for gdb connections\r\n"]
+    )
+    server.open()
+    server.waitUntilReady(r"Listening on port \d+ for gdb connections", timeout=5)
+    assert server.pid == 4231
+    assert server.output.startswith("Open On-Chip Debugger\r\n")
+
+    server.close()
+    assert client.commands[-1] == "kill 4231"
+    assert client.closed
+
+
+def test_shellExitingBeforeThePidIsReported(remoteServer):
+    _, server = remoteServer([b"bash: openocd: command not found", b""])
+    with pytest.raises(RuntimeError, match="before reporting the PID"):
+        server.open()
+    assert server.handle is None
+    assert server.connectionConfig not in sshConnectionPool.refCounts
+
+
+def test_readinessWaitsForTheGdbBanner(remoteServer):
+    _, server = remoteServer(
+        [b"4231\r\nInfo : Listening on port 6666 for tcl connections\r\n"]
+        + [b"Info : Listening on port 3333 for gdb connections\r\n"]
+    )
+    server.open()
+    server.waitUntilReady(r"Listening on port \d+ for gdb connections", timeout=5)
+    assert server.output.endswith("3333 for gdb connections\r\n")
+    server.close()
+
+
+def test_silentServerIsReportedAfterTheTimeout(remoteServer):
+    _, server = remoteServer([b"4231\r\nInfo : Listening on port 6666 for tcl connections\r\n"])
+    server.open()
+    with pytest.raises(RuntimeError, match="did not report"):
+        server.waitUntilReady(r"Listening on port \d+ for gdb connections", timeout=0.2)
+    server.close()
+
+
+def test_serverExitingBeforeItIsReady(remoteServer):
+    _, server = remoteServer([b"4231\r\nError: unable to find a matching CMSIS-DAP device\r\n", b""])
+    server.open()
+    server.reader.join(timeout=5)
+    with pytest.raises(RuntimeError, match="exited before it became ready"):
+        server.waitUntilReady(r"Listening on port \d+ for gdb connections", timeout=0.2)
+    server.close()
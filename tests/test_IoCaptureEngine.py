@@ -0,0 +1,149 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import time
+
+import pytest
+
+from libs.IoCaptureEngine import IoCaptureEngine
+from tests.support.SocketIoHandler import SocketIoHandler
+
+
+class Sink:
+    def __init__(self, failOnWrite=False, failOnClose=False):
+        self.data = bytearray()
+        self.failOnWrite = failOnWrite
+        self.failOnClose = failOnClose
+        self.closedAt = None
+
+    def write(self, data):
+        if self.failOnWrite:
+            raise OSError("disk full")
+        self.data += data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closedAt = time.monotonic()
+        if self.failOnClose:
+            raise OSError("close failed")
+
+
+@pytest.fixture
+def handlers():
+    created = []
+
+    def create():
+        handler = SocketIoHandler()
+        created.append(handler)
+        return handler
+
+    yield create
+    for handler in created:
+        handler.close()
+
+
+def test_outputIsWrittenToAllSinks(handlers):
+    io = handlers()
+    sinks = (Sink(), Sink())
+    engine = IoCaptureEngine()
+    engine.add(io, *sinks, name="console")
+    engine.start()
+    io.peer.sendall(b"first line\n")
+    io.peer.sendall(b"second line\n")
+
+    assert engine.finish(quietTime=0.2, timeout=5) == {"console": 23}
+    for sink in sinks:
+        assert bytes(sink.data) == b"first line\nsecond line\n"
+        assert sink.closedAt is not None
+
+
+def test_quietChannelFinishesBeforeBusyOne(handlers):
+    quiet, busy = handlers(), handlers()
+    quietSink, busySink = Sink(), Sink()
+    engine = IoCaptureEngine()
+    engine.add(quiet, quietSink, name="quiet")
+    engine.add(busy, busySink, name="busy")
+    engine.start()
+    quiet.peer.sendall(b"done\n")
+
+    def keepSending():
+        for _ in range(20):
+            busy.peer.sendall(b"still running\n")
+            time.sleep(0.05)
+
+    sender = threading.Thread(target=keepSending)
+    sender.start()
+    counts = engine.finish(quietTime=0.2, timeout=5)
+    sender.join()
+
+    assert counts == {"quiet": 5, "busy": 20 * 14}
+    assert busySink.closedAt - quietSink.closedAt > 0.5
+
+
+def test_closedConnectionFinishesChannel(handlers):
+    io = handlers()
+    sink = Sink()
+    engine = IoCaptureEngine()
+    engine.add(io, sink)
+    engine.start()
+    io.peer.sendall(b"last words")
+    io.peer.close()
+
+    start = time.monotonic()
+    while sink.closedAt is None and time.monotonic() - start < 5:
+        time.sleep(0.01)
+    assert sink.closedAt is not None
+    assert engine.finish(quietTime=10, timeout=10) == {"0": 10}
+    assert time.monotonic() - start < 5
+
+
+def test_failingSinkIsDetached(handlers):
+    io = handlers()
+    failing, healthy = Sink(failOnWrite=True), Sink()
+    engine = IoCaptureEngine()
+    engine.add(io, failing, healthy, name="console")
+    engine.start()
+    io.peer.sendall(b"abc")
+    time.sleep(0.1)
+    io.peer.sendall(b"def")
+
+    assert engine.finish(quietTime=0.2, timeout=5) == {"console": 6}
+    assert bytes(healthy.data) == b"abcdef"
+    assert [(name, sink) for name, sink, _ in engine.sinkErrors] == [("console", failing)]
+    assert failing.closedAt is not None
+
+
+def test_failingCloseIsReported(handlers):
+    io = handlers()
+    sink = Sink(failOnClose=True)
+    engine = IoCaptureEngine()
+    engine.add(io, sink, name="console")
+    engine.start()
+    io.peer.sendall(b"abc")
+
+    assert engine.finish(quietTime=0.2, timeout=5) == {"console": 3}
+    assert [(name, str(error)) for name, _, error in engine.sinkErrors] == [
+        ("console", "close failed")
+    ]
@@ -0,0 +1,81 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import socket
+import threading
+import time
+
+import pytest
+
+from libs.IoHandler import IoHandler
+from tests.support import freePort
+
+
+class TcpIoHandler(IoHandler):
+    """
+    Minimal handler, only connecting to a TCP port.
+    """
+
+    def getOptimalReadSize(self):
+        return 4096
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def receiveInto(self, buffer, timeout=1):
+        return 0
+
+    def reset(self):
+        pass
+
+    def fileno(self):
+        return None
+
+
+def test_connectionIsRetriedUntilThePeerListens():
+    port = freePort()
+    listening = []
+
+    def listenLater():
+        time.sleep(0.3)
+        listening.append(socket.create_server(("127.0.0.1", port)))
+
+    thread = threading.Thread(target=listenLater)
+    thread.start()
+    try:
+        connection = TcpIoHandler()._connectTcp("127.0.0.1", port, timeout=5)
+        with connection:
+            assert connection.gettimeout() is None
+    finally:
+        thread.join()
+        for server in listening:
+            server.close()
+
+
+def test_connectionFailsOnceTheTimeoutPasses():
+    start = time.monotonic()
+    with pytest.raises(OSError):
+        TcpIoHandler()._connectTcp("127.0.0.1", freePort(), timeout=0.3)
+    assert 0.3 <= time.monotonic() - start < 2
@@ -0,0 +1,98 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import os
+import pty
+
+import pytest
+
+from libs.LocalSerialIoHandler import LocalSerialIoHandler
+from libs.UartIoHandler import Parity
+
+
+@pytest.fixture
+def ptyPair():
+    master, slave = pty.openpty()
+    # the handler opens the device by its name, the descriptor only keeps it alive
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+@pytest.fixture
+def handler(ptyPair):
+    _, device = ptyPair
+    handler = LocalSerialIoHandler(device, 115200, Parity.PARITY_EVEN)
+    handler.open()
+    yield handler
+    handler.close()
+
+
+def test_receivesDeviceOutput(ptyPair, handler):
+    master, _ = ptyPair
+    os.write(master, b"Hello from the target\n")
+    received = b""
+    while len(received) < 22:
+        data = handler.receive(64, timeout=1)
+        assert data
+        received += data
+    assert received == b"Hello from the target\n"
+
+
+def test_receiveIntoFillsBuffer(ptyPair, handler):
+    master, _ = ptyPair
+    os.write(master, b"abc")
+    buffer = bytearray(16)
+    assert handler.receiveInto(memoryview(buffer), timeout=1) == 3
+    assert buffer[:3] == b"abc"
+
+
+def test_receiveTimesOutWithoutData(handler):
+    assert handler.receive(64, timeout=0.05) == b""
+
+
+def test_sendWritesToDevice(ptyPair, handler):
+    master, _ = ptyPair
+    handler.send(b"ping")
+    assert os.read(master, 64) == b"ping"
+
+
+def test_resetDropsPendingInput(ptyPair, handler):
+    master, _ = ptyPair
+    os.write(master, b"stale")
+    handler.reset()
+    assert handler.receive(64, timeout=0.05) == b""
+
+
+def test_openTwiceAndClosedUseFail(ptyPair, handler):
+    with pytest.raises(RuntimeError):
+        handler.open()
+    handler.close()
+    assert handler.fileno() is None
+    with pytest.raises(RuntimeError):
+        handler.send(b"x")
+
+
+def test_invalidParityIsRejected(ptyPair):
+    with pytest.raises(RuntimeError):
+        LocalSerialIoHandler(ptyPair[1], 115200, "PARITY_MARK")
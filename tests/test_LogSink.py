@@ -0,0 +1,93 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import importlib.util
+import os
+
+import pytest
+
+from libs.LogSink import LogSink
+
+
+def output(size):
+    # compressible, but not trivially, like a test log
+    lines = (b"[%08d] test step %d passed\r\n" % (n, n % 7) for n in range(size // 16))
+    return b"".join(lines)[:size]
+
+
+@pytest.mark.parametrize("size", [0, 1, 1000, 3 * LogSink.BATCH_SIZE + 17])
+def test_gzipRoundTrip(tmp_path, size):
+    data = output(size)
+    sink = LogSink(str(tmp_path / "console.txt"), "gzip")
+    for offset in range(0, len(data), 4096):
+        sink.write(memoryview(data)[offset : offset + 4096])
+    sink.flush()
+    sink.close()
+
+    assert sink.path == str(tmp_path / "console.txt.gz")
+    with gzip.open(sink.path, "rb") as log:
+        assert log.read() == data
+
+
+def test_flushedGzipOutputIsReadableBeforeClose(tmp_path):
+    sink = LogSink(str(tmp_path / "console.txt"), "gzip")
+    sink.write(b"first part\n")
+    sink.flush()
+    sink.write(b"second part\n")
+    sink.close()
+
+    with gzip.open(sink.path, "rb") as log:
+        assert log.read() == b"first part\nsecond part\n"
+
+
+def test_uncompressedLogIsWrittenAsIs(tmp_path):
+    data = output(LogSink.BATCH_SIZE + 5)
+    sink = LogSink(str(tmp_path / "console.txt"), "none")
+    sink.write(data)
+    sink.close()
+
+    assert sink.path == str(tmp_path / "console.txt")
+    with open(sink.path, "rb") as log:
+        assert log.read() == data
+
+
+def test_compressionIsResolved():
+    assert LogSink.resolveCompression(None) is None
+    assert LogSink.resolveCompression("None") is None
+    assert LogSink.resolveCompression("GZIP") == "gzip"
+    expected = "zstd" if importlib.util.find_spec("zstandard") else "gzip"
+    assert LogSink.resolveCompression("zstd") == expected
+    assert LogSink.pathFor("log.txt", "zstd") == "log.txt" + LogSink.EXTENSIONS[expected]
+    with pytest.raises(RuntimeError):
+        LogSink.resolveCompression("bzip2")
+
+
+def test_compressionLevelIsUsed(tmp_path):
+    data = output(256 * 1024)
+    sizes = []
+    for level in (1, 9):
+        sink = LogSink(str(tmp_path / ("level" + str(level))), "gzip", level)
+        sink.write(data)
+        sink.close()
+        sizes.append(os.path.getsize(sink.path))
+    assert sizes[1] < sizes[0]
@@ -0,0 +1,93 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import time
+
+from libs.OutputRingBuffer import OutputRingBuffer
+
+
+def appendLater(buffer, *texts, delay=0.05):
+    def append():
+        for text in texts:
+            time.sleep(delay)
+            buffer.append(text)
+
+    thread = threading.Thread(target=append)
+    thread.start()
+    return thread
+
+
+def test_onlyTheLastCharactersAreKept():
+    buffer = OutputRingBuffer(capacity=8)
+    buffer.append("0123456789")
+    buffer.append("abc")
+    assert buffer.getvalue() == "56789abc"
+    assert buffer.end() == 13
+
+
+def test_waitsForOutputWrittenLater():
+    buffer = OutputRingBuffer()
+    thread = appendLater(
+        buffer, "Open On-Chip Debugger\n", "Listening on port 3333 for gdb connections\n"
+    )
+    match = buffer.waitFor(r"Listening on port (\d+) for gdb", timeout=5)
+    thread.join()
+    assert match.group(1) == "3333"
+
+
+def test_matchIsKeptWhenTheTextIsTrimmedInTheSameAppend():
+    buffer = OutputRingBuffer(capacity=16)
+    thread = appendLater(buffer, "ready\n" + "x" * 100)
+    match = buffer.waitFor("ready", timeout=5)
+    thread.join()
+    assert match is not None
+    assert "ready" not in buffer.getvalue()
+
+
+def test_matchAcrossTrimmedOutputUsesOffsets():
+    buffer = OutputRingBuffer(capacity=16)
+    buffer.append("ready\n" + "x" * 100)
+    since = buffer.end()
+    thread = appendLater(buffer, "y" * 40, "ready again\n")
+    match = buffer.waitFor("ready", timeout=5, since=since)
+    thread.join()
+    assert match is not None
+    assert buffer.end() - since == 52
+
+
+def test_outputBeforeOffsetIsIgnored():
+    buffer = OutputRingBuffer()
+    buffer.append("error: old\n")
+    assert buffer.waitFor("error", timeout=0.1, since=buffer.end()) is None
+
+
+def test_timeoutAndCloseEndTheWait():
+    buffer = OutputRingBuffer()
+    start = time.monotonic()
+    assert buffer.waitFor("never", timeout=0.1) is None
+    assert time.monotonic() - start < 1
+
+    closer = threading.Timer(0.05, buffer.close)
+    closer.start()
+    assert buffer.waitFor("never") is None
+    closer.join()
@@ -0,0 +1,100 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import socket
+import threading
+import time
+
+import pytest
+
+from libs.RttIoHandler import RttIoHandler
+from tests.support import freePort
+
+
+class FakeGdb:
+    """
+    GdbInterface stand-in recording the monitor commands, which starts
+    the RTT server (a local TCP listener) when openocd would.
+    """
+
+    def __init__(self, port, output=b"", serverDelay=0):
+        self.port = port
+        self.output = output
+        self.serverDelay = serverDelay
+        self.commands = []
+        self.server = None
+        self.thread = None
+
+    def monitor(self, command):
+        self.commands.append(command)
+        if command.startswith("monitor rtt server start"):
+            self.thread = threading.Thread(target=self.__serve, daemon=True)
+            self.thread.start()
+
+    def __serve(self):
+        time.sleep(self.serverDelay)
+        self.server = socket.create_server(("127.0.0.1", self.port))
+        connection, _ = self.server.accept()
+        with connection:
+            connection.sendall(self.output)
+            connection.recv(1024)
+
+
+def receiveAll(handler, size):
+    received = b""
+    while len(received) < size:
+        data = handler.receive(size, timeout=1)
+        assert data
+        received += data
+    return received
+
+
+def test_configuresOpenocdAndReceivesChannel():
+    port = freePort()
+    gdb = FakeGdb(port, b"RTT output\n", serverDelay=0.2)
+    handler = RttIoHandler(gdb, "127.0.0.1", port, channel=1, searchSize="0x1000")
+    handler.open()
+    try:
+        assert gdb.commands == [
+            'monitor rtt setup 0x20400000 0x1000 "SEGGER RTT"',
+            "monitor rtt server start " + str(port) + " 1",
+        ]
+        handler.startTransfer()
+        assert gdb.commands[-2:] == ["monitor rtt stop", "monitor rtt start"]
+        assert receiveAll(handler, 11) == b"RTT output\n"
+        assert handler.fileno() is not None
+    finally:
+        handler.close()
+        gdb.server.close()
+    assert gdb.commands[-2:] == ["monitor rtt stop", "monitor rtt server stop " + str(port)]
+    assert handler.fileno() is None
+
+
+def test_serverIsStoppedWhenItDoesNotAccept():
+    port = freePort()
+    gdb = FakeGdb(port)
+    gdb.monitor = gdb.commands.append  # the server never starts
+    handler = RttIoHandler(gdb, "127.0.0.1", port, readyTimeout=0.2)
+    with pytest.raises(OSError):
+        handler.open()
+    assert gdb.commands[-1] == "monitor rtt server stop " + str(port)
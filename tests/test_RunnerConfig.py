@@ -0,0 +1,118 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import pytest
+
+from libs.RunnerConfig import RunnerConfig
+
+CONFIG = """
+[gdbServer]
+path = openocd
+args = -f board.cfg
+
+[gdb]
+address = %(BOARD_ADDRESS)s:3333
+path = gdb-multiarch
+verbose = True
+runTimeout = 100
+
+[ioConsole]
+address = %(BOARD_ADDRESS)s
+userName = pi
+password = pi
+baudrate = 115200
+port = 5005
+hardwareDevicePath = /dev/ttyACM0
+parity = PARITY_NONE
+verbose = True
+
+[ioUart4]
+type = rtt
+address = %(BOARD_ADDRESS)s
+port = 9090
+searchAddress = 0x20400000
+"""
+
+
+def writeConfig(tmp_path, text):
+    path = tmp_path / "board.cfg"
+    path.write_text(text)
+    return str(path)
+
+
+def test_validConfigurationIsAccepted(tmp_path):
+    config = RunnerConfig(writeConfig(tmp_path, CONFIG), {"BOARD_ADDRESS": "10.0.0.2"})
+    assert config.get("gdb", "address") == "10.0.0.2:3333"
+    assert config.getint("gdb", "runTimeout") == 100
+
+
+def test_resolvedValuesAreKept(tmp_path):
+    environment = {"BOARD_ADDRESS": "10.0.0.2"}
+    config = RunnerConfig(writeConfig(tmp_path, CONFIG), environment)
+    environment["BOARD_ADDRESS"] = "10.0.0.3"
+    assert config.get("ioConsole", "address") == "10.0.0.2"
+
+    config.set("ioConsole", "address", "10.0.0.4")
+    assert config.get("ioConsole", "address") == "10.0.0.4"
+
+
+def test_everyProblemIsReported(tmp_path):
+    text = (
+        CONFIG.replace("runTimeout = 100", "runTimeout = 0x10")
+        .replace("parity = PARITY_NONE", "parity = PARITY_MARK")
+        .replace("hardwareDevicePath = /dev/ttyACM0\n", "")
+        .replace("searchAddress = 0x20400000", "searchAddress = sram")
+    )
+    with pytest.raises(RuntimeError) as error:
+        RunnerConfig(writeConfig(tmp_path, text), {})
+    message = str(error.value)
+    assert "'runTimeout' in [gdb]" in message
+    assert "'parity' in [ioConsole]" in message
+    assert "missing option 'hardwareDevicePath' in [ioConsole]" in message
+    assert "'searchAddress' in [ioUart4]" in message
+    # the address comes from the missing environment variable
+    assert "BOARD_ADDRESS" in message.upper()
+
+
+def test_regionsAndPatternsAreChecked(tmp_path):
+    text = CONFIG.replace(
+        "runTimeout = 100",
+        "runTimeout = 100\nmemoryRegions = 0x00400000+0x200000, 0x20400000+sram",
+    ).replace("args = -f board.cfg", "args = -f board.cfg\nreadyPattern = Listening (on")
+    with pytest.raises(RuntimeError) as error:
+        RunnerConfig(writeConfig(tmp_path, text), {"BOARD_ADDRESS": "10.0.0.2"})
+    message = str(error.value)
+    assert "invalid 'memoryRegions' in [gdb]: invalid memory region 0x20400000+sram" in message
+    assert "invalid 'readyPattern' in [gdbServer]" in message
+
+
+def test_integersAreCheckedLikeTheyAreRead(tmp_path):
+    text = CONFIG.replace("port = 5005", "port = 0x138d")
+    with pytest.raises(RuntimeError, match="'port' in \\[ioConsole\\]"):
+        RunnerConfig(writeConfig(tmp_path, text), {"BOARD_ADDRESS": "10.0.0.2"})
+
+
+def test_missingSectionIsReported(tmp_path):
+    text = CONFIG[: CONFIG.index("[ioUart4]")]
+    with pytest.raises(RuntimeError, match="missing section \\[ioUart4\\]"):
+        RunnerConfig(writeConfig(tmp_path, text), {"BOARD_ADDRESS": "10.0.0.2"})
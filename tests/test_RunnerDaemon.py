@@ -0,0 +1,107 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextvars
+import io
+import socket
+import threading
+import time
+
+import pytest
+
+from libs.RunnerDaemon import RunnerClient, RunnerDaemon
+
+
+class FakeRunner:
+    """
+    Runner printing from its own thread, from a worker thread started with
+    a copy of its context (like the concurrent resets and cleanup steps)
+    and from an unrelated background thread (like the GDB server readers).
+    """
+
+    def __init__(self):
+        self.logPaths = None
+        self.shutdownCalled = False
+
+    def setLogPaths(self, consoleLog, uart4Log):
+        self.logPaths = (consoleLog, uart4Log)
+
+    def runBinary(self, binaryPath):
+        print("running", binaryPath)
+        worker = threading.Thread(
+            target=contextvars.copy_context().run, args=(print, "worker step")
+        )
+        background = threading.Thread(target=print, args=("gdb server output",))
+        for thread in (worker, background):
+            thread.start()
+            thread.join()
+        return {"binary": binaryPath, "status": "finished", "duration": 0}
+
+    def shutdown(self):
+        self.shutdownCalled = True
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr(RunnerDaemon, "REQUEST_TIMEOUT", 0.2)
+    socketPath = str(tmp_path / "runner.sock")
+    daemon = RunnerDaemon(FakeRunner(), socketPath)
+    thread = threading.Thread(target=daemon.serveForever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while daemon.server is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield daemon
+    RunnerClient(socketPath).shutdown()
+    thread.join(5)
+    assert daemon.runner.shutdownCalled
+
+
+def test_runOutputIsForwardedWithWorkerThreads(daemon, capsys):
+    output = io.StringIO()
+    result = RunnerClient(daemon.socketPath).run(
+        "test.elf", "console.txt", "uart4.txt", output
+    )
+
+    assert result["status"] == "finished"
+    assert daemon.runner.logPaths[0].endswith("console.txt")
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith("running ") and lines[0].endswith("test.elf")
+    assert lines[1:] == ["worker step"]
+    assert "gdb server output" in capsys.readouterr().out
+
+
+def test_silentClientDoesNotBlockOthers(daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect(daemon.socketPath)
+        result = RunnerClient(daemon.socketPath).run(
+            "test.elf", "console.txt", "uart4.txt", io.StringIO()
+        )
+        assert result["status"] == "finished"
+        assert b"No request received within" in silent.recv(4096)
+
+
+def test_malformedRequestsAreAnswered(daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(daemon.socketPath)
+        client.sendall(b'{"command": "run", "binary": "test.elf"}\n')
+        assert b"Run request lacks 'consoleLog'." in client.recv(4096)
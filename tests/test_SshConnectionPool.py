@@ -0,0 +1,128 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import paramiko
+import pytest
+
+from libs.ConnectionConfig import ConnectionConfig
+from libs.SshConnectionPool import SshConnectionPool
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+
+class FakeSSHClient:
+    """
+    paramiko.SSHClient stand-in, which connects unless `refused` is set.
+    """
+
+    refused = False
+    instances = []
+
+    def __init__(self):
+        self.transport = None
+        self.closed = False
+        self.instances.append(self)
+
+    def set_missing_host_key_policy(self, policy):
+        self.policy = policy
+
+    def connect(self, hostname, port, username, password):
+        if self.refused:
+            raise paramiko.SSHException("Connection refused")
+        self.connectedTo = (hostname, port, username, password)
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport = None
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(paramiko, "SSHClient", FakeSSHClient)
+    monkeypatch.setattr(FakeSSHClient, "instances", [])
+    return SshConnectionPool()
+
+
+CONFIG = ConnectionConfig("boardhost:2222", "user", "password")
+
+
+def test_usersShareOneConnection(pool):
+    first = pool.acquire(CONFIG)
+    second = pool.acquire(CONFIG)
+
+    assert first is second
+    assert FakeSSHClient.instances == [first]
+    assert first.connectedTo == ("boardhost", 2222, "user", "password")
+    assert isinstance(first.policy, paramiko.AutoAddPolicy)
+    assert pool.refCounts[CONFIG] == 2
+
+
+def test_configurationsGetTheirOwnConnections(pool):
+    other = ConnectionConfig("boardhost", "user", "password")
+    client = pool.acquire(CONFIG)
+
+    assert pool.acquire(other) is not client
+    assert pool.acquire(other).connectedTo[:2] == ("boardhost", 22)
+
+
+def test_connectionIsClosedWithItsLastUser(pool):
+    client = pool.acquire(CONFIG)
+    pool.acquire(CONFIG)
+
+    pool.release(CONFIG)
+    assert not client.closed
+    pool.release(CONFIG)
+    assert client.closed
+    assert CONFIG not in pool.clients and CONFIG not in pool.refCounts
+
+    # releasing once more does no harm
+    pool.release(CONFIG)
+
+
+def test_deadConnectionIsReplaced(pool):
+    client = pool.acquire(CONFIG)
+    client.transport.active = False
+    replacement = pool.acquire(CONFIG)
+
+    assert replacement is not client
+    assert client.closed
+    assert pool.refCounts[CONFIG] == 2
+
+
+def test_refusedConnectionIsClosed(pool, monkeypatch):
+    monkeypatch.setattr(FakeSSHClient, "refused", True)
+    with pytest.raises(paramiko.SSHException):
+        pool.acquire(CONFIG)
+
+    assert FakeSSHClient.instances[0].closed
+    assert CONFIG not in pool.clients and CONFIG not in pool.refCounts
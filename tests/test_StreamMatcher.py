@@ -0,0 +1,97 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import random
+import threading
+
+import pytest
+
+from libs.StreamMatcher import StreamMatcher
+
+
+def bruteForceMatch(data, patterns):
+    """
+    Returns the longest of the patterns ending earliest in `data`, or None.
+    """
+    for end in range(1, len(data) + 1):
+        found = [pattern for pattern in patterns if data[:end].endswith(pattern)]
+        if found:
+            return max(found, key=len)
+    return None
+
+
+def writeInChunks(matcher, data, randomGenerator):
+    position = 0
+    while position < len(data):
+        size = randomGenerator.randint(1, 16)
+        matcher.write(memoryview(data)[position : position + size])
+        position += size
+
+
+def test_matchesSplitAcrossWrites():
+    matcher = StreamMatcher({"TESTS-PASSED": "pass"})
+    for chunk in (b"noise TESTS", b"-PA", b"SSED\r\n"):
+        matcher.write(chunk)
+    assert matcher.verdict == "pass"
+    assert matcher.pattern == b"TESTS-PASSED"
+    assert matcher.event.is_set()
+
+
+def test_firstMatchWinsAndLaterOutputIsIgnored():
+    event = threading.Event()
+    matcher = StreamMatcher({"FAIL": "fail", "PASS": "pass"}, event)
+    matcher.write(b"..FAIL..PASS..")
+    assert matcher.verdict == "fail"
+    matcher.write(b"PASS")
+    assert matcher.verdict == "fail"
+    assert event.is_set()
+
+
+def test_noMatchLeavesEventClear():
+    matcher = StreamMatcher({"abc": "pass"})
+    matcher.write(b"ab")
+    matcher.write(b"xbc")
+    assert matcher.verdict is None
+    assert not matcher.event.is_set()
+
+
+def test_emptyPatternIsRejected():
+    with pytest.raises(ValueError):
+        StreamMatcher({"": "pass"})
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_agreesWithBruteForceOverRandomSplits(seed):
+    randomGenerator = random.Random(seed)
+    alphabet = b"abc"
+    patterns = {
+        bytes(randomGenerator.choice(alphabet) for _ in range(randomGenerator.randint(1, 5))): index
+        for index in range(randomGenerator.randint(1, 6))
+    }
+    for _ in range(20):
+        data = bytes(randomGenerator.choice(alphabet + b"x") for _ in range(60))
+        matcher = StreamMatcher(patterns)
+        writeInChunks(matcher, data, randomGenerator)
+        expected = bruteForceMatch(data, patterns)
+        assert matcher.pattern == expected
+        assert matcher.verdict == (None if expected is None else patterns[expected])
@@ -0,0 +1,121 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import json
+import threading
+
+import pytest
+
+from libs.Tracer import Tracer
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    yield tracer
+    tracer.close()
+
+
+def readChrome(path):
+    # the trace is left open-ended, as chrome://tracing accepts it
+    text = path.read_text()
+    assert text.startswith("[\n")
+    return json.loads(text.rstrip(",\n") + "]")
+
+
+def test_phasesAreWrittenAsJsonLines(tracer, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer.open(path)
+    with tracer.phase("gdb.load", mode="full") as trace:
+        trace["bytes"] = 1024
+
+    [event] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert event["phase"] == "gdb.load"
+    assert event["mode"] == "full" and event["bytes"] == 1024
+    assert event["duration"] >= 0
+    assert event["thread"] == threading.current_thread().name
+
+
+def test_jsonLinesAreAppended(tracer, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    for name in ("first", "second"):
+        tracer.open(path)
+        with tracer.phase(name):
+            pass
+        tracer.close()
+
+    assert [json.loads(line)["phase"] for line in path.read_text().splitlines()] == [
+        "first",
+        "second",
+    ]
+
+
+def test_nestedPhasesAreWrittenAsChromeEvents(tracer, tmp_path):
+    path = tmp_path / "trace.json"
+    tracer.open(path, format="chrome")
+    with tracer.phase("runBinary"):
+        with tracer.phase("gdb.load"):
+            pass
+        with tracer.phase("target.run") as trace:
+            trace["status"] = "finished"
+
+    events = readChrome(path)
+    # a phase is written once it ends, so the enclosing one comes last
+    assert [event["name"] for event in events] == ["gdb.load", "target.run", "runBinary"]
+    assert all(event["ph"] == "X" for event in events)
+    assert events[1]["args"] == {"status": "finished"}
+    outer = events[2]
+    for inner in events[:2]:
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_failingPhaseIsRecorded(tracer, tmp_path):
+    path = tmp_path / "trace.json"
+    tracer.open(path, format="chrome")
+    with pytest.raises(RuntimeError):
+        with tracer.phase("gdb.launch"):
+            raise RuntimeError("Connection refused")
+
+    assert [event["name"] for event in readChrome(path)] == ["gdb.launch"]
+
+
+def test_closedTracerRecordsNothing(tracer, tmp_path):
+    assert not tracer.enabled()
+    with tracer.phase("gdb.load", mode="full") as trace:
+        trace["bytes"] = 1024
+    assert trace == {"mode": "full", "bytes": 1024}
+
+    path = tmp_path / "trace.jsonl"
+    tracer.open(path)
+    tracer.close()
+    with tracer.phase("gdb.load"):
+        pass
+    assert not tracer.enabled()
+    assert path.read_text() == ""
+
+
+def test_unknownFormatIsRejected(tracer, tmp_path):
+    with pytest.raises(RuntimeError, match="Invalid trace format: xml"):
+        tracer.open(tmp_path / "trace.xml", format="xml")
+    assert not tracer.enabled()
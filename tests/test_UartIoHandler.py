@@ -0,0 +1,237 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import socket
+import threading
+import time
+
+import pytest
+
+import libs.UartIoHandler
+from libs.IoCaptureEngine import IoCaptureEngine
+from libs.SshConnectionPool import sshConnectionPool
+from libs.UartIoHandler import UartIoHandler
+from tests.support import freePort
+from tests.support.MockSsh import MockSshClient
+from tests.support.UartStreamServer import UartStreamServer
+
+
+class FakeLocalSocat:
+    """
+    Local `socat` linking the pty with the remote bridge, recording its arguments.
+    """
+
+    started = []
+
+    def __init__(self, args):
+        self.args = args
+        self.running = True
+        self.started.append(self)
+
+    def terminate(self):
+        self.running = False
+
+    def wait(self, timeout=None):
+        return 0
+
+
+@pytest.fixture
+def host(monkeypatch):
+    client = MockSshClient(lambda port: UartStreamServer(0, port=port, triggered=True))
+    monkeypatch.setattr(sshConnectionPool, "clientFactory", lambda config: client)
+    monkeypatch.setattr(libs.UartIoHandler.subprocess, "Popen", FakeLocalSocat)
+    FakeLocalSocat.started = []
+    yield client
+    client.close()
+
+
+def createHandler(bridge, virtualDeviceName, port):
+    return UartIoHandler(
+        "127.0.0.1",
+        "user",
+        "password",
+        "/dev/ttyUSB0",
+        115200,
+        port,
+        virtualDeviceName=virtualDeviceName,
+        readyTimeout=5,
+        bridge=bridge,
+    )
+
+
+@pytest.mark.parametrize("bridge", ["session", "managed"])
+def test_ptyHandlerReleasesEverythingOnClose(host, bridge):
+    port = freePort()
+    handler = createHandler(bridge, "/tmp/virtualConsole", port)
+    for _ in range(2):
+        handler.open()
+        localSocat = FakeLocalSocat.started[-1]
+        assert localSocat.args[1:] == [
+            "pty,link=/tmp/virtualConsole,raw,echo=0",
+            "tcp:127.0.0.1:" + str(port),
+        ]
+        assert handler.fileno() is None
+        handler.reset()
+
+        handler.close()
+        assert not localSocat.running
+        assert not host.leases
+        assert handler.sshConfig not in sshConnectionPool.refCounts
+
+
+@pytest.mark.parametrize("virtualDeviceName", ["", "/tmp/virtualConsole"])
+def test_leaseIsHeldWhileOpen(host, virtualDeviceName):
+    port = freePort()
+    handler = createHandler("managed", virtualDeviceName, port)
+    other = createHandler("managed", "", port)
+    handler.open()
+    with pytest.raises(RuntimeError, match="already running elsewhere"):
+        other.open()
+
+    handler.close()
+    other.open()
+    other.close()
+    assert other.sshConfig not in sshConnectionPool.refCounts
+
+
+class ResetSocket:
+    """
+    Socket stand-in of a connection reset by the remote `socat`.
+    """
+
+    def recv_into(self, buffer, size, flags=0):
+        raise ConnectionResetError("Connection reset by peer")
+
+
+@pytest.fixture
+def connected():
+    # the handler reads one end of a socket pair, as if attached to the bridge
+    handler = createHandler("session", "", 0)
+    own, peer = socket.socketpair()
+    handler.uartSocket = own
+    yield handler, peer
+    own.close()
+    peer.close()
+
+
+def test_closedConnectionReadsAsEndOfFile(connected):
+    handler, peer = connected
+    peer.sendall(b"last words")
+    peer.close()
+    buffer = bytearray(64)
+
+    assert handler.receiveInto(buffer, timeout=1) == 10
+    assert handler.receiveInto(buffer, timeout=1) == 0
+
+
+def test_socketErrorReadsAsEndOfFile(connected):
+    handler, _ = connected
+    handler.uartSocket = ResetSocket()
+
+    assert handler.receiveInto(bytearray(64)) == 0
+
+
+def test_drainingStopsAtEndOfFile(connected):
+    handler, peer = connected
+    data = bytes(range(256)) * 8192
+
+    def send():
+        peer.sendall(data)
+        peer.close()
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    file = io.BytesIO()
+    start = time.monotonic()
+    total = handler.drainToFile(file, quietTime=5, timeout=10)
+    thread.join()
+
+    assert total == len(data)
+    assert file.getvalue() == data
+    # the end of file ends the drain, not the quiet time
+    assert time.monotonic() - start < 5
+
+
+def test_readSizeGrowsWithFullReadsAndShrinksWithShortOnes(connected):
+    handler, peer = connected
+    peer.sendall(bytes(3 * handler.OPTIMAL_READ_SIZE))
+    assert handler.receiveInto(bytearray(handler.getOptimalReadSize())) == handler.OPTIMAL_READ_SIZE
+    assert handler.getOptimalReadSize() == 2 * handler.OPTIMAL_READ_SIZE
+    handler.receiveInto(bytearray(handler.getOptimalReadSize()))
+    assert handler.getOptimalReadSize() == 4 * handler.OPTIMAL_READ_SIZE
+
+    peer.sendall(b"tick\r\n")
+    handler.receiveInto(bytearray(handler.getOptimalReadSize()))
+    assert handler.getOptimalReadSize() == 2 * handler.OPTIMAL_READ_SIZE
+    for _ in range(3):
+        peer.sendall(b"tick\r\n")
+        handler.receiveInto(bytearray(handler.getOptimalReadSize()))
+    assert handler.getOptimalReadSize() == handler.OPTIMAL_READ_SIZE
+
+
+def test_readSizeIsCapped(connected):
+    handler, peer = connected
+    handler.readSize = handler.MAX_READ_SIZE
+    peer.sendall(bytes(16))
+    handler.receiveInto(bytearray(16))
+
+    assert handler.getOptimalReadSize() == handler.MAX_READ_SIZE
+
+
+class ReadSizeSink:
+    """
+    Sink recording the handler's read size at each write of the capture engine.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.count = 0
+        self.readSizes = []
+
+    def write(self, data):
+        self.count += len(data)
+        self.readSizes.append(self.handler.getOptimalReadSize())
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_captureEngineFollowsTheReadSize(connected):
+    handler, peer = connected
+    sink = ReadSizeSink(handler)
+    engine = IoCaptureEngine()
+    engine.add(handler, sink, name="console")
+    # a burst the engine can't keep up with, then a slow trickle
+    peer.sendall(bytes(128 * 1024))
+    engine.start()
+    for _ in range(10):
+        time.sleep(0.02)
+        peer.sendall(b"tick\r\n")
+    peer.close()
+
+    assert engine.finish(quietTime=0.2, timeout=5) == {"console": 128 * 1024 + 60}
+    assert max(sink.readSizes) > handler.OPTIMAL_READ_SIZE
+    assert sink.readSizes[-1] == handler.OPTIMAL_READ_SIZE
@@ -0,0 +1,277 @@
+# This file is part of the Test Environment build system.
+#
+# @copyright 2021 N7 Space Sp. z o.o.
+#
+# Test Environment was developed under a programme of,
+# and funded by, the European Space Agency (the "ESA").
+#
+#
+# Licensed under the ESA Public License (ESA-PL) Permissive,
+# Version 2.3 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://essr.esa.int/license/list
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import socket
+
+import pytest
+
+import gdb_runner
+import libs.LocalSerialIoHandler
+from libs.GdbInterface import GdbRuntimeError
+from tests.support.ElfWriter import SHF_ALLOC, SHF_EXECINSTR, STT_FUNC, STT_OBJECT, writeElf
+from tests.support.SocketIoHandler import SocketIoHandler
+
+RESET_HANDLER = 0x00400100
+EXIT = 0x00400200
+HARD_FAULT = 0x00400300
+
+CONFIG = """
+[gdbServer]
+path = openocd
+args = -f board.cfg
+
+[gdb]
+address = 127.0.0.1:3333
+path = gdb-multiarch
+verbose =
+exitSymbols = _exit, abort, HardFault_Handler
+flashCacheDir = {cache}
+
+[ioConsole]
+type = serial
+hardwareDevicePath = /dev/ttyACM0
+baudrate = 115200
+parity = PARITY_NONE
+
+[ioUart4]
+type = serial
+hardwareDevicePath = /dev/ttyUSB0
+baudrate = 115200
+parity = PARITY_NONE
+"""
+
+
+class FakeServer:
+    """
+    GdbServerInvoker stand-in, which becomes ready unless `ready` is False.
+    """
+
+    ready = True
+    instances = []
+
+    def __init__(self, path, args, config, **kwargs):
+        self.closed = False
+        self.instances.append(self)
+
+    def open(self):
+        pass
+
+    def waitUntilReady(self, pattern, timeout):
+        if not self.ready:
+            raise RuntimeError("GDB server did not report '" + pattern + "'.")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeGdb:
+    """
+    GdbInterface stand-in. The target stops on the breakpoint at `stopAt`,
+    with `exitCode` in r0, or keeps running until the timeout if it is None.
+    `run` may be set to an exception raised while waiting for the target.
+    """
+
+    connects = True
+    stopAt = EXIT
+    exitCode = 0
+    run = None
+    instances = []
+
+    def __init__(self, address, path, **kwargs):
+        self.commands = []
+        self.breakpoints = {}
+        self.lastBreakpoint = 0
+        self.running = False
+        self.lastStop = None
+        self.terminated = False
+        self.shutDown = False
+        self.instances.append(self)
+
+    def launch(self):
+        if not self.connects:
+            raise GdbRuntimeError("127.0.0.1:3333: Connection refused.")
+
+    def load(self, path, reset=False):
+        pass
+
+    def execBatch(self, commands, timeout=30, raiseOnError=True):
+        results = []
+        for command in commands:
+            self.commands.append(command)
+            payload = {}
+            if command.startswith("-break-insert"):
+                self.lastBreakpoint += 1
+                self.breakpoints[int(command.split("*")[1], 0)] = self.lastBreakpoint
+                payload = {"bkpt": {"number": str(self.lastBreakpoint)}}
+            results.append({"message": "done", "payload": payload})
+        return results
+
+    def start(self):
+        self.running = True
+
+    def isRunning(self):
+        return self.running
+
+    def waitForFinish(self, timeout=1000, interruptEvent=None):
+        if self.run is not None:
+            raise self.run
+        if self.stopAt is None:
+            return False
+        self.lastStop = {"reason": "breakpoint-hit", "bkptno": str(self.breakpoints[self.stopAt])}
+        self.running = False
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def evaluate(self, expression):
+        assert expression == "$r0"
+        return hex(self.exitCode)
+
+    def snapshot(self, stackSize):
+        return {"frames": []}
+
+    def terminate(self):
+        self.terminated = True
+        self.running = False
+
+    def shutdown(self):
+        self.shutDown = True
+
+
+def openChannel(*args):
+    # the whole output is there at once, so the capture ends with the end of file
+    handler = SocketIoHandler()
+    handler.peer.sendall(b"Test started\r\n")
+    handler.peer.shutdown(socket.SHUT_WR)
+    return handler
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(gdb_runner, "GdbServerInvoker", FakeServer)
+    monkeypatch.setattr(gdb_runner, "GdbInterface", FakeGdb)
+    monkeypatch.setattr(libs.LocalSerialIoHandler, "LocalSerialIoHandler", openChannel)
+    monkeypatch.setattr(FakeServer, "instances", [])
+    monkeypatch.setattr(FakeGdb, "instances", [])
+
+    configPath = tmp_path / "board.cfg"
+    configPath.write_text(CONFIG.format(cache=tmp_path / "cache"))
+    runner = gdb_runner.gdb_runner(str(configPath), "", "")
+    runner.setLogPaths(str(tmp_path / "console.log"), str(tmp_path / "uart4.log"))
+    yield runner
+    runner.shutdown()
+
+
+@pytest.fixture
+def binary(tmp_path):
+    path = str(tmp_path / "test.elf")
+    writeElf(
+        path,
+        [(".text", 0x00400000, bytes(1024), SHF_ALLOC | SHF_EXECINSTR)],
+        [
+            ("Reset_Handler", RESET_HANDLER, STT_FUNC),
+            ("_exit", EXIT, STT_FUNC),
+            ("HardFault_Handler", HARD_FAULT, STT_FUNC),
+            ("_estack", 0x20460000, STT_OBJECT),
+        ],
+    )
+    return path
+
+
+def test_exitCodeIsReadOnExitBreakpoint(runner, binary, monkeypatch, tmp_path):
+    monkeypatch.setattr(FakeGdb, "exitCode", 3)
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "finished"
+    assert result["exitSymbol"] == "_exit"
+    assert result["exitCode"] == 3
+    assert (tmp_path / "console.log").read_bytes() == b"Test started\r\n"
+
+
+def test_crashHandlerGivesCrashVerdict(runner, binary, monkeypatch):
+    monkeypatch.setattr(FakeGdb, "stopAt", HARD_FAULT)
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "finished"
+    assert result["exitSymbol"] == "HardFault_Handler"
+    assert result["verdict"] == "crash"
+    assert "exitCode" not in result
+
+
+def test_missingExitSymbolIsSkipped(runner, binary, capsys):
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "finished"
+    assert [c for c in FakeGdb.instances[0].commands if c.startswith("-break-insert")] == [
+        "-break-insert -h *{:#x}".format(EXIT),
+        "-break-insert -h *{:#x}".format(HARD_FAULT),
+    ]
+    assert "Exit breakpoint on abort not set: symbol not found" in capsys.readouterr().out
+
+
+def test_timeoutLeavesNoExitReport(runner, binary, monkeypatch):
+    monkeypatch.setattr(FakeGdb, "stopAt", None)
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "timeout"
+    assert "exitSymbol" not in result and "exitCode" not in result
+    assert not FakeGdb.instances[0].running
+
+
+def test_breakpointsAreReplacedOnTheNextRun(runner, binary):
+    runner.runBinary(binary)
+    FakeGdb.instances[0].commands = []
+    result = runner.runBinary(binary)
+
+    assert result["exitSymbol"] == "_exit"
+    assert "-break-delete 1 2" in FakeGdb.instances[0].commands
+
+
+def test_interruptStopsTheBatchAndDropsTheSession(runner, binary, monkeypatch):
+    monkeypatch.setattr(FakeGdb, "run", KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        runner.runBinary(binary)
+
+    gdb = FakeGdb.instances[0]
+    assert gdb.terminated and gdb.shutDown
+    assert FakeServer.instances[0].closed
+
+
+def test_serverNotReadyIsClosed(runner, binary, monkeypatch):
+    monkeypatch.setattr(FakeServer, "ready", False)
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "error"
+    assert "did not report" in result["message"]
+    assert FakeServer.instances[0].closed
+    assert not FakeGdb.instances
+
+
+def test_gdbFailingToConnectIsShutDown(runner, binary, monkeypatch):
+    monkeypatch.setattr(FakeGdb, "connects", False)
+    result = runner.runBinary(binary)
+
+    assert result["status"] == "error"
+    assert "Connection refused" in result["message"]
+    assert FakeGdb.instances[0].shutDown
+    assert FakeServer.instances[0].closed